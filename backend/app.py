@@ -3,6 +3,7 @@ Simplified Flask Application Entry Point
 """
 import os
 import sys
+import json
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -17,7 +18,9 @@ _project_root = Path(__file__).parent.parent
 _env_file = _project_root / '.env'
 load_dotenv(dotenv_path=_env_file, override=True)
 
-from flask import Flask
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
 from flask_cors import CORS
 from models import db
 from config import Config
@@ -25,6 +28,7 @@ from controllers.material_controller import material_bp, material_global_bp
 from controllers.reference_file_controller import reference_file_bp
 from controllers.settings_controller import settings_bp
 from controllers import project_bp, page_bp, template_bp, user_template_bp, export_bp, file_bp
+from services.storage_gc_service import start_storage_gc, run_storage_gc
 
 
 # Enable SQLite WAL mode for all connections
@@ -114,6 +118,11 @@ def create_app():
         # Load settings from database and sync to app.config
         _load_settings_to_config(app)
 
+    # Storage GC: reclaim export intermediates, temp files and old image versions
+    app.cli.add_command(storage_gc_command)
+    if os.getenv('TESTING') != 'true':
+        start_storage_gc(app)
+
     # Health check endpoint
     @app.route('/health')
     def health_check():
@@ -151,6 +160,15 @@ def create_app():
     return app
 
 
+@click.command('storage-gc')
+@click.option('--dry-run', is_flag=True, help='Only report what would be reclaimed')
+@with_appcontext
+def storage_gc_command(dry_run):
+    """Reclaim unreferenced and expired files in the upload folder"""
+    report = run_storage_gc(current_app._get_current_object(), dry_run=dry_run)
+    click.echo(json.dumps(report.to_dict(), indent=2))
+
+
 def _load_settings_to_config(app):
     """Load settings from database and apply to app.config on startup"""
     from models import Settings
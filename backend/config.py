@@ -105,6 +105,77 @@ class Config:
     # 百度 API 配置（用于 OCR 和图像修复）
     BAIDU_OCR_API_KEY = os.getenv('BAIDU_OCR_API_KEY', '')
     BAIDU_OCR_API_SECRET = os.getenv('BAIDU_OCR_API_SECRET', '')
+    BAIDU_INPAINT_CONCURRENCY = int(os.getenv('BAIDU_INPAINT_CONCURRENCY', '4'))  # 百度图像修复的进程内并发请求上限（分块修复同样受限）
+    # 百度OCR（高精度文字 / 表格）原始响应的磁盘缓存，按图片内容哈希 + 识别参数命中
+    OCR_CACHE_ENABLED = os.getenv('OCR_CACHE_ENABLED', 'true').lower() == 'true'
+    OCR_CACHE_DIR = os.getenv('OCR_CACHE_DIR', os.path.join(BASE_DIR, 'instance', 'ocr_cache'))
+    OCR_CACHE_MAX_MB = int(os.getenv('OCR_CACHE_MAX_MB', '256'))  # 超出后按最近使用时间淘汰
+    # 本地CPU OCR（需 uv sync --extra local-ocr）：混合提取器先本地识别文字，平均置信度达标时跳过百度高精度OCR
+    LOCAL_OCR_ENABLED = os.getenv('LOCAL_OCR_ENABLED', 'false').lower() == 'true'
+    LOCAL_OCR_MIN_CONFIDENCE = float(os.getenv('LOCAL_OCR_MIN_CONFIDENCE', '0.9'))
+
+    # 可编辑导出的本地重绘快速路径：纯色/渐变背景在本地CPU填充，处理不了的区域再调用上面选择的远程方法
+    LOCAL_INPAINT_ENABLED = os.getenv('LOCAL_INPAINT_ENABLED', 'true').lower() == 'true'
+    LOCAL_INPAINT_MIN_CONFIDENCE = float(os.getenv('LOCAL_INPAINT_MIN_CONFIDENCE', '0.8'))
+    # 混合重绘的画质提升模式: 'regions' (只裁剪被修复区域并行提升后羽化贴回，默认) / 'full' (整页重新生成)
+    INPAINT_ENHANCE_MODE = os.getenv('INPAINT_ENHANCE_MODE', 'regions')
+    INPAINT_ENHANCE_TILE_WORKERS = int(os.getenv('INPAINT_ENHANCE_TILE_WORKERS', '4'))
+    # 可编辑导出的递归预算（每次导出共享，0 表示不限制）：页面本身总是完整处理，
+    # 子元素按面积从大到小处理，预算用尽后剩余的子元素不再递归拆分，保留为图片并记录在导出警告中
+    EXPORT_BUDGET_SECONDS = float(os.getenv('EXPORT_BUDGET_SECONDS', '0'))
+    EXPORT_BUDGET_REMOTE_CALLS = int(os.getenv('EXPORT_BUDGET_REMOTE_CALLS', '0'))  # 元素提取 + 重绘调用次数
+    EXPORT_BUDGET_INPAINT_CALLS = int(os.getenv('EXPORT_BUDGET_INPAINT_CALLS', '0'))
+    EXPORT_BUDGET_ELEMENTS = int(os.getenv('EXPORT_BUDGET_ELEMENTS', '0'))
+
+    # 外部HTTP客户端连接池配置（百度 / MinerU 共享Session）
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))  # 缓存的host连接池数量
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '32'))  # 每个host的最大keep-alive连接数
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '2'))  # 连接失败/网关错误的自动重试次数
+
+    # 图片编码负载缓存（参考图/页面图发送给Provider前的编码结果，进程内复用）
+    IMAGE_PAYLOAD_CACHE_MB = int(os.getenv('IMAGE_PAYLOAD_CACHE_MB', '256'))
+
+    # 上传文件存储后端配置
+    # 可选值: 'local' (本地目录，默认), 'local_object' (本地对象存储替身，用于开发/测试), 's3' (S3兼容对象存储)
+    # 远程后端下 UPLOAD_FOLDER 作为读穿透缓存，多个应用节点可共享同一个桶
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+    STORAGE_LOCAL_OBJECT_ROOT = os.getenv('STORAGE_LOCAL_OBJECT_ROOT', os.path.join(PROJECT_ROOT, 'object_store'))
+    STORAGE_PRESIGN_EXPIRES = int(os.getenv('STORAGE_PRESIGN_EXPIRES', '3600'))  # 预签名下载URL有效期（秒）
+    STORAGE_REDIRECT_DOWNLOADS = os.getenv('STORAGE_REDIRECT_DOWNLOADS', 'true').lower() == 'true'  # 远程后端下载时重定向到预签名URL
+    S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL', '')
+    S3_BUCKET = os.getenv('S3_BUCKET', '')
+    S3_ACCESS_KEY = os.getenv('S3_ACCESS_KEY', '')
+    S3_SECRET_KEY = os.getenv('S3_SECRET_KEY', '')
+    S3_REGION = os.getenv('S3_REGION', '')
+    S3_PREFIX = os.getenv('S3_PREFIX', '')
+
+    # 生成图片原图的保存格式: 'png' (默认) / 'webp' (无损 WebP，编码更快、体积更小)
+    PAGE_IMAGE_FORMAT = os.getenv('PAGE_IMAGE_FORMAT', 'png')
+    PAGE_IMAGE_PNG_COMPRESS_LEVEL = int(os.getenv('PAGE_IMAGE_PNG_COMPRESS_LEVEL', '6'))  # 0-9，越低编码越快、文件越大
+    IMAGE_PREPARE_WORKERS = int(os.getenv('IMAGE_PREPARE_WORKERS', '4'))  # 批量生成时构建提示词、预加载参考图的线程数
+    IMAGE_IO_WORKERS = int(os.getenv('IMAGE_IO_WORKERS', '2'))  # 批量生成时编码/写盘的线程数（不占用图片模型并发）
+
+    # 页面缩略图金字塔（后台生成，前端通过 ?w= 或 srcset 选择尺寸）
+    THUMBNAIL_WIDTHS = os.getenv('THUMBNAIL_WIDTHS', '320,640,1280,1920')  # 留空则关闭
+    THUMBNAIL_FORMATS = os.getenv('THUMBNAIL_FORMATS', 'avif,webp,jpeg')  # 按 Accept 头优先选择，JPEG 始终作为兜底
+    THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', '2'))
+
+    # 静态文件发送配置（/files/ 路由）
+    FILE_CACHE_MAX_AGE = int(os.getenv('FILE_CACHE_MAX_AGE', str(365 * 24 * 3600)))  # 带版本号文件的缓存时间（秒）
+    # 可选值: '' (由 Flask 发送), 'x-accel' (nginx X-Accel-Redirect), 'x-sendfile' (Apache/lighttpd X-Sendfile)
+    FILE_SENDFILE_MODE = os.getenv('FILE_SENDFILE_MODE', '')
+    FILE_ACCEL_REDIRECT_PREFIX = os.getenv('FILE_ACCEL_REDIRECT_PREFIX', '/protected-uploads/')  # nginx internal location，指向 UPLOAD_FOLDER
+
+    # 上传目录回收（后台定期清理导出中间产物、临时文件、未引用的 MinerU 结果和历史图片版本）
+    GC_INTERVAL_SECONDS = int(os.getenv('GC_INTERVAL_SECONDS', '3600'))  # 0 表示关闭后台回收
+    GC_EDITABLE_TTL_HOURS = float(os.getenv('GC_EDITABLE_TTL_HOURS', '24'))  # editable_images 与临时目录
+    GC_MINERU_TTL_HOURS = float(os.getenv('GC_MINERU_TTL_HOURS', '24'))  # 未被引用的 MinerU 解析结果
+    GC_EXPORT_TTL_HOURS = float(os.getenv('GC_EXPORT_TTL_HOURS', '0'))  # 导出文件（用户可见，默认不清理），0 表示不按时间清理
+    GC_ORPHAN_TTL_HOURS = float(os.getenv('GC_ORPHAN_TTL_HOURS', '24'))  # 数据库中没有引用的页面图片/项目目录
+    GC_KEEP_IMAGE_VERSIONS = int(os.getenv('GC_KEEP_IMAGE_VERSIONS', '0'))  # 每页保留的最近版本数（用户可见，默认全部保留），0 表示全部保留
+    GC_MAX_TOTAL_MB = int(os.getenv('GC_MAX_TOTAL_MB', '0'))  # 上传目录总大小预算，0 表示不限制
+    GC_MIN_AGE_MINUTES = float(os.getenv('GC_MIN_AGE_MINUTES', '30'))  # 文件至少存在这么久才会被回收
+    GC_BATCH_SIZE = int(os.getenv('GC_BATCH_SIZE', '200'))
 
 
 class DevelopmentConfig(Config):
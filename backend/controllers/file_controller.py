@@ -1,15 +1,146 @@
 """
 File Controller - handles static file serving
 """
-from flask import Blueprint, send_from_directory, current_app
+from flask import Blueprint, send_from_directory, send_file, current_app, redirect, request
 from utils import error_response, not_found
-from utils.path_utils import find_file_with_prefix
+from utils.path_utils import find_storage_file_with_prefix
+from services.storage import get_storage, LocalObjectStoreBackend
+from services.thumbnail_service import get_thumbnail_widths, get_thumbnail_formats
+from services.file_service import THUMBNAIL_EXTENSIONS
+import hashlib
+import mimetypes
 import os
+import re
 from pathlib import Path
+from urllib.parse import quote
 from werkzeug.utils import secure_filename
 
 file_bp = Blueprint('files', __name__, url_prefix='/files')
 
+# 带版本号/时间戳的页面图片文件名，内容永不改变：{page_id}_v{n}.png、{page_id}_v{n}_thumb.jpg、{page_id}_{ms}.png
+VERSIONED_PAGE_FILE_PATTERN = re.compile(r'_(v\d+(_thumb|_w\d+)?|\d{13})\.[A-Za-z0-9]+$')
+
+# 可以按 ?w= 选择缩略图的页面图片：{page_id}_v{n}.png 或 {page_id}_v{n}_thumb.jpg
+THUMBNAIL_SOURCE_PATTERN = re.compile(r'^(?P<stem>.+_v\d+)(_thumb)?\.[A-Za-z0-9]+$')
+
+THUMBNAIL_MIMETYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+def _select_thumbnail(file_dir: str, key_prefix: str, filename: str, requested_width: int):
+    """
+    按请求宽度和 Accept 头选择缩略图金字塔中的文件
+
+    选择不小于请求宽度的最小尺寸（超过最大尺寸时取最大），格式按 AVIF > WebP > JPEG 中浏览器
+    明确声明支持的第一个。缩略图尚未生成或不存在时返回 None，由调用方回退到原文件。
+    """
+    match = THUMBNAIL_SOURCE_PATTERN.match(filename)
+    widths = get_thumbnail_widths()
+    if not match or not widths:
+        return None
+
+    larger = [w for w in widths if w >= requested_width]
+    candidate_widths = larger or widths[-1:]
+    # 只认明确列出的类型，避免 */* 把 AVIF 匹配给不支持的浏览器
+    accepted = set(request.accept_mimetypes.values())
+    formats = [
+        f for f in get_thumbnail_formats()
+        if f == 'jpeg' or THUMBNAIL_MIMETYPES[f] in accepted
+    ]
+
+    storage = get_storage(current_app.config['UPLOAD_FOLDER'])
+    for width in candidate_widths:
+        for image_format in formats:
+            candidate = f"{match.group('stem')}_w{width}.{THUMBNAIL_EXTENSIONS[image_format]}"
+            if os.path.exists(os.path.join(file_dir, candidate)):
+                return candidate
+            if storage.is_remote and storage.ensure_local(f"{key_prefix}/{candidate}"):
+                return candidate
+    return None
+
+
+def _send_upload(file_dir: str, filename: str, immutable: bool = False,
+                 as_attachment: bool = False, download_name: str = None):
+    """
+    发送上传目录中的文件（支持 ETag / If-None-Match / Range）
+
+    - immutable=True：文件名带版本，内容不变，使用长期缓存 + 与路径相关的强 ETag（多节点一致）
+    - immutable=False：每次用 ETag 重新验证（例如被覆盖上传的 template.png、同名重新导出的文件）
+    - FILE_SENDFILE_MODE 为 x-accel / x-sendfile 时只返回头部，由 nginx / Apache 发送文件内容
+
+    调用方需已确认文件存在。
+    """
+    file_path = Path(file_dir) / filename
+    stat = file_path.stat()
+    relative_path = file_path.relative_to(current_app.config['UPLOAD_FOLDER']).as_posix()
+
+    if immutable:
+        etag = hashlib.sha1(f"{relative_path}:{stat.st_size}".encode()).hexdigest()
+        max_age = current_app.config['FILE_CACHE_MAX_AGE']
+    else:
+        etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        max_age = 0
+
+    def apply_cache_headers(response):
+        response.set_etag(etag)
+        response.cache_control.max_age = max_age
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response
+
+    # 缓存命中时不打开文件，直接返回 304
+    if request.if_none_match.contains(etag):
+        return apply_cache_headers(current_app.response_class(status=304))
+
+    sendfile_mode = (current_app.config.get('FILE_SENDFILE_MODE') or '').lower()
+    if sendfile_mode in ('x-accel', 'x-sendfile'):
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        if sendfile_mode == 'x-accel':
+            prefix = current_app.config['FILE_ACCEL_REDIRECT_PREFIX'].rstrip('/')
+            response.headers['X-Accel-Redirect'] = quote(f"{prefix}/{relative_path}")
+        else:
+            response.headers['X-Sendfile'] = str(file_path.resolve())
+        if as_attachment:
+            response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(download_name or filename)}"
+        return apply_cache_headers(response)
+
+    response = send_from_directory(
+        file_dir, filename,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        etag=etag,
+        max_age=max_age,
+        conditional=True,
+    )
+    return apply_cache_headers(response)
+
+
+def _fetch_or_redirect(key: str, download_name: str = None, allow_redirect: bool = True):
+    """
+    远程存储后端下准备文件
+
+    Returns:
+        (重定向响应, True)：配置了预签名下载时直接把客户端重定向到对象存储
+        (None, 是否存在)：文件已在本地缓存（或本地后端），由调用方 send_from_directory
+    """
+    storage = get_storage(current_app.config['UPLOAD_FOLDER'])
+    if not storage.is_remote:
+        return None, True
+
+    try:
+        if allow_redirect and current_app.config.get('STORAGE_REDIRECT_DOWNLOADS') and storage.exists(key):
+            url = storage.get_download_url(key, filename=download_name)
+            if url:
+                return redirect(url, code=302), True
+        return None, storage.ensure_local(key) is not None
+    except ValueError:
+        # 非法 key（越出上传目录）
+        return None, False
+
 
 @file_bp.route('/<project_id>/<file_type>/<filename>', methods=['GET'])
 def serve_file(project_id, file_type, filename):
@@ -24,6 +155,19 @@ def serve_file(project_id, file_type, filename):
     try:
         if file_type not in ['template', 'pages', 'materials', 'exports']:
             return not_found('File')
+
+        # ?w= 请求缩略图：在本节点选择尺寸/格式（缩略图较小，不重定向到对象存储）
+        wants_thumbnail = file_type == 'pages' and request.args.get('w', '').isdigit()
+
+        redirect_response, found = _fetch_or_redirect(
+            f"{project_id}/{file_type}/{filename}",
+            download_name=filename if file_type == 'exports' else None,
+            allow_redirect=not wants_thumbnail,
+        )
+        if redirect_response is not None:
+            return redirect_response
+        if not found:
+            return not_found('File')
         
         # Construct file path
         file_dir = os.path.join(
@@ -41,28 +185,38 @@ def serve_file(project_id, file_type, filename):
         if not os.path.exists(file_path):
             return not_found('File')
         
-        # Serve file with appropriate headers for downloads
-        response = send_from_directory(file_dir, filename, as_attachment=True)
+        if wants_thumbnail:
+            # 按 ?w= 和 Accept 头返回合适尺寸/格式的缩略图
+            thumbnail = _select_thumbnail(
+                file_dir, f"{project_id}/{file_type}", filename, int(request.args['w'])
+            )
+            # 缩略图尚未生成时回退到原文件，但不长期缓存，生成后重新验证即可拿到缩略图（ETag 不同）
+            response = _send_upload(file_dir, thumbnail or filename, immutable=thumbnail is not None)
+            response.vary.add('Accept')
+            return response
+
+        if file_type != 'exports':
+            # 页面图片/缩略图按版本命名，素材文件名带时间戳，均不会被覆盖
+            immutable = file_type == 'materials' or (
+                file_type == 'pages' and VERSIONED_PAGE_FILE_PATTERN.search(filename) is not None
+            )
+            return _send_upload(file_dir, filename, immutable=immutable)
+
+        # 导出文件可能以同名重新导出，每次通过 ETag 重新验证（支持 Range 断点续传）
+        response = _send_upload(file_dir, filename, as_attachment=True)
+
+        # Set proper MIME types for export files
+        if filename.endswith('.pptx'):
+            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+        elif filename.endswith('.pdf'):
+            response.headers['Content-Type'] = 'application/pdf'
         
-        # Add additional headers for better compatibility
-        if file_type == 'exports':
-            # Set proper MIME types for export files
-            if filename.endswith('.pptx'):
-                response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
-            elif filename.endswith('.pdf'):
-                response.headers['Content-Type'] = 'application/pdf'
-            
-            # Force download with proper filename
-            response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            # Add cache control headers
-            response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-            response.headers['Pragma'] = 'no-cache'
-            response.headers['Expires'] = '0'
-            
-            # Add CORS headers for cross-origin downloads
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition'
+        # Force download with proper filename
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        
+        # Add CORS headers for cross-origin downloads
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition'
         
         return response
     
@@ -80,6 +234,12 @@ def serve_user_template(template_id, filename):
         filename: File name
     """
     try:
+        redirect_response, found = _fetch_or_redirect(f"user-templates/{template_id}/{filename}")
+        if redirect_response is not None:
+            return redirect_response
+        if not found:
+            return not_found('File')
+
         # Construct file path
         file_dir = os.path.join(
             current_app.config['UPLOAD_FOLDER'],
@@ -97,7 +257,7 @@ def serve_user_template(template_id, filename):
             return not_found('File')
         
         # Serve file
-        return send_from_directory(file_dir, filename)
+        return _send_upload(file_dir, filename)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -113,6 +273,12 @@ def serve_global_material(filename):
     """
     try:
         safe_filename = secure_filename(filename)
+        redirect_response, found = _fetch_or_redirect(f"materials/{safe_filename}")
+        if redirect_response is not None:
+            return redirect_response
+        if not found:
+            return not_found('File')
+
         # Construct file path
         file_dir = os.path.join(
             current_app.config['UPLOAD_FOLDER'],
@@ -128,8 +294,8 @@ def serve_global_material(filename):
         if not os.path.exists(file_path):
             return not_found('File')
         
-        # Serve file
-        return send_from_directory(file_dir, safe_filename)
+        # Serve file（文件名带时间戳，不会被覆盖）
+        return _send_upload(file_dir, safe_filename, immutable=True)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -161,7 +327,9 @@ def serve_mineru_file(extract_id, filepath):
             return error_response('INVALID_PATH', 'Invalid file path', 403)
 
         # Try to find file with prefix matching
-        matched_path = find_file_with_prefix(full_path)
+        # 远程存储后端：本地缓存未命中时拉取该文件，前缀匹配失败再拉取所在目录
+        storage = get_storage(current_app.config['UPLOAD_FOLDER'])
+        matched_path = find_storage_file_with_prefix(storage, f"mineru_files/{extract_id}/{filepath}")
         
         if matched_path is not None:
             # Additional security check for matched path
@@ -176,9 +344,36 @@ def serve_mineru_file(extract_id, filepath):
             except Exception:
                 return error_response('INVALID_PATH', 'Invalid file path', 403)
             
-            return send_from_directory(str(matched_path.parent), matched_path.name)
+            # 每次解析生成新的 extract_id，目录内容不会改变
+            return _send_upload(str(matched_path.parent), matched_path.name, immutable=True)
 
         return not_found('File')
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
 
+
+@file_bp.route('/_object/<token>', methods=['GET'])
+def serve_presigned_object(token):
+    """
+    GET /files/_object/{token} - 本地对象存储替身的预签名下载
+
+    Args:
+        token: get_download_url 生成的签名令牌
+    """
+    try:
+        storage = get_storage(current_app.config['UPLOAD_FOLDER'])
+        if not isinstance(storage, LocalObjectStoreBackend):
+            return not_found('File')
+
+        resolved = storage.resolve_download_token(token)
+        if resolved is None:
+            return error_response('INVALID_TOKEN', 'Download link is invalid or expired', 403)
+
+        object_path, download_name = resolved
+        return send_file(
+            str(object_path),
+            as_attachment=bool(download_name),
+            download_name=download_name,
+        )
+    except Exception as e:
+        return error_response('SERVER_ERROR', str(e), 500)
@@ -1,9 +1,9 @@
 """
 Material Controller - handles standalone material image generation
 """
-from flask import Blueprint, request, current_app, send_file
+from flask import Blueprint, request, current_app, Response
 from models import db, Project, Material, Task
-from utils import success_response, error_response, not_found, bad_request
+from utils import success_response, error_response, not_found, bad_request, stream_zip
 from services import FileService
 from services.ai_service_manager import get_ai_service
 from services.task_manager import task_manager, generate_material_image_task
@@ -13,8 +13,6 @@ from typing import Optional
 import tempfile
 import shutil
 import time
-import zipfile
-import io
 
 
 material_bp = Blueprint('materials', __name__, url_prefix='/api/projects')
@@ -119,6 +117,7 @@ def _save_material_file(file, target_project_id: Optional[str]):
 
     filepath = materials_dir / unique_filename
     file.save(str(filepath))
+    file_service._commit(filepath)
 
     relative_path = str(filepath.relative_to(file_service.upload_folder))
     if target_project_id:
@@ -460,33 +459,34 @@ def download_materials_zip():
 
         file_service = FileService(current_app.config['UPLOAD_FOLDER'])
 
-        # Create zip file in memory
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for material in materials:
-                try:
-                    # Get absolute path of the material file
-                    material_path = Path(file_service.get_absolute_path(material.relative_path))
-
-                    if material_path.exists():
-                        # Use original filename or material filename
-                        arcname = material.filename
-                        zip_file.write(str(material_path), arcname)
-                except Exception as e:
-                    current_app.logger.warning(f"Failed to add material {material.id} to zip: {e}")
-                    continue
+        # 在请求上下文中解析文件路径（远程存储后端会先拉取到本地缓存）
+        files = []
+        for material in materials:
+            try:
+                # Get absolute path of the material file
+                material_path = Path(file_service.get_absolute_path(material.relative_path))
 
-        zip_buffer.seek(0)
+                if material_path.exists():
+                    # Use original filename or material filename
+                    files.append((material_path, material.filename))
+            except Exception as e:
+                current_app.logger.warning(f"Failed to add material {material.id} to zip: {e}")
+                continue
 
         # Generate filename with timestamp
         timestamp = int(time.time())
         zip_filename = f"materials_{timestamp}.zip"
 
-        return send_file(
-            zip_buffer,
+        # 边压缩边发送（分块传输），内存占用与归档大小无关
+        return Response(
+            stream_zip(files),
             mimetype='application/zip',
-            as_attachment=True,
-            download_name=zip_filename
+            headers={
+                'Content-Disposition': f'attachment; filename="{zip_filename}"',
+                # 关闭 nginx 代理缓冲，数据块直接转发给客户端
+                'X-Accel-Buffering': 'no',
+            },
+            direct_passthrough=True,
         )
 
     except Exception as e:
@@ -4,7 +4,7 @@ Page Controller - handles page-related endpoints
 import logging
 from flask import Blueprint, request, current_app
 from models import db, Project, Page, PageImageVersion, Task
-from utils import success_response, error_response, not_found, bad_request
+from utils import success_response, error_response, not_found, bad_request, get_outline_snapshot
 from services import FileService, ProjectContext
 from services.ai_service_manager import get_ai_service
 from services.task_manager import task_manager, generate_single_page_image_task, edit_page_image_task
@@ -221,16 +221,8 @@ def generate_page_description(project_id, page_id):
         if not outline_content:
             return bad_request("Page must have outline content first")
         
-        # Reconstruct full outline
-        all_pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
-        outline = []
-        for p in all_pages:
-            oc = p.get_outline_content()
-            if oc:
-                page_data = oc.copy()
-                if p.part:
-                    page_data['part'] = p.part
-                outline.append(page_data)
+        # Full outline (cached snapshot, rebuilt only when the project outline changes)
+        outline = get_outline_snapshot(project_id).flat_outline
         
         # Initialize AI service
         ai_service = get_ai_service()
@@ -307,53 +299,8 @@ def generate_page_image(project_id, page_id):
         if not desc_content:
             return bad_request("Page must have description content first")
         
-        # Reconstruct full outline with part structure
-        all_pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
-        outline = []
-        current_part = None
-        current_part_pages = []
-        
-        for p in all_pages:
-            oc = p.get_outline_content()
-            if not oc:
-                continue
-                
-            page_data = oc.copy()
-            
-            # 如果当前页面属于一个 part
-            if p.part:
-                # 如果这是新的 part，先保存之前的 part（如果有）
-                if current_part and current_part != p.part:
-                    outline.append({
-                        "part": current_part,
-                        "pages": current_part_pages
-                    })
-                    current_part_pages = []
-                
-                current_part = p.part
-                # 移除 part 字段，因为它在顶层
-                if 'part' in page_data:
-                    del page_data['part']
-                current_part_pages.append(page_data)
-            else:
-                # 如果当前页面不属于任何 part，先保存之前的 part（如果有）
-                if current_part:
-                    outline.append({
-                        "part": current_part,
-                        "pages": current_part_pages
-                    })
-                    current_part = None
-                    current_part_pages = []
-                
-                # 直接添加页面
-                outline.append(page_data)
-        
-        # 保存最后一个 part（如果有）
-        if current_part:
-            outline.append({
-                "part": current_part,
-                "pages": current_part_pages
-            })
+        # Full outline with part structure (cached snapshot, rebuilt only when the project outline changes)
+        outline = get_outline_snapshot(project_id).outline
         
         # Initialize services
         ai_service = get_ai_service()
@@ -371,7 +318,7 @@ def generate_page_image(project_id, page_id):
             return bad_request("No template image or style description found for project")
         
         # Generate prompt
-        page_data = page.get_outline_content() or {}
+        page_data = dict(page.get_outline_content() or {})
         if page.part:
             page_data['part'] = page.part
         
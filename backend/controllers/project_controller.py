@@ -1,19 +1,21 @@
 """
 Project Controller - handles project-related endpoints
 """
+import base64
 import json
 import logging
 import traceback
 from datetime import datetime
 
 from flask import Blueprint, request, jsonify, current_app
-from sqlalchemy import desc
-from sqlalchemy.orm import joinedload
+from sqlalchemy import desc, func, and_, or_
+from sqlalchemy.orm import joinedload, load_only
 from werkzeug.exceptions import BadRequest
 
 from models import db, Project, Page, Task, ReferenceFile
 from services import ProjectContext
 from services.ai_service_manager import get_ai_service
+from services.thumbnail_service import get_thumbnail_widths
 from services.task_manager import (
     task_manager,
     generate_descriptions_task,
@@ -21,13 +23,16 @@ from services.task_manager import (
 )
 from utils import (
     success_response, error_response, not_found, bad_request,
-    parse_page_ids_from_body, get_filtered_pages
+    parse_page_ids_from_body, get_filtered_pages, build_outline
 )
 
 logger = logging.getLogger(__name__)
 
 project_bp = Blueprint('projects', __name__, url_prefix='/api/projects')
 
+# 历史列表封面的请求宽度（卡片最宽 256px，按 2x 屏取缩略图），由 /files/ 的 ?w= 选择最接近的档位
+COVER_IMAGE_WIDTH = 512
+
 
 def _get_project_reference_files_content(project_id: str) -> list:
     """
@@ -65,53 +70,104 @@ def _reconstruct_outline_from_pages(pages: list) -> list:
     Returns:
         Outline structure (list) with optional part grouping
     """
-    outline = []
-    current_part = None
-    current_part_pages = []
+    return build_outline((page.part, page.get_outline_content()) for page in pages)
+
+
+def _encode_project_cursor(project) -> str:
+    """Encode keyset pagination cursor from the last project of a page"""
+    raw = f"{project.updated_at.isoformat()}|{project.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def _decode_project_cursor(cursor: str):
+    """Decode keyset pagination cursor into (updated_at, project_id), raises ValueError if invalid"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        updated_at_str, project_id = raw.split('|', 1)
+        return datetime.fromisoformat(updated_at_str), project_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _get_project_page_stats(project_ids: list) -> dict:
+    """
+    Aggregate page statistics for project summaries via SQL (no page rows / JSON loaded)
     
-    for page in pages:
-        outline_content = page.get_outline_content()
-        if not outline_content:
-            continue
-            
-        page_data = outline_content.copy()
-        
-        # 如果当前页面属于一个 part
-        if page.part:
-            # 如果这是新的 part，先保存之前的 part（如果有）
-            if current_part and current_part != page.part:
-                outline.append({
-                    "part": current_part,
-                    "pages": current_part_pages
-                })
-                current_part_pages = []
-            
-            current_part = page.part
-            # 移除 part 字段，因为它在顶层
-            if 'part' in page_data:
-                del page_data['part']
-            current_part_pages.append(page_data)
-        else:
-            # 如果当前页面不属于任何 part，先保存之前的 part（如果有）
-            if current_part:
-                outline.append({
-                    "part": current_part,
-                    "pages": current_part_pages
-                })
-                current_part = None
-                current_part_pages = []
-            
-            # 直接添加页面
-            outline.append(page_data)
+    Returns:
+        Dict of project_id -> {page_count, image_page_count, description_page_count,
+        cover_image_url, first_page_title}
+    """
+    if not project_ids:
+        return {}
     
-    # 保存最后一个 part（如果有）
-    if current_part:
-        outline.append({
-            "part": current_part,
-            "pages": current_part_pages
-        })
+    stats = {
+        project_id: {
+            'page_count': page_count,
+            'image_page_count': image_page_count,
+            'description_page_count': description_page_count,
+        }
+        for project_id, page_count, image_page_count, description_page_count in db.session.query(
+            Page.project_id,
+            func.count(Page.id),
+            func.count(Page.generated_image_path),
+            func.count(Page.description_content)
+        ).filter(Page.project_id.in_(project_ids)).group_by(Page.project_id)
+    }
+    
+    # 封面：每个项目 order_index 最小的已生成图片页面
+    cover_subquery = db.session.query(
+        Page.project_id,
+        func.min(Page.order_index).label('order_index')
+    ).filter(
+        Page.project_id.in_(project_ids),
+        Page.generated_image_path.isnot(None)
+    ).group_by(Page.project_id).subquery()
+    
+    covers = db.session.query(
+        Page.project_id, Page.cached_image_path, Page.generated_image_path
+    ).join(
+        cover_subquery,
+        and_(Page.project_id == cover_subquery.c.project_id,
+             Page.order_index == cover_subquery.c.order_index)
+    ).filter(Page.generated_image_path.isnot(None))
     
-    return outline
+    thumbnail_query = f'?w={COVER_IMAGE_WIDTH}' if get_thumbnail_widths() else ''
+    for project_id, cached_image_path, generated_image_path in covers:
+        project_stats = stats.setdefault(project_id, {})
+        if 'cover_image_url' not in project_stats:
+            display_image_url = Page.build_display_image_url(project_id, cached_image_path, generated_image_path)
+            project_stats['cover_image_url'] = f'{display_image_url}{thumbnail_query}'
+    
+    return stats
+
+
+def _get_first_page_titles(project_ids: list) -> dict:
+    """Get first page outline title for projects (only parses one page per project)"""
+    if not project_ids:
+        return {}
+    
+    first_page_subquery = db.session.query(
+        Page.project_id,
+        func.min(Page.order_index).label('order_index')
+    ).filter(Page.project_id.in_(project_ids)).group_by(Page.project_id).subquery()
+    
+    rows = db.session.query(Page.project_id, Page.outline_content).join(
+        first_page_subquery,
+        and_(Page.project_id == first_page_subquery.c.project_id,
+             Page.order_index == first_page_subquery.c.order_index)
+    )
+    
+    titles = {}
+    for project_id, outline_content in rows:
+        if project_id in titles or not outline_content:
+            continue
+        try:
+            title = json.loads(outline_content).get('title')
+        except (json.JSONDecodeError, AttributeError):
+            title = None
+        if title:
+            titles[project_id] = title
+    return titles
 
 
 @project_bp.route('', methods=['GET'])
@@ -121,34 +177,71 @@ def list_projects():
     
     Query params:
     - limit: number of projects to return (default: 50, max: 100)
-    - offset: offset for pagination (default: 0)
+    - offset: offset for pagination (default: 0, ignored when cursor is provided)
+    - cursor: keyset pagination cursor (next_cursor from previous response)
+    - view: 'full' (default, includes pages) or 'summary' (lightweight fields for history grid)
     """
     try:
         # Parameter validation
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor')
+        view = request.args.get('view', 'full')
+        
+        if view not in ('full', 'summary'):
+            return bad_request("view must be 'full' or 'summary'")
         
         # Enforce limits to prevent performance issues
         limit = min(max(1, limit), 100)  # Between 1-100
         offset = max(0, offset)  # Non-negative
         
+        query = Project.query.order_by(desc(Project.updated_at), desc(Project.id))
+        
+        if view == 'summary':
+            # 摘要模式只加载列表需要的列，页面信息通过聚合查询获取
+            query = query.options(load_only(
+                Project.id, Project.idea_prompt, Project.creation_type, Project.status,
+                Project.created_at, Project.updated_at
+            ))
+        else:
+            query = query.options(joinedload(Project.pages))
+        
+        if cursor:
+            # Keyset 分页：从上一页最后一个项目之后继续，避免 OFFSET 扫描
+            try:
+                cursor_updated_at, cursor_id = _decode_project_cursor(cursor)
+            except ValueError as e:
+                return bad_request(str(e))
+            query = query.filter(or_(
+                Project.updated_at < cursor_updated_at,
+                and_(Project.updated_at == cursor_updated_at, Project.id < cursor_id)
+            ))
+        elif offset:
+            query = query.offset(offset)
+        
         # Fetch limit + 1 items to check for more pages efficiently
         # This avoids a second database query
-        projects_with_extra = Project.query\
-            .options(joinedload(Project.pages))\
-            .order_by(desc(Project.updated_at))\
-            .limit(limit + 1)\
-            .offset(offset)\
-            .all()
+        projects_with_extra = query.limit(limit + 1).all()
         
         # Check if there are more items beyond the current page
         has_more = len(projects_with_extra) > limit
         # Return only the requested limit
         projects = projects_with_extra[:limit]
         
+        if view == 'summary':
+            project_ids = [project.id for project in projects]
+            page_stats = _get_project_page_stats(project_ids)
+            titles = _get_first_page_titles([project.id for project in projects if not project.idea_prompt])
+            for project_id, title in titles.items():
+                page_stats.setdefault(project_id, {})['first_page_title'] = title
+            projects_data = [project.to_summary_dict(page_stats.get(project.id)) for project in projects]
+        else:
+            projects_data = [project.to_dict(include_pages=True) for project in projects]
+        
         return success_response({
-            'projects': [project.to_dict(include_pages=True) for project in projects],
+            'projects': projects_data,
             'has_more': has_more,
+            'next_cursor': _encode_project_cursor(projects[-1]) if has_more else None,
             'limit': limit,
             'offset': offset
         })
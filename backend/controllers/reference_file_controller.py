@@ -16,6 +16,7 @@ import threading
 from models import db, ReferenceFile, Project
 from utils.response import success_response, error_response, bad_request, not_found
 from services.file_parser_service import FileParserService
+from services.storage import get_storage
 
 logger = logging.getLogger(__name__)
 
@@ -184,6 +185,7 @@ def upload_reference_file():
         # Save file
         file.save(str(file_path))
         file_size = os.path.getsize(file_path)
+        get_storage(upload_folder).commit(file_path.relative_to(upload_folder).as_posix())
         
         # Create database record
         reference_file = ReferenceFile(
@@ -247,10 +249,8 @@ def delete_reference_file(file_id):
         # Delete file from disk
         try:
             upload_folder = current_app.config['UPLOAD_FOLDER']
-            file_path = Path(upload_folder) / reference_file.file_path
-            if file_path.exists():
-                file_path.unlink()
-                logger.info(f"Deleted file from disk: {file_path}")
+            if get_storage(upload_folder).delete(reference_file.file_path):
+                logger.info(f"Deleted file from storage: {reference_file.file_path}")
         except Exception as e:
             logger.warning(f"Failed to delete file from disk: {str(e)}")
         
@@ -336,10 +336,10 @@ def trigger_file_parse(file_id):
         
         # 获取文件路径
         upload_folder = current_app.config['UPLOAD_FOLDER']
-        file_path = Path(upload_folder) / reference_file.file_path
+        file_path = get_storage(upload_folder).ensure_local(reference_file.file_path)
         
-        if not file_path.exists():
-            return error_response('FILE_NOT_FOUND', f'File not found: {file_path}', 404)
+        if not file_path:
+            return error_response('FILE_NOT_FOUND', f'File not found: {reference_file.file_path}', 404)
         
         # 启动异步解析
         thread = threading.Thread(
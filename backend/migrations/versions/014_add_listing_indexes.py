@@ -0,0 +1,28 @@
+"""add indexes for project listing and page lookup
+
+Revision ID: 014_add_listing_indexes
+Revises: 013_add_brand_logo_favicon
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014_add_listing_indexes'
+down_revision = '013_add_brand_logo_favicon'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 历史项目列表按 updated_at 倒序 keyset 分页
+    op.create_index('ix_projects_updated_at_id', 'projects', ['updated_at', 'id'], unique=False)
+    # 按项目聚合页面统计、查找首页/封面页
+    op.create_index('ix_pages_project_id_order_index', 'pages', ['project_id', 'order_index'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_pages_project_id_order_index', table_name='pages')
+    op.drop_index('ix_projects_updated_at_id', table_name='projects')
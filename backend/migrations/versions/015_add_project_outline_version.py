@@ -0,0 +1,27 @@
+"""add outline_version to projects
+
+Revision ID: 015_add_outline_version
+Revises: 014_add_listing_indexes
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015_add_outline_version'
+down_revision = '014_add_listing_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 大纲版本号，用于单页操作复用缓存的大纲快照
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('outline_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_column('outline_version')
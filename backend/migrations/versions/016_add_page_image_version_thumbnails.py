@@ -0,0 +1,24 @@
+"""add thumbnails to page_image_versions
+
+Revision ID: 016_add_version_thumbnails
+Revises: 015_add_outline_version
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '016_add_version_thumbnails'
+down_revision = '015_add_outline_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('page_image_versions', sa.Column('thumbnails', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('page_image_versions', 'thumbnails')
@@ -5,6 +5,8 @@ import uuid
 import json
 from pathlib import Path
 from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 from . import db
 
 
@@ -13,6 +15,9 @@ class Page(db.Model):
     Page model - represents a single PPT page/slide
     """
     __tablename__ = 'pages'
+    __table_args__ = (
+        db.Index('ix_pages_project_id_order_index', 'project_id', 'order_index'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
@@ -32,14 +37,40 @@ class Page(db.Model):
                                      lazy='dynamic', cascade='all, delete-orphan',
                                      order_by='PageImageVersion.version_number.desc()')
     
+    def _get_parsed_json(self, column):
+        """
+        Parse a JSON string column, caching the result on this instance
+        
+        缓存以原始字符串对象为键：列被重新赋值（set_*、直接赋值、从数据库刷新）后
+        字符串对象改变，缓存自动失效。返回的结构在多次调用间共享，调用方修改前需自行复制。
+        """
+        raw = getattr(self, column)
+        if not raw:
+            return None
+        
+        cache = self.__dict__.get('_parsed_json_cache')
+        if cache is None:
+            cache = self.__dict__['_parsed_json_cache'] = {}
+        
+        cached = cache.get(column)
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+        
+        try:
+            parsed = json.loads(raw)
+        except json.JSONDecodeError:
+            parsed = None
+        cache[column] = (raw, parsed)
+        return parsed
+    
+    def _invalidate_parsed_json(self, column):
+        cache = self.__dict__.get('_parsed_json_cache')
+        if cache:
+            cache.pop(column, None)
+    
     def get_outline_content(self):
-        """Parse outline_content from JSON string"""
-        if self.outline_content:
-            try:
-                return json.loads(self.outline_content)
-            except json.JSONDecodeError:
-                return None
-        return None
+        """Parse outline_content from JSON string (cached per instance, do not mutate the result)"""
+        return self._get_parsed_json('outline_content')
     
     def set_outline_content(self, data):
         """Set outline_content as JSON string"""
@@ -47,15 +78,11 @@ class Page(db.Model):
             self.outline_content = json.dumps(data, ensure_ascii=False)
         else:
             self.outline_content = None
+        self._invalidate_parsed_json('outline_content')
     
     def get_description_content(self):
-        """Parse description_content from JSON string"""
-        if self.description_content:
-            try:
-                return json.loads(self.description_content)
-            except json.JSONDecodeError:
-                return None
-        return None
+        """Parse description_content from JSON string (cached per instance, do not mutate the result)"""
+        return self._get_parsed_json('description_content')
     
     def set_description_content(self, data):
         """Set description_content as JSON string"""
@@ -63,15 +90,31 @@ class Page(db.Model):
             self.description_content = json.dumps(data, ensure_ascii=False)
         else:
             self.description_content = None
+        self._invalidate_parsed_json('description_content')
+    
+    @staticmethod
+    def build_display_image_url(project_id, cached_image_path, generated_image_path):
+        """Build frontend display URL: use cached image, fallback to original if no cache"""
+        display_image_path = cached_image_path or generated_image_path
+        if not display_image_path:
+            return None
+        filename = Path(display_image_path).name
+        return f'/files/{project_id}/pages/{filename}'
+    
+    @staticmethod
+    def build_display_image_srcset(display_image_url):
+        """Build srcset for the thumbnail pyramid (served by /files/ with ?w=)"""
+        from services.thumbnail_service import get_thumbnail_widths
+        widths = get_thumbnail_widths()
+        if not display_image_url or not widths:
+            return None
+        return ', '.join(f'{display_image_url}?w={width} {width}w' for width in widths)
     
     def to_dict(self, include_versions=False):
         """Convert to dictionary"""
-        # Use cached image for frontend display, fallback to original if no cache
-        display_image_path = self.cached_image_path or self.generated_image_path
-        display_image_url = None
-        if display_image_path:
-            filename = Path(display_image_path).name
-            display_image_url = f'/files/{self.project_id}/pages/{filename}'
+        display_image_url = self.build_display_image_url(
+            self.project_id, self.cached_image_path, self.generated_image_path
+        )
 
         data = {
             'page_id': self.id,
@@ -80,6 +123,8 @@ class Page(db.Model):
             'outline_content': self.get_outline_content(),
             'description_content': self.get_description_content(),
             'generated_image_url': display_image_url,
+            # 仅带版本号的页面图片有缩略图金字塔（cached_image_path 随版本写入）
+            'generated_image_srcset': self.build_display_image_srcset(display_image_url) if self.cached_image_path else None,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
@@ -93,3 +138,41 @@ class Page(db.Model):
     def __repr__(self):
         return f'<Page {self.id}: {self.order_index} - {self.status}>'
 
+
+# 影响项目大纲结构的页面字段
+_OUTLINE_FIELDS = ('outline_content', 'part', 'order_index', 'project_id')
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_outline_version(session, flush_context):
+    """
+    页面新增、删除或大纲相关字段变化时，在同一事务内自增所属项目的 outline_version
+    
+    使用 Core UPDATE 直接写 projects 表，不触发 ORM 的 updated_at 更新，也不会再次 flush。
+    """
+    project_ids = set()
+    for obj in session.new:
+        if isinstance(obj, Page):
+            project_ids.add(obj.project_id)
+    for obj in session.deleted:
+        if isinstance(obj, Page):
+            project_ids.add(obj.project_id)
+    for obj in session.dirty:
+        if isinstance(obj, Page):
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in _OUTLINE_FIELDS):
+                project_ids.add(obj.project_id)
+                # 页面被移动到其他项目时，原项目也需要失效
+                project_ids.update(state.attrs['project_id'].history.deleted or ())
+    
+    project_ids.discard(None)
+    if not project_ids:
+        return
+    
+    from .project import Project
+    projects = Project.__table__
+    session.connection().execute(
+        projects.update()
+        .where(projects.c.id.in_(project_ids))
+        .values(outline_version=projects.c.outline_version + 1, updated_at=projects.c.updated_at)
+    )
@@ -1,6 +1,7 @@
 """
 Page Image Version model - stores historical versions of generated images
 """
+import json
 import uuid
 from datetime import datetime
 from . import db
@@ -17,11 +18,25 @@ class PageImageVersion(db.Model):
     image_path = db.Column(db.String(500), nullable=False)
     version_number = db.Column(db.Integer, nullable=False)  # 版本号，从1开始递增
     is_current = db.Column(db.Boolean, nullable=False, default=False)  # 是否为当前使用的版本
+    thumbnails = db.Column(db.Text, nullable=True)  # JSON: {宽度: {格式: 相对路径}}，后台生成的多分辨率缩略图
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     # Relationships
     page = db.relationship('Page', back_populates='image_versions')
     
+    def get_thumbnails(self):
+        """Parse thumbnails from JSON string"""
+        if self.thumbnails:
+            try:
+                return json.loads(self.thumbnails)
+            except json.JSONDecodeError:
+                return None
+        return None
+    
+    def set_thumbnails(self, data):
+        """Set thumbnails as JSON string"""
+        self.thumbnails = json.dumps(data) if data else None
+    
     def to_dict(self):
         """Convert to dictionary"""
         # Get project_id from page relationship
@@ -38,6 +53,7 @@ class PageImageVersion(db.Model):
             'image_url': f'/files/{project_id}/pages/{self.image_path.split("/")[-1]}' if self.image_path and project_id else None,
             'version_number': self.version_number,
             'is_current': self.is_current,
+            'thumbnails': self.get_thumbnails(),
             'created_at': created_at_str,
         }
     
@@ -11,6 +11,10 @@ class Project(db.Model):
     Project model - represents a PPT project
     """
     __tablename__ = 'projects'
+    __table_args__ = (
+        # 历史列表按 updated_at 倒序做 keyset 分页
+        db.Index('ix_projects_updated_at_id', 'updated_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     idea_prompt = db.Column(db.Text, nullable=True)
@@ -21,9 +25,11 @@ class Project(db.Model):
     template_image_path = db.Column(db.String(500), nullable=True)
     template_style = db.Column(db.Text, nullable=True)  # 风格描述文本（无模板图模式）
     # 导出设置
-    export_extractor_method = db.Column(db.String(50), nullable=True, default='hybrid')  # 组件提取方法: mineru, hybrid
+    export_extractor_method = db.Column(db.String(50), nullable=True, default='hybrid')  # 组件提取方法: mineru, hybrid, local
     export_inpaint_method = db.Column(db.String(50), nullable=True, default='hybrid')  # 背景图获取方法: generative, baidu, hybrid
     status = db.Column(db.String(50), nullable=False, default='DRAFT')
+    # 大纲版本号：页面增删、排序、大纲/part 变化时自增（见 models/page.py 中的 flush 事件），用于大纲快照缓存失效
+    outline_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -36,16 +42,21 @@ class Project(db.Model):
     materials = db.relationship('Material', back_populates='project', lazy='select',
                            cascade='all, delete-orphan')
     
+    # 摘要模式下标题（idea_prompt）截取的最大长度
+    SUMMARY_TITLE_LENGTH = 200
+    
+    @staticmethod
+    def _format_datetime(value):
+        """Format datetime with UTC timezone indicator for proper frontend parsing"""
+        if not value:
+            return None
+        return value.isoformat() + 'Z' if not value.tzinfo else value.isoformat()
+    
     def to_dict(self, include_pages=False):
         """Convert to dictionary"""
         # Format created_at and updated_at with UTC timezone indicator for proper frontend parsing
-        created_at_str = None
-        if self.created_at:
-            created_at_str = self.created_at.isoformat() + 'Z' if not self.created_at.tzinfo else self.created_at.isoformat()
-        
-        updated_at_str = None
-        if self.updated_at:
-            updated_at_str = self.updated_at.isoformat() + 'Z' if not self.updated_at.tzinfo else self.updated_at.isoformat()
+        created_at_str = self._format_datetime(self.created_at)
+        updated_at_str = self._format_datetime(self.updated_at)
         
         data = {
             'project_id': self.id,
@@ -69,6 +80,30 @@ class Project(db.Model):
         
         return data
     
+    def to_summary_dict(self, page_stats=None):
+        """
+        Convert to lightweight summary dictionary (for history listing)
+        
+        Args:
+            page_stats: 页面聚合信息（由列表接口通过聚合查询得到），包含
+                page_count / image_page_count / description_page_count / first_page_title / cover_image_url
+        """
+        page_stats = page_stats or {}
+        idea_prompt = self.idea_prompt or ''
+        
+        return {
+            'project_id': self.id,
+            'title': idea_prompt[:self.SUMMARY_TITLE_LENGTH] or page_stats.get('first_page_title'),
+            'creation_type': self.creation_type,
+            'status': self.status,
+            'page_count': page_stats.get('page_count', 0),
+            'image_page_count': page_stats.get('image_page_count', 0),
+            'description_page_count': page_stats.get('description_page_count', 0),
+            'cover_image_url': page_stats.get('cover_image_url'),
+            'created_at': self._format_datetime(self.created_at),
+            'updated_at': self._format_datetime(self.updated_at),
+        }
+    
     def __repr__(self):
         return f'<Project {self.id}: {self.status}>'
 
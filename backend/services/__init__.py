@@ -1,7 +1,7 @@
 """Services package"""
-from .ai_service import AIService, ProjectContext
+from .ai_service import AIService, ProjectContext, ReferenceImageBundle
 from .file_service import FileService
 from .export_service import ExportService
 
-__all__ = ['AIService', 'ProjectContext', 'FileService', 'ExportService']
+__all__ = ['AIService', 'ProjectContext', 'ReferenceImageBundle', 'FileService', 'ExportService']
 
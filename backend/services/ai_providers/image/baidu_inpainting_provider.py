@@ -8,13 +8,31 @@ import logging
 import base64
 import requests
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple
-from PIL import Image
+from PIL import Image, ImageDraw
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from utils.http_utils import get_http_session
+from utils.image_payload import encode_image
+
 logger = logging.getLogger(__name__)
 
+# 进程内所有百度图像修复请求共享的并发上限（多页并发导出时同样受限）
+_request_slots: Optional[threading.BoundedSemaphore] = None
+_request_slots_lock = threading.Lock()
+
+
+def _get_request_slots() -> threading.BoundedSemaphore:
+    global _request_slots
+    with _request_slots_lock:
+        if _request_slots is None:
+            from config import Config
+            _request_slots = threading.BoundedSemaphore(max(1, Config.BAIDU_INPAINT_CONCURRENCY))
+        return _request_slots
+
 
 class BaiduInpaintingProvider:
     """
@@ -28,6 +46,14 @@ class BaiduInpaintingProvider:
     - 快速响应，适合批量处理
     """
     
+    # 百度图像修复接口要求最长边不超过5000px
+    MAX_IMAGE_SIDE = 5000
+    # 超过该最长边或区域数时，按区域簇切成重叠图块并发请求
+    TILE_MIN_IMAGE_SIDE = 2048
+    TILE_MIN_REGIONS = 12
+    # 图块在区域簇外保留的上下文（像素），修复算法需要周围背景
+    TILE_CONTEXT = 96
+    
     def __init__(self, api_key: str, api_secret: Optional[str] = None):
         """
         初始化百度图像修复 Provider
@@ -77,21 +103,14 @@ class BaiduInpaintingProvider:
         logger.info(f"🔧 开始百度图像修复，共 {len(rectangles)} 个区域")
         
         try:
-            # 转换图片为RGB模式
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
             original_width, original_height = image.size
             logger.info(f"📏 图片尺寸: {original_width}x{original_height}")
             
             # 检查并调整图片大小（最长边不超过5000px）
-            max_size = 5000
+            max_size = self.MAX_IMAGE_SIDE
             scale = 1.0
             if original_width > max_size or original_height > max_size:
                 scale = min(max_size / original_width, max_size / original_height)
-                new_size = (int(original_width * scale), int(original_height * scale))
-                image = image.resize(new_size, Image.Resampling.LANCZOS)
-                logger.info(f"✂️ 压缩图片: {image.size}")
                 
                 # 同时缩放矩形区域
                 rectangles = [
@@ -114,11 +133,11 @@ class BaiduInpaintingProvider:
                 logger.warning("过滤后没有有效的矩形区域，返回原图")
                 return image.copy()
             
-            # 转为base64
-            buffer = io.BytesIO()
-            image.save(buffer, format='JPEG', quality=95)
-            image_bytes = buffer.getvalue()
-            image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+            # 编码图片（RGB转换与缩放在编码时完成；直接从文件打开的图片复用编码缓存）
+            encoded = encode_image(image, target_format='JPEG', quality=95, max_side=max_size)
+            if scale < 1.0:
+                logger.info(f"✂️ 压缩图片: {encoded.size}")
+            image_base64 = encoded.base64
             
             logger.info(f"📦 图片编码完成: {len(image_base64)} bytes, {len(valid_rectangles)} 个矩形区域")
             
@@ -144,12 +163,13 @@ class BaiduInpaintingProvider:
             }
             
             logger.info("🌐 发送请求到百度图像修复API...")
-            response = requests.post(
-                url, 
-                headers=headers, 
-                json=request_body, 
-                timeout=60
-            )
+            with _get_request_slots():
+                response = get_http_session('baidu').post(
+                    url, 
+                    headers=headers, 
+                    json=request_body, 
+                    timeout=60
+                )
             response.raise_for_status()
             
             result = response.json()
@@ -200,6 +220,9 @@ class BaiduInpaintingProvider:
             bboxes: bbox列表，每个bbox格式为 (x0, y0, x1, y1)
             expand_pixels: 扩展像素数，默认2
         
+        大图或区域较多时，按区域簇切成带上下文的图块并发修复，再把各区域贴回原图：
+        单个请求体积和长尾延迟都更小，4K 页面也不会触发接口尺寸限制。
+        
         Returns:
             修复后的PIL Image对象
         """
@@ -220,7 +243,84 @@ class BaiduInpaintingProvider:
                 'height': int(y1 - y0)
             })
         
+        if max(image.size) > self.TILE_MIN_IMAGE_SIDE or len(rectangles) > self.TILE_MIN_REGIONS:
+            tiles = self._plan_tiles(image.size, rectangles)
+            if len(tiles) > 1 or tiles and tiles[0][0] != (0, 0, image.width, image.height):
+                return self._inpaint_tiles(image, tiles)
+        
         return self.inpaint(image, rectangles)
+    
+    def _plan_tiles(
+        self,
+        image_size: Tuple[int, int],
+        rectangles: List[Dict[str, int]]
+    ) -> List[Tuple[Tuple[int, int, int, int], List[Dict[str, int]]]]:
+        """
+        把矩形区域按簇划分为图块
+        
+        距离小于两倍上下文的区域合并为一簇，图块为簇外扩上下文后的范围。
+        
+        Returns:
+            [(图块范围 (x0, y0, x1, y1), 图块内的矩形列表（图块坐标）), ...]
+        """
+        from utils.mask_utils import merge_overlapping_bboxes
+        
+        width, height = image_size
+        context = self.TILE_CONTEXT
+        boxes = [
+            (r['left'], r['top'], r['left'] + r['width'], r['top'] + r['height'])
+            for r in rectangles if r['width'] > 0 and r['height'] > 0
+        ]
+        clusters = merge_overlapping_bboxes(boxes, merge_threshold=context * 2)
+        
+        tiles = []
+        for cx0, cy0, cx1, cy1 in clusters:
+            tile = (max(0, cx0 - context), max(0, cy0 - context),
+                    min(width, cx1 + context), min(height, cy1 + context))
+            members = [
+                {'left': x0 - tile[0], 'top': y0 - tile[1], 'width': x1 - x0, 'height': y1 - y0}
+                for x0, y0, x1, y1 in boxes
+                if x0 >= cx0 and y0 >= cy0 and x1 <= cx1 and y1 <= cy1
+            ]
+            if members:
+                tiles.append((tile, members))
+        return tiles
+    
+    def _inpaint_tiles(
+        self,
+        image: Image.Image,
+        tiles: List[Tuple[Tuple[int, int, int, int], List[Dict[str, int]]]]
+    ) -> Image.Image:
+        """并发修复各图块，只把图块内的矩形区域贴回原图（图块之间的重叠上下文不受影响）"""
+        from config import Config
+        
+        logger.info(f"🧩 分块修复: {len(tiles)} 个图块，共 {sum(len(m) for _, m in tiles)} 个区域")
+        
+        def run(tile_and_members):
+            (x0, y0, x1, y1), members = tile_and_members
+            return self.inpaint(image.crop((x0, y0, x1, y1)), members)
+        
+        workers = min(len(tiles), max(1, Config.BAIDU_INPAINT_CONCURRENCY))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run, tiles))
+        
+        result = image.convert('RGB')
+        for ((x0, y0, x1, y1), members), repaired in zip(tiles, results):
+            if repaired is None:
+                raise Exception(f"Baidu inpainting returned no image for tile {(x0, y0, x1, y1)}")
+            if repaired.size != (x1 - x0, y1 - y0):
+                repaired = repaired.resize((x1 - x0, y1 - y0), Image.Resampling.LANCZOS)
+            mask = Image.new('L', repaired.size, 0)
+            draw = ImageDraw.Draw(mask)
+            for r in members:
+                draw.rectangle(
+                    (r['left'], r['top'], r['left'] + r['width'] - 1, r['top'] + r['height'] - 1),
+                    fill=255
+                )
+            result.paste(repaired.convert('RGB'), (x0, y0), mask)
+        
+        logger.info("✅ 分块修复完成")
+        return result
 
 
 def create_baidu_inpainting_provider(
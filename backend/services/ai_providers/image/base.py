@@ -9,6 +9,9 @@ from PIL import Image
 class ImageProvider(ABC):
     """Abstract base class for image generation"""
     
+    # 参考图最长边的有效上限（像素）：超过该尺寸的参考图在发送前等比缩小，模型侧不会利用更多细节
+    MAX_REFERENCE_IMAGE_SIDE: Optional[int] = 2048
+    
     @abstractmethod
     def generate_image(
         self,
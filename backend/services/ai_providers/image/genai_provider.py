@@ -14,12 +14,18 @@ from io import BytesIO
 from tenacity import retry, stop_after_attempt, wait_exponential
 from .base import ImageProvider
 from config import get_config
+from utils.image_payload import encode_image, is_shared_image
 
 logger = logging.getLogger(__name__)
 
 
 class GenAIImageProvider(ImageProvider):
     """Image generation using Google GenAI SDK (supports both AI Studio and Vertex AI)"""
+    
+    # 可直接透传给Gemini的源图片格式
+    ACCEPTED_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP')
+    # Gemini 会把超过 3072px 的输入图片缩小后再处理
+    MAX_REFERENCE_IMAGE_SIDE = 3072
 
     def __init__(
         self,
@@ -66,6 +72,18 @@ class GenAIImageProvider(ImageProvider):
 
         self.model = model
 
+    def _to_image_part(self, image: Image.Image):
+        """
+        将参考图转换为请求内容
+        
+        直接从文件打开的图片和登记为共享的参考图以编码后的字节发送（编码结果进程内缓存），
+        避免SDK每次重新编码；其他内存中生成的图片仍交给SDK处理。
+        """
+        if getattr(image, 'filename', None) or is_shared_image(image):
+            encoded = encode_image(image, target_format='PNG', accepted_formats=self.ACCEPTED_IMAGE_FORMATS)
+            return types.Part.from_bytes(data=encoded.data, mime_type=encoded.mime_type)
+        return image
+    
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
         wait=wait_exponential(multiplier=1, min=2, max=10),
@@ -101,7 +119,7 @@ class GenAIImageProvider(ImageProvider):
             # Add reference images first (if any)
             if ref_images:
                 for ref_img in ref_images:
-                    contents.append(ref_img)
+                    contents.append(self._to_image_part(ref_img))
             
             # Add text prompt
             contents.append(prompt)
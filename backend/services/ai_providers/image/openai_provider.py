@@ -11,6 +11,7 @@ from openai import OpenAI
 from PIL import Image
 from .base import ImageProvider
 from config import get_config
+from utils.image_payload import encode_image
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,9 @@ logger = logging.getLogger(__name__)
 class OpenAIImageProvider(ImageProvider):
     """Image generation using OpenAI SDK (compatible with Gemini via proxy)"""
     
+    # Source formats that can be sent as-is in an image_url data URL
+    ACCEPTED_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP')
+    
     def __init__(self, api_key: str, api_base: str = None, model: str = "gemini-3-pro-image-preview"):
         """
         Initialize OpenAI image provider
@@ -35,22 +39,21 @@ class OpenAIImageProvider(ImageProvider):
         )
         self.model = model
     
-    def _encode_image_to_base64(self, image: Image.Image) -> str:
+    def _encode_image_to_data_url(self, image: Image.Image) -> str:
         """
-        Encode PIL Image to base64 string
+        Encode PIL Image to a data URL
+        
+        File-backed images are encoded once per process (or passed through unchanged
+        when already PNG/JPEG/WEBP) via utils.image_payload.
         
         Args:
             image: PIL Image object
             
         Returns:
-            Base64 encoded string
+            data URL string (data:image/...;base64,...)
         """
-        buffered = BytesIO()
-        # Convert to RGB if necessary (e.g., RGBA images)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            image = image.convert('RGB')
-        image.save(buffered, format="JPEG", quality=95)
-        return base64.b64encode(buffered.getvalue()).decode('utf-8')
+        return encode_image(image, target_format='JPEG', quality=95,
+                            accepted_formats=self.ACCEPTED_IMAGE_FORMATS).data_url
     
     def generate_image(
         self,
@@ -85,11 +88,10 @@ class OpenAIImageProvider(ImageProvider):
             # Add reference images first (if any)
             if ref_images:
                 for ref_img in ref_images:
-                    base64_image = self._encode_image_to_base64(ref_img)
                     content.append({
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}"
+                            "url": self._encode_image_to_data_url(ref_img)
                         }
                     })
             
@@ -8,11 +8,17 @@ from services.ai_providers.ocr.baidu_accurate_ocr_provider import (
     BaiduAccurateOCRProvider,
     create_baidu_accurate_ocr_provider
 )
+from services.ai_providers.ocr.ocr_cache import (
+    OCRResultCache,
+    get_ocr_cache
+)
 
 __all__ = [
     'BaiduTableOCRProvider',
     'create_baidu_table_ocr_provider',
     'BaiduAccurateOCRProvider',
     'create_baidu_accurate_ocr_provider',
+    'OCRResultCache',
+    'get_ocr_cache',
 ]
 
@@ -5,14 +5,14 @@
 API文档: https://ai.baidu.com/ai-doc/OCR/1k3h7y3db
 """
 import logging
-import base64
 import requests
-import urllib.parse
-from typing import Dict, List, Any, Optional, Literal
-from PIL import Image
-import io
+from typing import Dict, List, Any, Optional, Literal, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from utils.http_utils import get_http_session
+from utils.image_payload import encode_image_file
+from services.ai_providers.ocr.ocr_cache import lookup_ocr_result
+
 logger = logging.getLogger(__name__)
 
 
@@ -58,6 +58,11 @@ class BaiduAccurateOCRProvider:
     - 支持段落输出
     """
     
+    # 最长边限制；可直接透传的源格式及透传时的最大文件大小（超过则重新编码为JPEG）
+    MAX_IMAGE_SIDE = 8192
+    ACCEPTED_IMAGE_FORMATS = ('JPEG', 'PNG', 'BMP')
+    MAX_PASSTHROUGH_BYTES = 3 * 1024 * 1024
+    
     def __init__(self, api_key: str, api_secret: Optional[str] = None):
         """
         初始化百度高精度OCR Provider
@@ -126,61 +131,8 @@ class BaiduAccurateOCRProvider:
         logger.info(f"🔍 开始高精度OCR识别: {image_path}")
         
         try:
-            # 读取图片并转为base64
-            original_width, original_height = 0, 0
-            with Image.open(image_path) as img:
-                # 获取原始图片尺寸
-                original_width, original_height = img.size
-                logger.info(f"📏 图片尺寸: {original_width}x{original_height}")
-                
-                # 转换为RGB模式
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # 压缩图片(如果太大) - 最长边不超过8192px，最短边至少15px
-                max_size = 8192
-                min_size = 15
-                width, height = img.size
-                
-                if width < min_size or height < min_size:
-                    logger.warning(f"⚠️ 图片太小: {width}x{height}, 最短边需要至少{min_size}px")
-                
-                if width > max_size or height > max_size:
-                    ratio = min(max_size / width, max_size / height)
-                    new_size = (int(width * ratio), int(height * ratio))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                    logger.info(f"✂️ 压缩图片: {img.size}")
-                
-                # 转为base64
-                buffer = io.BytesIO()
-                img.save(buffer, format='JPEG', quality=95)
-                image_bytes = buffer.getvalue()
-                image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-                
-                # URL encode
-                image_encoded = urllib.parse.quote(image_base64)
-                logger.info(f"📦 图片编码完成: base64={len(image_base64)} bytes")
-            
-            # 构建请求头
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'Accept': 'application/json',
-            }
-            
-            # 选择认证方式
-            if self.api_key.startswith('bce-v3/'):
-                # 使用BCEv3签名认证 (Authorization头部)
-                headers['Authorization'] = f'Bearer {self.api_key}'
-                url = self.api_url
-                logger.info("🔐 使用BCEv3签名认证")
-            else:
-                # 使用Access Token (URL参数)
-                url = f"{self.api_url}?access_token={self.api_key}"
-                logger.info("🔐 使用Access Token认证")
-            
-            # 构建表单数据
+            # 构建表单数据（图片在请求时再编码，缓存命中时无需编码）
             form_data = {
-                'image': image_encoded,
                 'language_type': language_type,
                 'recognize_granularity': recognize_granularity,
                 'detect_direction': 'true' if detect_direction else 'false',
@@ -196,21 +148,17 @@ class BaiduAccurateOCRProvider:
             if recognize_granularity == 'small' and eng_granularity:
                 form_data['eng_granularity'] = eng_granularity
             
-            # 转换为URL编码的表单数据
-            data = '&'.join([f"{k}={v}" for k, v in form_data.items()])
-            
-            logger.info("🌐 发送请求到百度高精度OCR API...")
-            response = requests.post(url, headers=headers, data=data, timeout=60)
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            # 检查错误
-            if 'error_code' in result:
-                error_msg = result.get('error_msg', 'Unknown error')
-                error_code = result.get('error_code')
-                logger.error(f"❌ 百度API错误: [{error_code}] {error_msg}")
-                raise Exception(f"Baidu API error [{error_code}]: {error_msg}")
+            # 相同图片内容 + 相同参数直接复用缓存的原始响应
+            cache, cache_key, cached = lookup_ocr_result(
+                'baidu_accurate', image_path, dict(form_data, max_side=self.MAX_IMAGE_SIDE)
+            )
+            if cached is not None:
+                result = cached['response']
+                original_width, original_height = cached['image_size']
+            else:
+                result, (original_width, original_height) = self._request_api(image_path, form_data)
+                if cache is not None:
+                    cache.put(cache_key, {'response': result, 'image_size': [original_width, original_height]})
             
             # 解析结果
             log_id = result.get('log_id', '')
@@ -289,6 +237,73 @@ class BaiduAccurateOCRProvider:
             logger.error(f"❌ 高精度OCR识别失败: {str(e)}")
             raise
     
+    def _request_api(self, image_path: str, form_data: Dict[str, str]) -> Tuple[Dict[str, Any], Tuple[int, int]]:
+        """
+        编码图片并调用高精度OCR接口
+        
+        Returns:
+            (原始响应JSON, 原始图片尺寸)
+        """
+        # 读取图片并编码（同一文件在进程内只编码一次；JPEG/PNG/BMP 且未超限时直接透传原始字节）
+        # 压缩图片(如果太大) - 最长边不超过8192px，最短边至少15px
+        encoded = encode_image_file(
+            image_path,
+            target_format='JPEG',
+            quality=95,
+            max_side=self.MAX_IMAGE_SIDE,
+            accepted_formats=self.ACCEPTED_IMAGE_FORMATS,
+            max_bytes=self.MAX_PASSTHROUGH_BYTES
+        )
+        original_width, original_height = encoded.source_size
+        logger.info(f"📏 图片尺寸: {original_width}x{original_height}")
+        
+        min_size = 15
+        if original_width < min_size or original_height < min_size:
+            logger.warning(f"⚠️ 图片太小: {original_width}x{original_height}, 最短边需要至少{min_size}px")
+        if encoded.size != encoded.source_size:
+            logger.info(f"✂️ 压缩图片: {encoded.size}")
+        
+        # URL encode
+        image_encoded = encoded.base64_urlquoted
+        logger.info(f"📦 图片编码完成: base64={len(encoded.base64)} bytes, passthrough={encoded.passthrough}")
+        
+        # 构建请求头
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': 'application/json',
+        }
+        
+        # 选择认证方式
+        if self.api_key.startswith('bce-v3/'):
+            # 使用BCEv3签名认证 (Authorization头部)
+            headers['Authorization'] = f'Bearer {self.api_key}'
+            url = self.api_url
+            logger.info("🔐 使用BCEv3签名认证")
+        else:
+            # 使用Access Token (URL参数)
+            url = f"{self.api_url}?access_token={self.api_key}"
+            logger.info("🔐 使用Access Token认证")
+        
+        form_data = dict(form_data, image=image_encoded)
+        
+        # 转换为URL编码的表单数据
+        data = '&'.join([f"{k}={v}" for k, v in form_data.items()])
+        
+        logger.info("🌐 发送请求到百度高精度OCR API...")
+        response = get_http_session('baidu').post(url, headers=headers, data=data, timeout=60)
+        response.raise_for_status()
+        
+        result = response.json()
+        
+        # 检查错误
+        if 'error_code' in result:
+            error_msg = result.get('error_msg', 'Unknown error')
+            error_code = result.get('error_code')
+            logger.error(f"❌ 百度API错误: [{error_code}] {error_msg}")
+            raise Exception(f"Baidu API error [{error_code}]: {error_msg}")
+        
+        return result, (original_width, original_height)
+    
     def _location_to_bbox(self, location: Dict[str, int]) -> List[int]:
         """
         将location格式转换为bbox格式 [x0, y0, x1, y1]
@@ -5,20 +5,25 @@
 API文档: https://ai.baidu.com/ai-doc/OCR/1k3h7y3db
 """
 import logging
-import base64
 import requests
-import urllib.parse
-from typing import Dict, List, Any, Optional
-from PIL import Image
-import io
+from typing import Dict, List, Any, Optional, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from utils.http_utils import get_http_session
+from utils.image_payload import encode_image_file
+from services.ai_providers.ocr.ocr_cache import lookup_ocr_result
+
 logger = logging.getLogger(__name__)
 
 
 class BaiduTableOCRProvider:
     """百度表格OCR Provider - 支持BCEv3签名认证"""
     
+    # 最长边限制；可直接透传的源格式及透传时的最大文件大小（超过则重新编码为JPEG）
+    MAX_IMAGE_SIDE = 8192
+    ACCEPTED_IMAGE_FORMATS = ('JPEG', 'PNG', 'BMP')
+    MAX_PASSTHROUGH_BYTES = 3 * 1024 * 1024
+    
     def __init__(self, api_key: str, api_secret: Optional[str] = None):
         """
         初始化百度表格OCR Provider
@@ -67,73 +72,18 @@ class BaiduTableOCRProvider:
         logger.info(f"🔍 开始识别表格图片: {image_path}")
         
         try:
-            # 读取图片并转为base64
-            original_width, original_height = 0, 0
-            with Image.open(image_path) as img:
-                # 获取原始图片尺寸
-                original_width, original_height = img.size
-                logger.info(f"📏 图片尺寸: {original_width}x{original_height}")
-                
-                # 转换为RGB模式
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # 压缩图片(如果太大) - 最长边不超过8192px，最短边至少15px
-                max_size = 8192
-                min_size = 15
-                width, height = img.size
-                
-                if width < min_size or height < min_size:
-                    logger.warning(f"⚠️ 图片太小: {width}x{height}, 最短边需要至少{min_size}px")
-                
-                if width > max_size or height > max_size:
-                    ratio = min(max_size / width, max_size / height)
-                    new_size = (int(width * ratio), int(height * ratio))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                    logger.info(f"✂️ 压缩图片: {img.size}")
-                
-                # 转为base64
-                buffer = io.BytesIO()
-                img.save(buffer, format='JPEG', quality=95)
-                image_bytes = buffer.getvalue()
-                image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-                
-                # URL encode
-                image_encoded = urllib.parse.quote(image_base64)
-                logger.info(f"📦 图片编码完成: base64={len(image_base64)} bytes, urlencode={len(image_encoded)} bytes")
-            
-            # 构建请求头
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'Accept': 'application/json',
-            }
-            
-            # 选择认证方式
-            if self.api_key.startswith('bce-v3/'):
-                # 使用BCEv3签名认证 (Authorization头部)
-                headers['Authorization'] = f'Bearer {self.api_key}'
-                url = self.api_url
-                logger.info(f"🔐 使用BCEv3签名认证")
+            # 相同图片内容 + 相同参数直接复用缓存的原始响应
+            cache, cache_key, cached = lookup_ocr_result(
+                'baidu_table', image_path,
+                {'cell_contents': cell_contents, 'return_excel': return_excel, 'max_side': self.MAX_IMAGE_SIDE}
+            )
+            if cached is not None:
+                result = cached['response']
+                original_width, original_height = cached['image_size']
             else:
-                # 使用Access Token (URL参数)
-                url = f"{self.api_url}?access_token={self.api_key}"
-                logger.info(f"🔐 使用Access Token认证")
-            
-            # 构建表单数据
-            data = f"image={image_encoded}&cell_contents={'true' if cell_contents else 'false'}&return_excel={'true' if return_excel else 'false'}"
-            
-            logger.info(f"🌐 发送请求到百度表格OCR API...")
-            response = requests.post(url, headers=headers, data=data, timeout=60)
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            # 检查错误
-            if 'error_code' in result:
-                error_msg = result.get('error_msg', 'Unknown error')
-                error_code = result.get('error_code')
-                logger.error(f"❌ 百度API错误: [{error_code}] {error_msg}")
-                raise Exception(f"Baidu API error [{error_code}]: {error_msg}")
+                result, (original_width, original_height) = self._request_api(image_path, cell_contents, return_excel)
+                if cache is not None:
+                    cache.put(cache_key, {'response': result, 'image_size': [original_width, original_height]})
             
             # 解析结果
             log_id = result.get('log_id', '')
@@ -203,6 +153,76 @@ class BaiduTableOCRProvider:
             logger.error(f"❌ 表格识别失败: {str(e)}")
             raise
     
+    def _request_api(
+        self,
+        image_path: str,
+        cell_contents: bool,
+        return_excel: bool
+    ) -> Tuple[Dict[str, Any], Tuple[int, int]]:
+        """
+        编码图片并调用表格识别接口
+        
+        Returns:
+            (原始响应JSON, 原始图片尺寸)
+        """
+        # 读取图片并编码（同一文件在进程内只编码一次；JPEG/PNG/BMP 且未超限时直接透传原始字节）
+        # 压缩图片(如果太大) - 最长边不超过8192px，最短边至少15px
+        encoded = encode_image_file(
+            image_path,
+            target_format='JPEG',
+            quality=95,
+            max_side=self.MAX_IMAGE_SIDE,
+            accepted_formats=self.ACCEPTED_IMAGE_FORMATS,
+            max_bytes=self.MAX_PASSTHROUGH_BYTES
+        )
+        original_width, original_height = encoded.source_size
+        logger.info(f"📏 图片尺寸: {original_width}x{original_height}")
+        
+        min_size = 15
+        if original_width < min_size or original_height < min_size:
+            logger.warning(f"⚠️ 图片太小: {original_width}x{original_height}, 最短边需要至少{min_size}px")
+        if encoded.size != encoded.source_size:
+            logger.info(f"✂️ 压缩图片: {encoded.size}")
+        
+        # URL encode
+        image_encoded = encoded.base64_urlquoted
+        logger.info(f"📦 图片编码完成: base64={len(encoded.base64)} bytes, passthrough={encoded.passthrough}")
+        
+        # 构建请求头
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': 'application/json',
+        }
+        
+        # 选择认证方式
+        if self.api_key.startswith('bce-v3/'):
+            # 使用BCEv3签名认证 (Authorization头部)
+            headers['Authorization'] = f'Bearer {self.api_key}'
+            url = self.api_url
+            logger.info(f"🔐 使用BCEv3签名认证")
+        else:
+            # 使用Access Token (URL参数)
+            url = f"{self.api_url}?access_token={self.api_key}"
+            logger.info(f"🔐 使用Access Token认证")
+        
+        # 构建表单数据
+        data = f"image={image_encoded}&cell_contents={'true' if cell_contents else 'false'}&return_excel={'true' if return_excel else 'false'}"
+        
+        logger.info(f"🌐 发送请求到百度表格OCR API...")
+        response = get_http_session('baidu').post(url, headers=headers, data=data, timeout=60)
+        response.raise_for_status()
+        
+        result = response.json()
+        
+        # 检查错误
+        if 'error_code' in result:
+            error_msg = result.get('error_msg', 'Unknown error')
+            error_code = result.get('error_code')
+            logger.error(f"❌ 百度API错误: [{error_code}] {error_msg}")
+            raise Exception(f"Baidu API error [{error_code}]: {error_msg}")
+        
+        return result, (original_width, original_height)
+    
     def _location_to_bbox(self, location: List[Dict[str, int]]) -> List[int]:
         """
         将四个角点坐标转换为bbox格式 [x0, y0, x1, y1]
@@ -0,0 +1,187 @@
+"""
+OCR结果磁盘缓存
+
+按 图片内容哈希 + 接口 + 识别参数 缓存百度OCR的原始JSON响应。重新导出、递归裁剪出的相同子图
+（重复出现的logo、跨页相同的表格等）命中缓存后不再调用远程OCR。
+
+缓存目录按容量上限做LRU淘汰（命中时刷新文件mtime），并记录命中率等统计信息。
+"""
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_image_file(image_path: str) -> str:
+    """计算图片文件内容的sha256（与文件名/路径无关）"""
+    digest = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OCRResultCache:
+    """
+    OCR原始响应的磁盘缓存（线程安全，多进程共享目录时容量控制为近似值）
+
+    目录结构: <cache_dir>/<key前2位>/<key>.json
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节），超过时按最近使用时间淘汰
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Optional['OrderedDict[str, int]'] = None  # key -> 文件大小，按最近使用排序
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(namespace: str, content_hash: str, params: Dict[str, Any]) -> str:
+        """由接口名、图片内容哈希和识别参数生成缓存键"""
+        raw = json.dumps([namespace, content_hash, params], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _ensure_index(self) -> None:
+        """首次使用时扫描缓存目录，按mtime建立LRU索引（需持有锁）"""
+        if self._index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith('.json'):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total_bytes = sum(self._index.values())
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目，不存在或已损坏时返回None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+            if self._index is not None and key in self._index:
+                self._index.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """写入缓存条目（原子替换），并在超出容量时淘汰最久未使用的条目"""
+        data = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        if len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入OCR缓存失败: {e}")
+            return
+
+        with self._lock:
+            self._ensure_index()
+            old_size = self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._total_bytes += len(data) - old_size
+            self._stores += 1
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                evicted_key, evicted_size = self._index.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self._evictions += 1
+                try:
+                    os.remove(self._path(evicted_key))
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率等统计信息"""
+        with self._lock:
+            self._ensure_index()
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'stores': self._stores,
+                'evictions': self._evictions,
+                'entries': len(self._index),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_cache: Optional[OCRResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[OCRResultCache]:
+    """获取进程内共享的OCR缓存（按配置创建，关闭时返回None）"""
+    global _cache
+    from config import Config
+
+    if not Config.OCR_CACHE_ENABLED or Config.OCR_CACHE_MAX_MB <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.cache_dir != Config.OCR_CACHE_DIR:
+            _cache = OCRResultCache(Config.OCR_CACHE_DIR, Config.OCR_CACHE_MAX_MB * 1024 * 1024)
+        return _cache
+
+
+def lookup_ocr_result(namespace: str, image_path: str, params: Dict[str, Any]):
+    """
+    查询OCR缓存
+
+    Returns:
+        (cache, key, entry)：缓存关闭时 cache 和 key 为 None；未命中时 entry 为 None
+    """
+    cache = get_ocr_cache()
+    if cache is None:
+        return None, None, None
+    try:
+        key = cache.make_key(namespace, hash_image_file(image_path), params)
+    except OSError as e:
+        logger.warning(f"计算图片哈希失败，跳过OCR缓存: {e}")
+        return None, None, None
+
+    entry = cache.get(key)
+    if entry is not None:
+        stats = cache.stats()
+        logger.info(f"♻️ 命中OCR缓存 ({namespace}), 命中率 {stats['hit_rate']:.0%}")
+    return cache, key, entry
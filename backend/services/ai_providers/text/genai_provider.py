@@ -11,6 +11,7 @@ from google.genai import types
 from tenacity import retry, stop_after_attempt, wait_exponential
 from .base import TextProvider
 from config import get_config
+from utils.image_payload import encode_image_file
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,9 @@ logger = logging.getLogger(__name__)
 class GenAITextProvider(TextProvider):
     """Text generation using Google GenAI SDK (supports both AI Studio and Vertex AI)"""
 
+    # 可直接透传给Gemini的源图片格式
+    ACCEPTED_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP')
+
     def __init__(
         self,
         api_key: str = None,
@@ -108,13 +112,12 @@ class GenAITextProvider(TextProvider):
         Returns:
             Generated text
         """
-        from PIL import Image
-        
-        # 加载图片
-        img = Image.open(image_path)
+        # 加载图片（Gemini接受的格式直接透传原始字节，编码结果进程内缓存）
+        encoded = encode_image_file(image_path, target_format='PNG', accepted_formats=self.ACCEPTED_IMAGE_FORMATS)
+        image_part = types.Part.from_bytes(data=encoded.data, mime_type=encoded.mime_type)
         
         # 构建多模态内容
-        contents = [img, prompt]
+        contents = [image_part, prompt]
         
         # 构建配置，只有在 thinking_budget > 0 时才启用推理模式
         config_params = {}
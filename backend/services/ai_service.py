@@ -8,6 +8,7 @@ import json
 import re
 import logging
 import requests
+import threading
 from typing import List, Dict, Optional, Union
 from textwrap import dedent
 from PIL import Image
@@ -65,6 +66,77 @@ class ProjectContext:
         }
 
 
+class ReferenceImageBundle:
+    """
+    任务级参考图缓存
+
+    批量生成图片时，每一页都会引用同一张模板图（以及部分相同的素材图）。该类在一个任务内
+    对每个参考图只加载一次：解码、按图片 Provider 的有效分辨率等比缩小，然后登记为只读共享
+    图片，所有页面线程复用同一个对象及其编码结果（见 utils.image_payload.share_image）。
+
+    本地文件按 (路径, 修改时间) 缓存，任务进行中替换模板也能取到新文件。线程安全。
+    """
+
+    def __init__(self, ai_service: 'AIService', max_side: Optional[int] = None):
+        """
+        Args:
+            ai_service: 用于加载参考图的 AIService
+            max_side: 参考图最长边上限，默认取图片 Provider 的 MAX_REFERENCE_IMAGE_SIDE
+        """
+        self._ai_service = ai_service
+        self._max_side = max_side or getattr(ai_service.image_provider, 'MAX_REFERENCE_IMAGE_SIDE', None)
+        self._images: Dict[tuple, Optional[Image.Image]] = {}
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(ref: str) -> tuple:
+        if os.path.exists(ref):
+            return (os.path.realpath(ref), os.stat(ref).st_mtime_ns)
+        return (ref, None)
+
+    def get(self, ref: str) -> Optional[Image.Image]:
+        """
+        获取预处理后的参考图（首次访问时加载）
+
+        Args:
+            ref: 本地路径、URL 或 /files/mineru/ 路径（同 AIService.load_reference_image）
+
+        Returns:
+            只读共享的 PIL Image 对象，无法加载时返回 None
+        """
+        key = self._cache_key(ref)
+        if key in self._images:
+            return self._images[key]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 同一参考图被多个页面线程同时请求时，只有一个线程执行加载
+        with key_lock:
+            if key not in self._images:
+                self._images[key] = self._prepare(ref)
+        return self._images[key]
+
+    def _prepare(self, ref: str) -> Optional[Image.Image]:
+        from utils.image_payload import share_image
+
+        image = self._ai_service.load_reference_image(ref)
+        if image is None:
+            return None
+
+        image.load()
+        width, height = image.size
+        if self._max_side and (width > self._max_side or height > self._max_side):
+            ratio = min(self._max_side / width, self._max_side / height)
+            image = image.resize((int(width * ratio), int(height * ratio)), Image.Resampling.LANCZOS)
+            logger.info(f"Reference image downsized for generation: {ref} {width}x{height} -> {image.size}")
+            # 缩小后的图片不再对应源文件，登记为共享图片以复用编码结果
+            share_image(image)
+        # 未缩小的图片保留 filename，编码时直接走文件缓存（可接受格式原样透传）
+        return image
+
+
 class AIService:
     """Service for AI model interactions using pluggable providers"""
     
@@ -300,6 +372,36 @@ class AIService:
             logger.error(f"Failed to download image from {url}: {str(e)}")
             return None
     
+    def load_reference_image(self, ref: str) -> Optional[Image.Image]:
+        """
+        加载参考图片
+        
+        Args:
+            ref: 本地路径、http/https URL 或 /files/mineru/ 开头的 MinerU 路径
+        
+        Returns:
+            PIL Image 对象，无法加载时返回 None
+        """
+        if os.path.exists(ref):
+            # 本地路径
+            return Image.open(ref)
+        if ref.startswith('http://') or ref.startswith('https://'):
+            # URL，需要下载
+            downloaded_img = self.download_image_from_url(ref)
+            if not downloaded_img:
+                logger.warning(f"Failed to download image from URL: {ref}, skipping...")
+            return downloaded_img
+        if ref.startswith('/files/mineru/'):
+            # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
+            local_path = self._convert_mineru_path_to_local(ref)
+            if local_path and os.path.exists(local_path):
+                logger.debug(f"Loaded MinerU image from local path: {local_path}")
+                return Image.open(local_path)
+            logger.warning(f"MinerU image file not found (with prefix matching): {ref}, skipping...")
+            return None
+        logger.warning(f"Invalid image reference: {ref}, skipping...")
+        return None
+    
     def generate_outline(self, project_context: ProjectContext, language: str = None) -> List[Dict]:
         """
         Generate PPT outline from idea prompt
@@ -444,7 +546,8 @@ class AIService:
     
     def generate_image(self, prompt: str, ref_image_path: Optional[str] = None, 
                       aspect_ratio: str = "16:9", resolution: str = "2K",
-                      additional_ref_images: Optional[List[Union[str, Image.Image]]] = None) -> Optional[Image.Image]:
+                      additional_ref_images: Optional[List[Union[str, Image.Image]]] = None,
+                      reference_bundle: Optional['ReferenceImageBundle'] = None) -> Optional[Image.Image]:
         """
         Generate image using configured image provider
         Based on gemini_genai.py gen_image()
@@ -455,6 +558,7 @@ class AIService:
             aspect_ratio: Image aspect ratio
             resolution: Image resolution (note: OpenAI format only supports 1K)
             additional_ref_images: 额外的参考图片列表，可以是本地路径、URL 或 PIL Image 对象
+            reference_bundle: 任务级参考图缓存（可选），同一任务内的模板图/素材图只加载和预处理一次
         
         Returns:
             PIL Image object or None if failed
@@ -468,14 +572,17 @@ class AIService:
                 logger.debug(f"Additional reference images: {len(additional_ref_images)}")
             logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
 
-            # 构建参考图片列表
+            # 构建参考图片列表（提供了 reference_bundle 时复用任务内已预处理的图片）
+            load_ref = reference_bundle.get if reference_bundle else self.load_reference_image
             ref_images = []
             
             # 添加主参考图片（如果提供了路径）
             if ref_image_path:
                 if not os.path.exists(ref_image_path):
                     raise FileNotFoundError(f"Reference image not found: {ref_image_path}")
-                main_ref_image = Image.open(ref_image_path)
+                main_ref_image = load_ref(ref_image_path)
+                if main_ref_image is None:
+                    raise ValueError(f"Failed to load reference image: {ref_image_path}")
                 ref_images.append(main_ref_image)
             
             # 添加额外的参考图片
@@ -484,28 +591,10 @@ class AIService:
                     if isinstance(ref_img, Image.Image):
                         # 已经是 PIL Image 对象
                         ref_images.append(ref_img)
-                    elif isinstance(ref_img, str):
-                        # 可能是本地路径或 URL
-                        if os.path.exists(ref_img):
-                            # 本地路径
-                            ref_images.append(Image.open(ref_img))
-                        elif ref_img.startswith('http://') or ref_img.startswith('https://'):
-                            # URL，需要下载
-                            downloaded_img = self.download_image_from_url(ref_img)
-                            if downloaded_img:
-                                ref_images.append(downloaded_img)
-                            else:
-                                logger.warning(f"Failed to download image from URL: {ref_img}, skipping...")
-                        elif ref_img.startswith('/files/mineru/'):
-                            # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
-                            local_path = self._convert_mineru_path_to_local(ref_img)
-                            if local_path and os.path.exists(local_path):
-                                ref_images.append(Image.open(local_path))
-                                logger.debug(f"Loaded MinerU image from local path: {local_path}")
-                            else:
-                                logger.warning(f"MinerU image file not found (with prefix matching): {ref_img}, skipping...")
-                        else:
-                            logger.warning(f"Invalid image reference: {ref_img}, skipping...")
+                    else:
+                        loaded = load_ref(ref_img)
+                        if loaded is not None:
+                            ref_images.append(loaded)
             
             logger.debug(f"Calling image provider for generation with {len(ref_images)} reference images...")
             logger.debug(f"Enable image reasoning/thinking: {self.enable_image_reasoning}, budget: {self._get_image_thinking_budget()}")
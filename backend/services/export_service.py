@@ -19,6 +19,9 @@ import tempfile
 import img2pdf
 logger = logging.getLogger(__name__)
 
+# python-pptx 可以直接插入的图片格式；其他格式（如 PAGE_IMAGE_FORMAT=webp 的原图）需先转为 PNG
+PPTX_PICTURE_FORMATS = {'BMP', 'GIF', 'JPEG', 'PNG', 'TIFF', 'WMF'}
+
 
 @dataclass
 class ExportWarnings:
@@ -39,6 +42,9 @@ class ExportWarnings:
     # JSON 解析失败（重试后仍失败）
     json_parse_failed: List[Dict[str, Any]] = field(default_factory=list)
     
+    # 因递归预算用尽而未拆分的元素（保持为普通图片）
+    budget_skipped: List[Dict[str, Any]] = field(default_factory=list)
+    
     # 其他警告
     other_warnings: List[str] = field(default_factory=list)
     
@@ -70,6 +76,15 @@ class ExportWarnings:
             'reason': reason
         })
     
+    def add_budget_skipped(self, element_id: str, element_type: str, depth: int, reason: str):
+        """记录因预算用尽而未递归拆分的元素"""
+        self.budget_skipped.append({
+            'element_id': element_id,
+            'element_type': element_type,
+            'depth': depth,
+            'reason': reason
+        })
+    
     def add_warning(self, message: str):
         """添加其他警告"""
         self.other_warnings.append(message)
@@ -81,6 +96,7 @@ class ExportWarnings:
             self.text_render_failed or 
             self.image_add_failed or
             self.json_parse_failed or
+            self.budget_skipped or
             self.other_warnings
         )
     
@@ -100,6 +116,9 @@ class ExportWarnings:
         if self.json_parse_failed:
             summary.append(f"⚠️ {len(self.json_parse_failed)} 次 AI 响应解析失败")
         
+        if self.budget_skipped:
+            summary.append(f"⚠️ 导出预算已用尽，{len(self.budget_skipped)} 个元素未拆分（保留为图片）")
+        
         for warning in self.other_warnings[:5]:  # 最多显示5条其他警告
             summary.append(f"⚠️ {warning}")
         
@@ -115,12 +134,14 @@ class ExportWarnings:
             'text_render_failed': self.text_render_failed,
             'image_add_failed': self.image_add_failed,
             'json_parse_failed': self.json_parse_failed,
+            'budget_skipped': self.budget_skipped,
             'other_warnings': self.other_warnings,
             'total_warnings': (
                 len(self.style_extraction_failed) + 
                 len(self.text_render_failed) + 
                 len(self.image_add_failed) +
                 len(self.json_parse_failed) +
+                len(self.budget_skipped) +
                 len(self.other_warnings)
             )
         }
@@ -134,6 +155,21 @@ class ExportService:
     # - GenerativeEditInpaintProvider: 基于生成式大模型的整图编辑重绘（Gemini等）
     # 使用方式: from services.image_editability import InpaintProviderFactory
     
+    @staticmethod
+    def _pptx_picture_source(image_path: str):
+        """
+        返回可交给 slide.shapes.add_picture 的图片来源
+
+        python-pptx 不支持的格式（如 WebP）在内存中转为 PNG，支持的格式直接返回路径
+        """
+        with Image.open(image_path) as img:
+            if img.format in PPTX_PICTURE_FORMATS:
+                return image_path
+            png_bytes = io.BytesIO()
+            img.save(png_bytes, format='PNG')
+        png_bytes.seek(0)
+        return png_bytes
+    
     @staticmethod
     def create_pptx_from_images(image_paths: List[str], output_file: str = None) -> bytes:
         """
@@ -178,7 +214,7 @@ class ExportService:
             
             # Add image to fill entire slide
             slide.shapes.add_picture(
-                image_path,
+                ExportService._pptx_picture_source(image_path),
                 left=0,
                 top=0,
                 width=prs.slide_width,
@@ -197,13 +233,14 @@ class ExportService:
             return pptx_bytes.getvalue()
     
     @staticmethod
-    def create_pdf_from_images(image_paths: List[str], output_file: str = None) -> Optional[bytes]:
+    def create_pdf_from_images(image_paths: List[str], output_file: str = None, fit_slide_page: bool = True) -> Optional[bytes]:
         """
         Create PDF file from image paths using img2pdf (low memory usage)
 
         Args:
             image_paths: List of absolute paths to images
             output_file: Optional output file path (if None, returns bytes)
+            fit_slide_page: Fit every image into a 16:9 slide page; if False each page takes the image's own size
 
         Returns:
             PDF file as bytes if output_file is None, otherwise None
@@ -224,7 +261,7 @@ class ExportService:
 
             # Set page layout: 16:9 aspect ratio (10 inches × 5.625 inches)
             layout_fun = img2pdf.get_layout_fun(
-                pagesize=(img2pdf.in_to_pt(10), img2pdf.in_to_pt(5.625))
+                pagesize=(img2pdf.in_to_pt(10), img2pdf.in_to_pt(5.625)) if fit_slide_page else None
             )
 
             # Convert images to PDF
@@ -987,7 +1024,7 @@ class ExportService:
             - pptx_bytes: PPTX 文件字节流（如果 output_file 为 None），否则为 None
             - warnings: ExportWarnings 对象，包含所有警告信息
         """
-        from services.image_editability import ServiceConfig, ImageEditabilityService
+        from services.image_editability import ServiceConfig, ImageEditabilityService, RecursionBudget
         from utils.pptx_builder import PPTXBuilder
         
         # 初始化警告收集器
@@ -1023,6 +1060,9 @@ class ExportService:
             )
             editability_service = ImageEditabilityService(config)
             
+            # 本次导出所有页面共享的递归预算（未配置时不限制）
+            budget = RecursionBudget.from_config()
+            
             # 2. 并发处理所有页面，生成EditableImage结构
             report_progress("版面分析", f"开始分析 {total_pages} 张图片（并发数: {max_workers}）...", 5)
             from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -1031,7 +1071,7 @@ class ExportService:
             completed_count = 0
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = {
-                    executor.submit(editability_service.make_image_editable, img_path): idx
+                    executor.submit(editability_service.make_image_editable, img_path, budget=budget): idx
                     for idx, img_path in enumerate(image_paths)
                 }
                 
@@ -1049,6 +1089,11 @@ class ExportService:
                         raise
                 
                 editable_images = results
+            
+            if budget is not None:
+                logger.info(f"递归预算用量: {budget.to_dict()}")
+                for skipped in budget.skipped:
+                    warnings.add_budget_skipped(**skipped)
         
         # 2.5. 使用混合策略提取所有文本元素的样式（如果提供了提取器）
         # 混合策略：全局识别（粗体/斜体/下划线/对齐）+ 单个裁剪识别（颜色）
@@ -1105,7 +1150,7 @@ class ExportService:
                 logger.info(f"    添加clean background: {editable_img.clean_background}")
                 try:
                     slide.shapes.add_picture(
-                        editable_img.clean_background,
+                        ExportService._pptx_picture_source(editable_img.clean_background),
                         left=0,
                         top=0,
                         width=builder.prs.slide_width,
@@ -1118,7 +1163,7 @@ class ExportService:
                 logger.info(f"    使用原图作为背景: {editable_img.image_path}")
                 try:
                     slide.shapes.add_picture(
-                        editable_img.image_path,
+                        ExportService._pptx_picture_source(editable_img.image_path),
                         left=0,
                         top=0,
                         width=builder.prs.slide_width,
@@ -8,12 +8,17 @@ import logging
 import zipfile
 import io
 import base64
+import threading
+import uuid
 import requests
-from typing import Optional, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Dict, Union
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
 from PIL import Image
 from markitdown import MarkItDown
 
+from utils.http_utils import get_http_session
+from utils.path_utils import build_prefix_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,6 +55,15 @@ def _get_ai_provider_format(provider_format: str = None) -> str:
 class FileParserService:
     """Service for parsing files using MinerU and enhancing with image captions"""
     
+    # 轮询间隔配置（秒）：从最小间隔开始指数退避，不超过最大间隔
+    POLL_MIN_INTERVAL = 1.0
+    POLL_MAX_INTERVAL = 10.0
+    POLL_BACKOFF_FACTOR = 1.5
+    
+    # 进程内观测到的MinerU处理耗时（指数滑动平均），所有实例共享
+    _observed_parse_seconds: Optional[float] = None
+    _observed_lock = threading.Lock()
+    
     def __init__(self, mineru_token: str, mineru_api_base: str = "https://mineru.net",
                  google_api_key: str = "", google_api_base: str = "",
                  openai_api_key: str = "", openai_api_base: str = "",
@@ -75,6 +89,11 @@ class FileParserService:
         self.mineru_model_version = mineru_model_version
         self.get_upload_url_api = f"{mineru_api_base}/api/v4/file-urls/batch"
         self.get_result_api_template = f"{mineru_api_base}/api/v4/extract-results/batch/{{}}"
+        # 进程内共享的keep-alive连接池（上传URL申请、上传、轮询、下载复用同一组连接）
+        self._http = get_http_session('mineru')
+        self._batch_submitter = None
+        self._image_batcher = None
+        self._batch_submitter_lock = threading.Lock()
         
         # Store config for lazy initialization
         self._google_api_key = google_api_key
@@ -277,18 +296,29 @@ class FileParserService:
     
     def _get_upload_url(self, filename: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
         """Get upload URL from MinerU"""
+        batch_id, upload_urls, error = self._get_upload_urls([filename])
+        if error:
+            return None, None, error
+        return batch_id, upload_urls[0], None
+    
+    def _get_upload_urls(self, filenames: List[str]) -> tuple[Optional[str], Optional[List[str]], Optional[str]]:
+        """Get upload URLs for several files in one MinerU batch
+        
+        Returns:
+            Tuple of (batch_id, upload_urls (same order as filenames), error_message)
+        """
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.mineru_token}"
         }
         
         upload_data = {
-            "files": [{"name": filename}],
+            "files": [{"name": filename} for filename in filenames],
             "model_version": self.mineru_model_version  # "vlm" or "pipeline"
         }
         
         try:
-            response = requests.post(
+            response = self._http.post(
                 self.get_upload_url_api,
                 headers=headers,
                 json=upload_data,
@@ -303,19 +333,28 @@ class FileParserService:
                 return None, None, error_msg
             
             batch_id = result["data"]["batch_id"]
-            upload_url = result["data"]["file_urls"][0]
-            return batch_id, upload_url, None
+            upload_urls = result["data"]["file_urls"]
+            return batch_id, upload_urls, None
             
         except requests.exceptions.RequestException as e:
             error_msg = f"Network error while requesting upload URL: {str(e)}"
             logger.error(error_msg)
             return None, None, error_msg
     
-    def _upload_file(self, file_path: str, upload_url: str) -> Optional[str]:
-        """Upload file to MinerU"""
+    def _upload_file(self, file_path: Union[str, bytes], upload_url: str) -> Optional[str]:
+        """Upload file to MinerU (file_path may also be the file contents already in memory)"""
         try:
+            if isinstance(file_path, bytes):
+                response = self._http.put(
+                    upload_url,
+                    data=file_path,
+                    headers={"Authorization": None},
+                    timeout=300
+                )
+                response.raise_for_status()
+                return None
             with open(file_path, 'rb') as f:
-                response = requests.put(
+                response = self._http.put(
                     upload_url,
                     data=f,
                     headers={"Authorization": None},  # Remove auth for upload
@@ -333,12 +372,89 @@ class FileParserService:
             logger.error(error_msg)
             return error_msg
     
+    def parse_files_batch(self, files: List[tuple[Union[str, bytes], str]], max_wait_time: int = 600) -> Dict[str, tuple[Optional[str], Optional[str], Optional[str]]]:
+        """
+        Parse several files with a single MinerU batch job (no caption enhancement)
+        
+        One upload-URL request covers all files, uploads run concurrently, and the
+        batch is polled as a whole; each file's result is downloaded as soon as it is done.
+        
+        Args:
+            files: List of (file_path or in-memory file bytes, filename); filenames must be unique within the batch
+            max_wait_time: Maximum seconds to wait for the whole batch
+            
+        Returns:
+            Dict mapping filename -> (markdown_content, extract_id, error_message)
+        """
+        if not files:
+            return {}
+        
+        filenames = [filename for _, filename in files]
+        logger.info(f"Submitting MinerU batch with {len(files)} files...")
+        
+        batch_id, upload_urls, error = self._get_upload_urls(filenames)
+        if error:
+            return {filename: (None, None, error) for filename in filenames}
+        
+        results: Dict[str, tuple[Optional[str], Optional[str], Optional[str]]] = {}
+        with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+            upload_errors = list(executor.map(
+                lambda item: self._upload_file(item[0][0], item[1]),
+                zip(files, upload_urls)
+            ))
+        for filename, upload_error in zip(filenames, upload_errors):
+            if upload_error:
+                results[filename] = (None, None, upload_error)
+        
+        pending = [filename for filename in filenames if filename not in results]
+        if pending:
+            logger.info(f"MinerU batch {batch_id}: {len(pending)} files uploaded, waiting for parsing...")
+            results.update(self._poll_batch_results(batch_id, pending, max_wait_time=max_wait_time))
+        
+        return results
+    
+    def get_batch_submitter(self) -> 'MinerUBatchSubmitter':
+        """Get the (lazily created) batch submitter shared by all callers of this service"""
+        if self._batch_submitter is None:
+            with self._batch_submitter_lock:
+                if self._batch_submitter is None:
+                    self._batch_submitter = MinerUBatchSubmitter(self)
+        return self._batch_submitter
+    
+    def get_image_batcher(self) -> 'MinerUImageBatcher':
+        """Get the (lazily created) image batcher that packs concurrent images into one multi-page PDF"""
+        if self._image_batcher is None:
+            with self._batch_submitter_lock:
+                if self._image_batcher is None:
+                    self._image_batcher = MinerUImageBatcher(self)
+        return self._image_batcher
+    
     def _poll_result(self, batch_id: str, max_wait_time: int = 600) -> tuple[Optional[str], Optional[str], Optional[str]]:
         """Poll for parsing result
         
         Returns:
             Tuple of (markdown_content, extract_id, error_message)
         """
+        results = self._poll_batch_results(batch_id, None, max_wait_time=max_wait_time)
+        if not results:
+            return None, None, "No extract result returned"
+        return next(iter(results.values()))
+    
+    def _poll_batch_results(self, batch_id: str, file_names: Optional[List[str]],
+                            max_wait_time: int = 600) -> Dict[str, tuple[Optional[str], Optional[str], Optional[str]]]:
+        """Poll a MinerU batch until every file is done or failed
+        
+        Poll intervals adapt to the processing times observed in this process
+        (see _next_poll_interval) instead of a fixed 2 second sleep.
+        
+        Args:
+            batch_id: MinerU batch ID
+            file_names: Files to wait for; None means every file in the batch
+            max_wait_time: Maximum seconds to wait
+            
+        Returns:
+            Dict mapping filename -> (markdown_content, extract_id, error_message)
+        """
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.mineru_token}"
@@ -346,42 +462,88 @@ class FileParserService:
         
         result_url = self.get_result_api_template.format(batch_id)
         start_time = time.time()
+        results: Dict[str, tuple[Optional[str], Optional[str], Optional[str]]] = {}
+        waiting = set(file_names) if file_names is not None else None
+        attempt = 0
+        
+        def fail_remaining(error_msg: str):
+            # 尚未拿到文件列表时（file_names=None）以batch_id作为结果键
+            for name in (waiting if waiting is not None else [batch_id]):
+                results[name] = (None, None, error_msg)
+            return results
         
         while True:
-            if time.time() - start_time > max_wait_time:
+            elapsed = time.time() - start_time
+            if elapsed > max_wait_time:
                 error_msg = f"Parsing timeout after {max_wait_time} seconds"
                 logger.error(error_msg)
-                return None, None, error_msg
+                return fail_remaining(error_msg)
+            
+            time.sleep(self._next_poll_interval(elapsed, attempt))
+            attempt += 1
             
             try:
-                response = requests.get(result_url, headers=headers, timeout=30)
+                response = self._http.get(result_url, headers=headers, timeout=30)
                 response.raise_for_status()
                 task_info = response.json()
                 
                 if task_info.get("code") != 0:
                     error_msg = f"Failed to query task status: {task_info.get('msg')}"
                     logger.error(error_msg)
-                    return None, None, error_msg
+                    return fail_remaining(error_msg)
                 
-                task_status = task_info["data"]["extract_result"][0]["state"]
+                extract_results = task_info["data"]["extract_result"]
+                if waiting is None:
+                    waiting = {item.get("file_name", "") for item in extract_results}
                 
-                if task_status == "done":
-                    logger.info("File parsing completed!")
-                    full_zip_url = task_info["data"]["extract_result"][0]["full_zip_url"]
-                    # Download and extract markdown
-                    return self._download_markdown(full_zip_url)
-                elif task_status == "failed":
-                    err_msg = task_info["data"]["extract_result"][0].get("err_msg", "Unknown error")
-                    error_msg = f"File parsing failed: {err_msg}"
-                    logger.error(error_msg)
-                    return None, None, error_msg
-                else:
-                    logger.debug(f"Current task status: {task_status}, waiting...")
-                    time.sleep(2)  # Wait 2 seconds before next poll
+                for item in extract_results:
+                    name = item.get("file_name", "")
+                    if name not in waiting:
+                        continue
+                    task_status = item["state"]
+                    if task_status == "done":
+                        logger.info(f"File parsing completed: {name}")
+                        # Download and extract markdown
+                        results[name] = self._download_markdown(item["full_zip_url"])
+                        waiting.discard(name)
+                    elif task_status == "failed":
+                        err_msg = item.get("err_msg", "Unknown error")
+                        error_msg = f"File parsing failed: {err_msg}"
+                        logger.error(error_msg)
+                        results[name] = (None, None, error_msg)
+                        waiting.discard(name)
+                    else:
+                        logger.debug(f"Current task status of {name}: {task_status}, waiting...")
+                
+                if not waiting:
+                    self._record_parse_duration(time.time() - start_time)
+                    return results
                     
             except requests.exceptions.RequestException as e:
                 logger.warning(f"Network error while polling result: {str(e)}, retrying...")
-                time.sleep(2)
+    
+    @classmethod
+    def _record_parse_duration(cls, seconds: float, alpha: float = 0.3):
+        """Record how long a batch took so later polls can skip early no-op requests"""
+        with cls._observed_lock:
+            if cls._observed_parse_seconds is None:
+                cls._observed_parse_seconds = seconds
+            else:
+                cls._observed_parse_seconds = alpha * seconds + (1 - alpha) * cls._observed_parse_seconds
+    
+    @classmethod
+    def _next_poll_interval(cls, elapsed: float, attempt: int) -> float:
+        """
+        Compute the sleep before the next status query
+        
+        - Before the typical completion time observed so far: sleep straight up to it
+          (capped by POLL_MAX_INTERVAL) instead of polling every couple of seconds.
+        - Afterwards (or with no history): exponential backoff from POLL_MIN_INTERVAL.
+        """
+        expected = cls._observed_parse_seconds
+        if expected is not None and elapsed < expected:
+            return min(max(expected - elapsed, cls.POLL_MIN_INTERVAL), cls.POLL_MAX_INTERVAL)
+        return min(cls.POLL_MIN_INTERVAL * (cls.POLL_BACKOFF_FACTOR ** attempt), cls.POLL_MAX_INTERVAL)
     
     def _download_markdown(self, zip_url: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
         """Download and extract markdown from result zip, save images to local server
@@ -390,25 +552,19 @@ class FileParserService:
             Tuple of (markdown_content, extract_id, error_message)
         """
         try:
-            response = requests.get(zip_url, timeout=60)
+            response = self._http.get(zip_url, timeout=60)
             response.raise_for_status()
             
             # Generate unique directory name for this extraction
             import uuid
             extract_id = str(uuid.uuid4())[:8]
             
-            # Get upload folder from Flask config (we'll need to pass this)
-            # For now, use a hardcoded path relative to project root
-            import os
-            from pathlib import Path
-            
-            # Navigate to project root (assuming this file is in backend/services/)
-            current_file = Path(__file__).resolve()
-            backend_dir = current_file.parent.parent
-            project_root = backend_dir.parent
+            # 解压到上传目录（存储后端的本地工作目录），解压完成后整体提交到存储后端
+            from services.storage import get_storage
+            storage = get_storage()
             
             # Create directory for mineru extracts
-            mineru_storage = project_root / 'uploads' / 'mineru_files' / extract_id
+            mineru_storage = storage.local_path(f"mineru_files/{extract_id}")
             mineru_storage.mkdir(parents=True, exist_ok=True)
             
             logger.info(f"Extracting ZIP to: {mineru_storage}")
@@ -436,6 +592,10 @@ class FileParserService:
                     logger.error(error_msg)
                     return None, None, error_msg
             
+            # 生成文件名索引清单，图片前缀匹配时不再列目录
+            build_prefix_index(mineru_storage)
+            storage.commit_tree(f"mineru_files/{extract_id}")
+            
             # Replace relative image paths with local server URLs
             markdown_content = self._replace_image_paths(
                 markdown_content, 
@@ -705,3 +865,132 @@ class FileParserService:
             logger.warning(f"Failed to generate caption for {image_url}: {str(e)}")
             return ""  # Return empty string on failure
 
+
+class MinerUBatchSubmitter:
+    """
+    Coalesce concurrent single-file parse requests into MinerU batch jobs
+    
+    Callers (e.g. one MinerUElementExtractor call per slide, running in parallel threads)
+    submit files and block on the returned Future. Requests arriving within
+    ``batch_window`` seconds of each other are sent as one batch via
+    FileParserService.parse_files_batch, and each Future receives its own file's result.
+    """
+    
+    def __init__(self, parser_service: FileParserService, batch_window: float = 1.0, max_batch_size: int = 50):
+        """
+        Args:
+            parser_service: FileParserService used to run the batches
+            batch_window: Seconds to wait for more files after the first one arrives
+            max_batch_size: Flush immediately once this many files are pending
+        """
+        self._parser_service = parser_service
+        self._batch_window = batch_window
+        self._max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._pending: List[tuple[str, str, Future]] = []
+        self._timer: Optional[threading.Timer] = None
+    
+    def submit(self, file_path: str, filename: str) -> Future:
+        """
+        Queue a file for the next batch
+        
+        The file must stay on disk until the returned Future is resolved.
+        
+        Returns:
+            Future resolving to (markdown_content, extract_id, error_message)
+        """
+        future: Future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((file_path, filename, future))
+            if len(self._pending) >= self._max_batch_size:
+                batch = self._take_pending_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._batch_window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        
+        if batch:
+            threading.Thread(target=self._run_batch, args=(batch,), daemon=True).start()
+        return future
+    
+    def _take_pending_locked(self) -> List[tuple[str, str, Future]]:
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+    
+    def _flush(self):
+        with self._lock:
+            batch = self._take_pending_locked()
+        if batch:
+            self._run_batch(batch)
+    
+    def _run_batch(self, batch: List[tuple[str, str, Future]]):
+        logger.info(f"MinerU batch submitter: flushing {len(batch)} files")
+        try:
+            results = self._parser_service.parse_files_batch(
+                [(file_path, filename) for file_path, filename, _ in batch]
+            )
+        except Exception as e:
+            logger.error(f"MinerU batch failed: {str(e)}", exc_info=True)
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        
+        for _, filename, future in batch:
+            future.set_result(results.get(filename, (None, None, f"No result returned for {filename}")))
+
+
+class MinerUImageBatcher(MinerUBatchSubmitter):
+    """
+    Pack concurrent image parse requests into a single multi-page PDF
+    
+    Images submitted within ``batch_window`` seconds of each other (e.g. all slides of a
+    deck, or all crops of one recursion level) become the pages of one in-memory PDF,
+    which is uploaded and parsed as a single MinerU file. Each Future receives the shared
+    extract_id plus the page index of its own image, so the caller can read that page's
+    layout from layout.json (``pdf_info[page_index]``).
+    """
+    
+    def submit(self, image_path: str) -> Future:
+        """
+        Queue an image for the next PDF
+        
+        The image must stay on disk until the returned Future is resolved.
+        
+        Returns:
+            Future resolving to (extract_id, page_index, error_message)
+        """
+        return super().submit(image_path, os.path.basename(image_path))
+    
+    def _run_batch(self, batch: List[tuple[str, str, Future]]):
+        from services.export_service import ExportService
+        
+        pages = []
+        for image_path, _, future in batch:
+            if os.path.exists(image_path):
+                pages.append((image_path, future))
+            else:
+                future.set_result((None, None, f"Image not found: {image_path}"))
+        if not pages:
+            return
+        
+        logger.info(f"MinerU image batcher: packing {len(pages)} images into one PDF")
+        filename = f"images_{uuid.uuid4().hex[:8]}.pdf"
+        try:
+            # 每页尺寸与图片一致，MinerU 的 page_size 可直接按比例映射回原图
+            pdf_bytes = ExportService.create_pdf_from_images(
+                [image_path for image_path, _ in pages], fit_slide_page=False
+            )
+            results = self._parser_service.parse_files_batch([(pdf_bytes, filename)])
+        except Exception as e:
+            logger.error(f"MinerU image batch failed: {str(e)}", exc_info=True)
+            for _, future in pages:
+                future.set_exception(e)
+            return
+        
+        _, extract_id, error = results.get(filename, (None, None, f"No result returned for {filename}"))
+        for page_index, (_, future) in enumerate(pages):
+            future.set_result((extract_id, page_index, error))
@@ -4,11 +4,30 @@ File Service - handles all file operations
 import os
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from werkzeug.utils import secure_filename
 from PIL import Image
 from models import Project
 from models import db
+from services.storage import get_storage
+from config import Config
+
+
+# 生成图片原图的编码参数（PNG 压缩级别可调，WebP 为无损模式）
+GENERATED_IMAGE_SAVE_OPTIONS = {
+    'png': {'format': 'PNG', 'compress_level': Config.PAGE_IMAGE_PNG_COMPRESS_LEVEL},
+    'webp': {'format': 'WEBP', 'lossless': True, 'quality': 50, 'method': 3},
+    'jpg': {'format': 'JPEG', 'quality': 95},
+    'jpeg': {'format': 'JPEG', 'quality': 95},
+}
+
+# 缩略图金字塔各格式的文件扩展名与编码参数
+THUMBNAIL_EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+THUMBNAIL_SAVE_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 60, 'speed': 8},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
 
 
 def convert_image_to_rgb(image: Image.Image) -> Image.Image:
@@ -70,6 +89,14 @@ class FileService:
         """Initialize file service"""
         self.upload_folder = Path(upload_folder)
         self.upload_folder.mkdir(exist_ok=True, parents=True)
+        # 存储后端：本地目录作为工作目录，保存后 commit 到后端，读取前 ensure_local
+        self.storage = get_storage(str(self.upload_folder))
+
+    def _commit(self, filepath: Path) -> str:
+        """持久化本地已写入的文件到存储后端，返回相对路径"""
+        relative_path = filepath.relative_to(self.upload_folder).as_posix()
+        self.storage.commit(relative_path)
+        return relative_path
     
     def _get_project_dir(self, project_id: str) -> Path:
         """Get project directory"""
@@ -123,10 +150,10 @@ class FileService:
         file.save(str(filepath))
         
         # Return relative path
-        return filepath.relative_to(self.upload_folder).as_posix()
+        return self._commit(filepath)
     
     def save_generated_image(self, image: Image.Image, project_id: str,
-                           page_id: str, image_format: str = 'PNG',
+                           page_id: str, image_format: Optional[str] = None,
                            version_number: int = None) -> str:
         """
         Save generated image with version support
@@ -135,7 +162,7 @@ class FileService:
             image: PIL Image object
             project_id: Project ID
             page_id: Page ID
-            image_format: Image format (PNG, JPEG, etc.)
+            image_format: Image format (PNG, WEBP, JPEG, etc.), default Config.PAGE_IMAGE_FORMAT
             version_number: Optional version number. If None, uses timestamp-based naming
 
         Returns:
@@ -144,7 +171,7 @@ class FileService:
         pages_dir = self._get_pages_dir(project_id)
 
         # Use lowercase extension
-        ext = image_format.lower()
+        ext = (image_format or Config.PAGE_IMAGE_FORMAT).lower()
 
         # Generate filename with version number or timestamp
         if version_number is not None:
@@ -157,12 +184,32 @@ class FileService:
 
         filepath = pages_dir / filename
 
-        # Save image - format is determined by file extension or explicitly specified
-        # Some PIL Image objects may not support format parameter, so we use extension
-        image.save(str(filepath))
+        # Save image durably: the version record is committed only after the file is complete
+        save_options = GENERATED_IMAGE_SAVE_OPTIONS.get(ext) or {'format': Image.registered_extensions().get(f'.{ext}')}
+        if save_options['format'] == 'JPEG':
+            image = convert_image_to_rgb(image)
+        self._save_image_durable(image, filepath, **save_options)
 
         # Return relative path
-        return filepath.relative_to(self.upload_folder).as_posix()
+        return self._commit(filepath)
+
+    @staticmethod
+    def _save_image_durable(image: Image.Image, filepath: Path, **save_options) -> None:
+        """
+        Encode image to a temp file, fsync it and atomically rename into place
+
+        Readers never see a half-written file, and the file survives a crash once this returns.
+        """
+        tmp_path = filepath.with_name(f".{filepath.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                image.save(f, **save_options)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
 
     def get_cached_image_path(self, project_id: str, page_id: str, version_number: int) -> str:
         """
@@ -214,10 +261,67 @@ class FileService:
 
         # Save as compressed JPEG
         image.save(str(filepath), 'JPEG', quality=quality, optimize=True)
+        self.storage.commit(relative_path)
 
         # Return relative path
         return relative_path
 
+    def get_thumbnail_path(self, project_id: str, page_id: str, version_number: int,
+                           width: int, image_format: str) -> str:
+        """
+        Generate the relative path for one size/format of the thumbnail pyramid
+
+        Returns:
+            Relative file path (e.g., "project_id/pages/page_id_v1_w640.webp")
+        """
+        ext = THUMBNAIL_EXTENSIONS[image_format]
+        return f"{project_id}/pages/{page_id}_v{version_number}_w{width}.{ext}"
+
+    def save_thumbnail_set(self, image: Image.Image, project_id: str, page_id: str,
+                           version_number: int, widths: List[int], formats: List[str],
+                           cached_max_width: int = 1920) -> Dict[str, Dict[str, str]]:
+        """
+        Save multi-resolution thumbnails (pyramid) in several formats
+
+        Sizes are generated from large to small, each level resized from the previous one.
+        Widths larger than the source image are skipped. A JPEG at the width of the
+        legacy cached image (_thumb.jpg) reuses that file instead of writing a duplicate.
+
+        Args:
+            image: PIL Image object (full resolution)
+            project_id: Project ID
+            page_id: Page ID
+            version_number: Version number
+            widths: Target widths in pixels
+            formats: Image formats ('avif', 'webp', 'jpeg')
+            cached_max_width: Width of the legacy cached JPEG
+
+        Returns:
+            {width: {format: relative_path}}, width as string key (JSON friendly)
+        """
+        pages_dir = self._get_pages_dir(project_id)
+        level = convert_image_to_rgb(image)
+        thumbnails = {}
+
+        for width in sorted(set(widths), reverse=True):
+            if width > image.width:
+                continue
+            level = resize_image_for_thumbnail(level, width)
+            entries = {}
+            for image_format in formats:
+                if image_format == 'jpeg' and width == min(cached_max_width, image.width):
+                    legacy_path = self.get_cached_image_path(project_id, page_id, version_number)
+                    if self.storage.exists(legacy_path):
+                        entries[image_format] = legacy_path
+                        continue
+                relative_path = self.get_thumbnail_path(project_id, page_id, version_number, width, image_format)
+                level.save(str(pages_dir / Path(relative_path).name), **THUMBNAIL_SAVE_OPTIONS[image_format])
+                self.storage.commit(relative_path)
+                entries[image_format] = relative_path
+            thumbnails[str(width)] = entries
+
+        return thumbnails
+
     def save_material_image(self, image: Image.Image, project_id: Optional[str],
                             image_format: str = 'PNG') -> str:
         """
@@ -252,7 +356,7 @@ class FileService:
         image.save(str(filepath))
 
         # Return relative path
-        return filepath.relative_to(self.upload_folder).as_posix()
+        return self._commit(filepath)
     
     def delete_page_image_version(self, image_path: str) -> bool:
         """
@@ -264,18 +368,18 @@ class FileService:
         Returns:
             True if deleted successfully
         """
-        filepath = self.upload_folder / image_path.replace('\\', '/')
-        deleted = False
-
-        if filepath.exists() and filepath.is_file():
-            filepath.unlink()
-            deleted = True
+        image_path = image_path.replace('\\', '/')
+        deleted = self.storage.delete(image_path)
 
         # Also delete corresponding cache file (_thumb.jpg)
         # e.g., xxx_v1.png -> xxx_v1_thumb.jpg
-        cache_filepath = filepath.parent / f"{filepath.stem}_thumb.jpg"
-        if cache_filepath.exists() and cache_filepath.is_file():
-            cache_filepath.unlink()
+        path = Path(image_path)
+        self.storage.delete((path.parent / f"{path.stem}_thumb.jpg").as_posix())
+
+        # And the thumbnail pyramid (xxx_v1_w320.webp, ...)
+        for key in self.storage.list_keys(path.parent.as_posix()):
+            if Path(key).name.startswith(f"{path.stem}_w"):
+                self.storage.delete(key)
 
         return deleted
     
@@ -306,7 +410,11 @@ class FileService:
         Returns:
             Absolute file path
         """
-        return str(self.upload_folder / relative_path.replace('\\', '/'))
+        relative_path = relative_path.replace('\\', '/')
+        if self.storage.is_remote:
+            # 远程后端：本地缓存缺失时先拉取
+            self.storage.ensure_local(relative_path)
+        return str(self.upload_folder / relative_path)
     
     def delete_template(self, project_id: str) -> bool:
         """
@@ -318,12 +426,9 @@ class FileService:
         Returns:
             True if deleted successfully
         """
-        template_dir = self._get_template_dir(project_id)
-        
         # Delete all files in template directory
-        for file in template_dir.iterdir():
-            if file.is_file():
-                file.unlink()
+        for key in self.storage.list_keys(f"{project_id}/template"):
+            self.storage.delete(key)
         
         return True
     
@@ -338,13 +443,11 @@ class FileService:
         Returns:
             True if deleted successfully
         """
-        pages_dir = self._get_pages_dir(project_id)
-
         # Find and delete all page image files (all versions and caches)
         # Pattern matches: {page_id}_v1.png, {page_id}_v1_thumb.jpg, etc.
-        for file in pages_dir.glob(f"{page_id}_*"):
-            if file.is_file():
-                file.unlink()
+        for key in self.storage.list_keys(f"{project_id}/pages"):
+            if Path(key).name.startswith(f"{page_id}_"):
+                self.storage.delete(key)
 
         return True
     
@@ -358,18 +461,13 @@ class FileService:
         Returns:
             True if deleted successfully
         """
-        import shutil
-        project_dir = self._get_project_dir(project_id)
-        
-        if project_dir.exists():
-            shutil.rmtree(project_dir)
+        self.storage.delete_prefix(project_id)
         
         return True
     
     def file_exists(self, relative_path: str) -> bool:
         """Check if file exists"""
-        filepath = self.upload_folder / relative_path.replace('\\', '/')
-        return filepath.exists() and filepath.is_file()
+        return self.storage.exists(relative_path.replace('\\', '/'))
     
     def get_template_path(self, project_id: str) -> Optional[str]:
         """
@@ -387,8 +485,9 @@ class FileService:
         project = Project.query.get(project_id)
         if project and project.template_image_path:
             # template_image_path 是相对路径，需要转换为绝对路径
-            template_path = self.upload_folder / project.template_image_path
-            if template_path.exists() and template_path.is_file():
+            # 模板会被覆盖上传（固定文件名），远程后端下需要校验本地缓存是否过期
+            template_path = self.storage.ensure_local(project.template_image_path, validate=True)
+            if template_path:
                 return str(template_path)
         
         # 如果数据库中没有，回退到目录查找（兼容旧数据）
@@ -436,7 +535,7 @@ class FileService:
         file.save(str(filepath))
         
         # Return relative path
-        return filepath.relative_to(self.upload_folder).as_posix()
+        return self._commit(filepath)
     
     def delete_user_template(self, template_id: str) -> bool:
         """
@@ -448,12 +547,7 @@ class FileService:
         Returns:
             True if deleted successfully
         """
-        import shutil
-        templates_dir = self._get_user_templates_dir()
-        template_dir = templates_dir / template_id
-
-        if template_dir.exists():
-            shutil.rmtree(template_dir)
+        self.storage.delete_prefix(f"user-templates/{template_id}")
 
         return True
 
@@ -473,9 +567,9 @@ class FileService:
         """
         try:
             # Get full path to original image
-            original_full_path = self.upload_folder / original_path.replace('\\', '/')
+            original_full_path = self.storage.ensure_local(original_path.replace('\\', '/'))
 
-            if not original_full_path.exists():
+            if not original_full_path:
                 return None
 
             # Open and process image
@@ -498,7 +592,7 @@ class FileService:
             image.save(str(thumb_filepath), 'WEBP', quality=quality)
             image.close()
 
-            return thumb_filepath.relative_to(self.upload_folder).as_posix()
+            return self._commit(thumb_filepath)
         except Exception:
             return None
     
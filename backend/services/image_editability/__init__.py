@@ -11,6 +11,7 @@
 - 元素提取器（ElementExtractor及其实现）
 - Inpaint提供者（InpaintProvider及其实现）
 - 工厂和配置（ServiceConfig）
+- 递归预算（RecursionBudget）
 - 主服务类（ImageEditabilityService）
 
 Example:
@@ -48,6 +49,7 @@ from .extractors import (
     MinerUElementExtractor,
     BaiduOCRElementExtractor,
     BaiduAccurateOCRElementExtractor,
+    LocalOCRElementExtractor,
     ExtractorRegistry
 )
 
@@ -65,6 +67,7 @@ from .inpaint_providers import (
     GenerativeEditInpaintProvider,
     BaiduInpaintProvider,
     HybridInpaintProvider,
+    LocalInpaintProvider,
     InpaintProviderRegistry
 )
 
@@ -84,6 +87,9 @@ from .factories import (
     ServiceConfig
 )
 
+# 递归预算
+from .budget import RecursionBudget
+
 # 主服务
 from .service import ImageEditabilityService
 
@@ -99,6 +105,7 @@ __all__ = [
     'MinerUElementExtractor',
     'BaiduOCRElementExtractor',
     'BaiduAccurateOCRElementExtractor',
+    'LocalOCRElementExtractor',
     'ExtractorRegistry',
     # 混合提取器
     'HybridElementExtractor',
@@ -110,6 +117,7 @@ __all__ = [
     'GenerativeEditInpaintProvider',
     'BaiduInpaintProvider',
     'HybridInpaintProvider',
+    'LocalInpaintProvider',
     'InpaintProviderRegistry',
     # 文字属性提取器
     'TextStyleResult',
@@ -121,6 +129,8 @@ __all__ = [
     'InpaintProviderFactory',
     'TextAttributeExtractorFactory',
     'ServiceConfig',
+    # 递归预算
+    'RecursionBudget',
     # 主服务
     'ImageEditabilityService',
 ]
@@ -0,0 +1,134 @@
+"""
+递归预算 - 限制一次导出中递归拆分子元素的耗时和调用量
+
+每次导出创建一个 RecursionBudget，在该导出的所有页面之间共享（线程安全）。
+页面本身（depth=0）总是完整处理并计入用量；子元素按面积从大到小依次从预算中预留，
+预算用尽后剩余子元素保持为普通图片元素，并记录到 skipped 中。
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RecursionBudget:
+    """
+    单次导出的递归预算
+
+    所有上限为 0 或 None 表示不限制。远程调用按"一次元素提取 + 一次重绘"计，
+    子元素递归前按最坏情况预留（即使最终由本地快速路径完成重绘）。
+    """
+
+    def __init__(
+        self,
+        max_seconds: Optional[float] = None,
+        max_remote_calls: Optional[int] = None,
+        max_inpaint_calls: Optional[int] = None,
+        max_elements: Optional[int] = None
+    ):
+        """
+        Args:
+            max_seconds: 从创建预算开始，允许开始新的子元素递归的最长时间（秒）
+            max_remote_calls: 元素提取和重绘调用的总次数上限
+            max_inpaint_calls: 重绘调用次数上限
+            max_elements: 所有页面（含子元素）提取到的元素总数上限
+        """
+        self.max_seconds = max_seconds or None
+        self.max_remote_calls = max_remote_calls or None
+        self.max_inpaint_calls = max_inpaint_calls or None
+        self.max_elements = max_elements or None
+        self._started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.remote_calls = 0
+        self.inpaint_calls = 0
+        self.elements = 0
+        self.skipped: List[Dict[str, Any]] = []
+
+    @classmethod
+    def from_config(cls) -> Optional['RecursionBudget']:
+        """按 EXPORT_BUDGET_* 配置创建预算，全部未配置时返回 None"""
+        from config import Config
+
+        budget = cls(
+            max_seconds=Config.EXPORT_BUDGET_SECONDS,
+            max_remote_calls=Config.EXPORT_BUDGET_REMOTE_CALLS,
+            max_inpaint_calls=Config.EXPORT_BUDGET_INPAINT_CALLS,
+            max_elements=Config.EXPORT_BUDGET_ELEMENTS
+        )
+        return budget if budget.is_limited else None
+
+    @property
+    def is_limited(self) -> bool:
+        return any((self.max_seconds, self.max_remote_calls, self.max_inpaint_calls, self.max_elements))
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started_at
+
+    @property
+    def expired(self) -> bool:
+        return self.max_seconds is not None and self.elapsed >= self.max_seconds
+
+    def charge_page(self, element_count: int, inpaint: bool) -> None:
+        """记录页面本身（不受预算限制）的用量"""
+        with self._lock:
+            self.remote_calls += 2 if inpaint else 1
+            self.inpaint_calls += 1 if inpaint else 0
+            self.elements += element_count
+
+    def try_reserve_child(self) -> Optional[str]:
+        """
+        为一次子元素递归预留一次提取和一次重绘
+
+        Returns:
+            预留成功返回 None，否则返回预算用尽的原因
+        """
+        with self._lock:
+            if self.expired:
+                return 'time'
+            if self.max_remote_calls is not None and self.remote_calls + 2 > self.max_remote_calls:
+                return 'remote_calls'
+            if self.max_inpaint_calls is not None and self.inpaint_calls + 1 > self.max_inpaint_calls:
+                return 'inpaint_calls'
+            if self.max_elements is not None and self.elements >= self.max_elements:
+                return 'elements'
+            self.remote_calls += 2
+            self.inpaint_calls += 1
+            return None
+
+    def take_elements(self, count: int) -> int:
+        """
+        子图提取完成后（重绘之前）计入元素数，超出上限时截断到剩余额度
+
+        Returns:
+            允许保留的元素数
+        """
+        with self._lock:
+            if self.max_elements is not None:
+                count = max(0, min(count, self.max_elements - self.elements))
+            self.elements += count
+            return count
+
+    def record_skip(self, element_id: str, element_type: str, depth: int, reason: str) -> None:
+        """记录因预算用尽未递归处理的元素"""
+        with self._lock:
+            self.skipped.append({
+                'element_id': element_id,
+                'element_type': element_type,
+                'depth': depth,
+                'reason': reason
+            })
+        logger.info(f"{'  ' * depth}  预算用尽（{reason}），跳过 {element_id} 的递归拆分")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """用量统计"""
+        with self._lock:
+            return {
+                'elapsed_seconds': round(self.elapsed, 2),
+                'remote_calls': self.remote_calls,
+                'inpaint_calls': self.inpaint_calls,
+                'elements': self.elements,
+                'skipped': len(self.skipped)
+            }
@@ -1,11 +1,15 @@
 """
 数据模型 - 图片可编辑化服务的核心数据结构
+
+大型递归导出会同时持有数万个元素对象，因此数据类均使用 __slots__（不再为每个实例分配 __dict__）。
+除 to_dict() 外提供基于定长列表的紧凑序列化 to_compact()/from_compact()，
+字段按固定顺序排列、省略键名，可直接 json.dumps 持久化或跨进程传递。
 """
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True)
 class BBox:
     """边界框坐标"""
     x0: float
@@ -29,6 +33,12 @@ class BBox:
         """转换为元组格式 (x0, y0, x1, y1)"""
         return (self.x0, self.y0, self.x1, self.y1)
     
+    @classmethod
+    def from_list(cls, values: List[float]) -> 'BBox':
+        """从 [x0, y0, x1, y1] 创建"""
+        x0, y0, x1, y1 = values
+        return cls(x0=x0, y0=y0, x1=x1, y1=y1)
+    
     def to_dict(self) -> Dict[str, float]:
         """转换为字典格式"""
         return {
@@ -57,7 +67,7 @@ class BBox:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class EditableElement:
     """可编辑元素"""
     element_id: str  # 唯一标识
@@ -90,9 +100,45 @@ class EditableElement:
             'children': [child.to_dict() for child in self.children]
         }
         return result
+    
+    def to_compact(self) -> List[Any]:
+        """
+        转换为紧凑列表（可序列化）
+        
+        格式: [element_id, element_type, bbox, bbox_global, content, image_path,
+               inpainted_background_path, metadata, children]，bbox 为 [x0, y0, x1, y1]，
+        空的 metadata 记为 None
+        """
+        return [
+            self.element_id,
+            self.element_type,
+            [self.bbox.x0, self.bbox.y0, self.bbox.x1, self.bbox.y1],
+            [self.bbox_global.x0, self.bbox_global.y0, self.bbox_global.x1, self.bbox_global.y1],
+            self.content,
+            self.image_path,
+            self.inpainted_background_path,
+            self.metadata or None,
+            [child.to_compact() for child in self.children]
+        ]
+    
+    @classmethod
+    def from_compact(cls, data: List[Any]) -> 'EditableElement':
+        """从 to_compact() 的结果恢复"""
+        element_id, element_type, bbox, bbox_global, content, image_path, background, metadata, children = data
+        return cls(
+            element_id=element_id,
+            element_type=element_type,
+            bbox=BBox.from_list(bbox),
+            bbox_global=BBox.from_list(bbox_global),
+            content=content,
+            image_path=image_path,
+            children=[cls.from_compact(child) for child in children],
+            inpainted_background_path=background,
+            metadata=metadata or {}
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class EditableImage:
     """可编辑化的图片结构"""
     image_id: str  # 唯一标识
@@ -128,4 +174,39 @@ class EditableImage:
             'parent_id': self.parent_id,
             'metadata': self.metadata
         }
+    
+    def to_compact(self) -> List[Any]:
+        """
+        转换为紧凑列表（可序列化）
+        
+        格式: [image_id, image_path, width, height, clean_background, depth, parent_id,
+               metadata, elements]，元素格式见 EditableElement.to_compact()
+        """
+        return [
+            self.image_id,
+            self.image_path,
+            self.width,
+            self.height,
+            self.clean_background,
+            self.depth,
+            self.parent_id,
+            self.metadata or None,
+            [elem.to_compact() for elem in self.elements]
+        ]
+    
+    @classmethod
+    def from_compact(cls, data: List[Any]) -> 'EditableImage':
+        """从 to_compact() 的结果恢复"""
+        image_id, image_path, width, height, clean_background, depth, parent_id, metadata, elements = data
+        return cls(
+            image_id=image_id,
+            image_path=image_path,
+            width=width,
+            height=height,
+            elements=[EditableElement.from_compact(elem) for elem in elements],
+            clean_background=clean_background,
+            depth=depth,
+            parent_id=parent_id,
+            metadata=metadata or {}
+        )
 
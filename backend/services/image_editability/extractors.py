@@ -6,13 +6,12 @@
 - MinerUElementExtractor: MinerU版面分析提取器
 - BaiduOCRElementExtractor: 百度表格OCR提取器
 - BaiduAccurateOCRElementExtractor: 百度高精度OCR提取器（文字识别）
+- LocalOCRElementExtractor: 本地CPU OCR提取器（离线文字识别）
 - ExtractorRegistry: 元素类型到提取器的映射注册表
 """
-import os
 import json
 import logging
-import tempfile
-import uuid
+import threading
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional, Tuple, Type
 from pathlib import Path
@@ -150,27 +149,30 @@ class MinerUElementExtractor(ElementExtractor):
         image_size = img.size  # (width, height)
         
         # 1. 检查缓存
+        page_index = 0
         cached_dir = self._find_cache(image_path)
         if cached_dir:
             logger.info(f"{'  ' * depth}使用MinerU缓存")
             mineru_result_dir = cached_dir
         else:
             # 2. 解析图片
-            mineru_result_dir = self._parse_image(image_path, depth)
-            if not mineru_result_dir:
+            parsed = self._parse_image(image_path, depth)
+            if not parsed:
                 return ExtractionResult(elements=[])
+            mineru_result_dir, page_index = parsed
         
         # 3. 提取元素
         elements = self._extract_from_result(
             mineru_result_dir=mineru_result_dir,
             target_image_size=image_size,
-            depth=depth
+            depth=depth,
+            page_index=page_index
         )
         
         # 4. 返回结果（带上下文）
         context = ExtractionContext(
             result_dir=mineru_result_dir,
-            metadata={'source': 'mineru', 'image_size': image_size}
+            metadata={'source': 'mineru', 'image_size': image_size, 'page_index': page_index}
         )
         
         return ExtractionResult(elements=elements, context=context)
@@ -196,44 +198,35 @@ class MinerUElementExtractor(ElementExtractor):
             logger.debug(f"查找缓存失败: {e}")
             return None
     
-    def _parse_image(self, image_path: str, depth: int) -> Optional[str]:
-        """解析图片，返回MinerU结果目录"""
-        from services.export_service import ExportService
+    def _parse_image(self, image_path: str, depth: int) -> Optional[Tuple[str, int]]:
+        """
+        解析图片，返回 (MinerU结果目录, 页码)
         
-        # 转换为PDF
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_pdf:
-            pdf_path = tmp_pdf.name
+        并发的提取请求（同一批幻灯片或同一递归层级的子图）会在内存中合并为一个多页PDF，
+        一次上传解析；每张图片对应结果中的一页。
+        """
+        future = self._parser_service.get_image_batcher().submit(image_path)
+        extract_id, page_index, error_message = future.result()
         
-        try:
-            ExportService.create_pdf_from_images([image_path], output_file=pdf_path)
-            
-            # 调用MinerU解析
-            image_id = str(uuid.uuid4())[:8]
-            batch_id, markdown_content, extract_id, error_message, failed_image_count = \
-                self._parser_service.parse_file(pdf_path, f"image_{image_id}.pdf")
-            
-            if error_message or not extract_id:
-                logger.error(f"{'  ' * depth}MinerU解析失败: {error_message}")
-                return None
-            
-            mineru_result_dir = (self._upload_folder / 'mineru_files' / extract_id).resolve()
-            if not mineru_result_dir.exists():
-                logger.error(f"{'  ' * depth}MinerU结果目录不存在")
-                return None
-            
-            return str(mineru_result_dir)
+        if error_message or not extract_id:
+            logger.error(f"{'  ' * depth}MinerU解析失败: {error_message}")
+            return None
         
-        finally:
-            if os.path.exists(pdf_path):
-                os.remove(pdf_path)
+        mineru_result_dir = (self._upload_folder / 'mineru_files' / extract_id).resolve()
+        if not mineru_result_dir.exists():
+            logger.error(f"{'  ' * depth}MinerU结果目录不存在")
+            return None
+        
+        return str(mineru_result_dir), page_index
     
     def _extract_from_result(
         self,
         mineru_result_dir: str,
         target_image_size: Tuple[int, int],
-        depth: int
+        depth: int,
+        page_index: int = 0
     ) -> List[Dict[str, Any]]:
-        """从MinerU结果目录中提取元素"""
+        """从MinerU结果目录中提取元素（多页结果只读取 page_index 对应的页）"""
         elements = []
         
         try:
@@ -254,10 +247,10 @@ class MinerUElementExtractor(ElementExtractor):
                 content_list = json.load(f)
             
             # 从layout.json提取元素
-            if 'pdf_info' not in layout_data or not layout_data['pdf_info']:
+            if 'pdf_info' not in layout_data or len(layout_data['pdf_info']) <= page_index:
                 return []
             
-            page_info = layout_data['pdf_info'][0]
+            page_info = layout_data['pdf_info'][page_index]
             source_page_size = page_info.get('page_size', target_image_size)
             
             # 计算缩放比例
@@ -434,6 +427,76 @@ class MinerUElementExtractor(ElementExtractor):
         return elements
 
 
+def _overlapping_pairs(lo, hi, chunk_size: int = 256):
+    """
+    按区间起点排序后扫描，生成在该方向上重叠（lo_i < hi_j 且 lo_j < hi_i）的单元格对
+    
+    每次产出一批 (i, j) 索引数组（每对只出现一次），单次内存占用不超过 chunk_size × n。
+    """
+    import numpy as np
+    
+    order = np.argsort(lo, kind='stable')
+    sorted_lo = lo[order]
+    # 排序后 i 之后、起点小于 hi_i 的单元格才可能与 i 重叠
+    ends = np.searchsorted(sorted_lo, hi[order], side='left')
+    for start in range(0, len(order), chunk_size):
+        rows = np.arange(start, min(start + chunk_size, len(order)))
+        counts = np.maximum(ends[rows] - rows - 1, 0)
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        first = np.repeat(rows, counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        i, j = order[first], order[first + 1 + offsets]
+        keep = (lo[i] < hi[j]) & (lo[j] < hi[i])
+        yield i[keep], j[keep]
+
+
+def _min_cell_gap(bboxes: List[List[float]]) -> float:
+    """
+    计算单元格两两之间的最小间距（重叠时为负的重叠量），结果与逐对比较完全一致
+    
+    对每一对单元格：
+    - x、y方向都重叠 → -min(x重叠量, y重叠量)
+    - 只在x方向重叠 → 垂直间距
+    - 只在y方向重叠 → 水平间距
+    - 都不重叠（对角）→ 不参与比较
+    
+    只有在某个方向上重叠的单元格对才参与比较，因此分别沿x、y方向排序扫描找出这些对，
+    表格中每个单元格只与同行/同列的单元格配对，计算量接近线性。
+    
+    Returns:
+        最小间距，单元格少于2个或没有可比较的单元格对时返回 inf
+    """
+    import numpy as np
+    
+    if len(bboxes) <= 1:
+        return float('inf')
+    
+    boxes = np.asarray(bboxes, dtype=np.float64)
+    x0, y0, x1, y1 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    min_gap = np.inf
+    
+    # x方向重叠的单元格对：两个方向都重叠时取负的重叠量，否则取垂直间距
+    for i, j in _overlapping_pairs(x0, x1):
+        y_overlap = (y1[i] > y0[j]) & (y1[j] > y0[i])
+        overlap_x = np.minimum(x1[i], x1[j]) - np.maximum(x0[i], x0[j])
+        overlap_y = np.minimum(y1[i], y1[j]) - np.maximum(y0[i], y0[j])
+        vertical = np.where(y1[i] <= y0[j], y0[j] - y1[i], y0[i] - y1[j])
+        gaps = np.where(y_overlap, -np.minimum(overlap_x, overlap_y), vertical)
+        if gaps.size:
+            min_gap = min(min_gap, gaps.min())
+    
+    # 只在y方向重叠的单元格对：水平间距（两个方向都重叠的已在上面计算过）
+    for i, j in _overlapping_pairs(y0, y1):
+        x_overlap = (x1[i] > x0[j]) & (x1[j] > x0[i])
+        gaps = np.where(x1[i] <= x0[j], x0[j] - x1[i], x0[i] - x1[j])[~x_overlap]
+        if gaps.size:
+            min_gap = min(min_gap, gaps.min())
+    
+    return float(min_gap)
+
+
 class BaiduOCRElementExtractor(ElementExtractor):
     """
     基于百度OCR的元素提取器
@@ -533,7 +596,7 @@ class BaiduOCRElementExtractor(ElementExtractor):
         valid_cells: List[Dict],
         depth: int
     ) -> List[List[float]]:
-        """收缩单元格以避免重叠（算法同原实现）"""
+        """收缩单元格以避免重叠（算法同原实现，最小间距计算见 _min_cell_gap）"""
         TARGET_MIN_GAP = 6
         SHRINK_STEP = 0.02
         MIN_SIZE_RATIO = 0.4
@@ -552,32 +615,7 @@ class BaiduOCRElementExtractor(ElementExtractor):
             })
         
         def calculate_min_gap(cell_data):
-            if len(cell_data) <= 1:
-                return float('inf')
-            
-            min_gap = float('inf')
-            for i, data1 in enumerate(cell_data):
-                x0_1, y0_1, x1_1, y1_1 = data1['current_bbox']
-                for j, data2 in enumerate(cell_data):
-                    if i >= j:
-                        continue
-                    x0_2, y0_2, x1_2, y1_2 = data2['current_bbox']
-                    
-                    x_overlap = not (x1_1 <= x0_2 or x1_2 <= x0_1)
-                    y_overlap = not (y1_1 <= y0_2 or y1_2 <= y0_1)
-                    
-                    if x_overlap and y_overlap:
-                        overlap_x = min(x1_1, x1_2) - max(x0_1, x0_2)
-                        overlap_y = min(y1_1, y1_2) - max(y0_1, y0_2)
-                        min_gap = min(min_gap, -min(overlap_x, overlap_y))
-                    elif x_overlap:
-                        gap = y0_2 - y1_1 if y1_1 <= y0_2 else y0_1 - y1_2
-                        min_gap = min(min_gap, gap)
-                    elif y_overlap:
-                        gap = x0_2 - x1_1 if x1_1 <= x0_2 else x0_1 - x1_2
-                        min_gap = min(min_gap, gap)
-            
-            return min_gap
+            return _min_cell_gap([data['current_bbox'] for data in cell_data])
         
         iteration = 0
         total_shrink_ratio = 0
@@ -754,6 +792,118 @@ class BaiduAccurateOCRElementExtractor(ElementExtractor):
         return ExtractionResult(elements=elements)
 
 
+class LocalOCRElementExtractor(ElementExtractor):
+    """
+    基于本地CPU OCR模型的元素提取器
+    
+    使用 ONNX Runtime 运行文字检测 + 识别模型（rapidocr-onnxruntime，需 uv sync --extra local-ocr），
+    不依赖网络，耗时可预测。输出格式与 BaiduAccurateOCRElementExtractor 相同，
+    可单独使用，也可作为 HybridElementExtractor 的快速首轮文字识别。
+    """
+    
+    _shared_engine = None
+    _engine_lock = threading.Lock()
+    
+    def __init__(self, ocr_engine: Optional[Any] = None, min_score: float = 0.5):
+        """
+        初始化本地OCR提取器
+        
+        Args:
+            ocr_engine: OCR引擎（可调用对象，image_path -> (结果列表, 耗时)，结果项为 [四点框, 文字, 置信度]）；
+                None 时使用进程内共享的 RapidOCR 实例
+            min_score: 低于该置信度的文字行丢弃
+        """
+        self._ocr_engine = ocr_engine
+        self._min_score = min_score
+    
+    @staticmethod
+    def is_available() -> bool:
+        """本地OCR依赖是否已安装"""
+        try:
+            import rapidocr_onnxruntime  # noqa: F401
+        except ImportError:
+            return False
+        return True
+    
+    def supports_type(self, element_type: Optional[str]) -> bool:
+        """本地OCR主要支持文字类型"""
+        return element_type in ['text', 'title', 'paragraph', None]
+    
+    def _get_engine(self):
+        """获取OCR引擎（模型加载较慢，默认引擎在进程内只创建一次）"""
+        if self._ocr_engine is not None:
+            return self._ocr_engine
+        cls = LocalOCRElementExtractor
+        with cls._engine_lock:
+            if cls._shared_engine is None:
+                from rapidocr_onnxruntime import RapidOCR
+                cls._shared_engine = RapidOCR()
+                logger.info("✅ 本地OCR模型已加载")
+            return cls._shared_engine
+    
+    def extract(
+        self,
+        image_path: str,
+        element_type: Optional[str] = None,
+        **kwargs
+    ) -> ExtractionResult:
+        """
+        从图片中提取文字元素
+        
+        支持的kwargs:
+        - depth: int, 递归深度（用于日志）
+        
+        识别失败时返回空结果，并在上下文 metadata 中记录 error；成功时记录原始结果的
+        最低置信度 min_score（没有文字时为 None）和被丢弃的行数 dropped_count
+        """
+        depth = kwargs.get('depth', 0)
+        elements = []
+        
+        try:
+            ocr_lines, _ = self._get_engine()(image_path)
+        except Exception as e:
+            logger.error(f"{'  ' * depth}本地OCR识别失败: {e}", exc_info=True)
+            return ExtractionResult(
+                elements=elements,
+                context=ExtractionContext(metadata={'source': 'local_ocr', 'error': str(e)})
+            )
+        
+        # 原始识别结果中的最低置信度（含被 min_score 丢弃的行），供混合提取器判断是否需要百度OCR兜底
+        raw_min_score = None
+        dropped_count = 0
+        for points, text, score in ocr_lines or []:
+            score = float(score)
+            if not text.strip():
+                continue
+            raw_min_score = score if raw_min_score is None else min(raw_min_score, score)
+            if score < self._min_score:
+                dropped_count += 1
+                continue
+            xs = [p[0] for p in points]
+            ys = [p[1] for p in points]
+            elements.append({
+                'bbox': [int(min(xs)), int(min(ys)), int(round(max(xs))), int(round(max(ys)))],
+                'type': 'text',
+                'content': text,
+                'image_path': None,
+                'metadata': {
+                    'line_idx': len(elements),
+                    'source': 'local_ocr',
+                    'probability': {'average': score, 'min': score},
+                }
+            })
+        
+        logger.info(f"{'  ' * depth}本地OCR提取了 {len(elements)} 个文字元素（丢弃低置信度 {dropped_count} 行）")
+        return ExtractionResult(
+            elements=elements,
+            context=ExtractionContext(metadata={
+                'source': 'local_ocr',
+                'min_score': raw_min_score,
+                'dropped_count': dropped_count
+            })
+        )
+
+
 class ExtractorRegistry:
     """
     元素类型到提取器的映射注册表
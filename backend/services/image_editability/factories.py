@@ -5,7 +5,7 @@ import logging
 from typing import List, Optional, Any
 from pathlib import Path
 
-from .extractors import ElementExtractor, MinerUElementExtractor, BaiduOCRElementExtractor, BaiduAccurateOCRElementExtractor, ExtractorRegistry
+from .extractors import ElementExtractor, MinerUElementExtractor, BaiduOCRElementExtractor, BaiduAccurateOCRElementExtractor, LocalOCRElementExtractor, ExtractorRegistry
 from .hybrid_extractor import HybridElementExtractor, create_hybrid_extractor
 from .inpaint_providers import (
     InpaintProvider, 
@@ -13,6 +13,7 @@ from .inpaint_providers import (
     GenerativeEditInpaintProvider, 
     BaiduInpaintProvider,
     HybridInpaintProvider,
+    LocalInpaintProvider,
     InpaintProviderRegistry
 )
 from .text_attribute_extractors import (
@@ -156,13 +157,31 @@ class ExtractorFactory:
         
         return BaiduAccurateOCRElementExtractor(baidu_accurate_ocr_provider)
     
+    @staticmethod
+    def create_local_ocr_extractor(min_score: float = 0.5) -> Optional[LocalOCRElementExtractor]:
+        """
+        创建本地CPU OCR提取器
+        
+        Args:
+            min_score: 低于该置信度的文字行丢弃
+        
+        Returns:
+            LocalOCRElementExtractor实例，如果未安装本地OCR依赖则返回None
+        """
+        if not LocalOCRElementExtractor.is_available():
+            logger.warning("未安装 rapidocr-onnxruntime（uv sync --extra local-ocr），本地OCR不可用")
+            return None
+        return LocalOCRElementExtractor(min_score=min_score)
+    
     @staticmethod
     def create_hybrid_extractor(
         parser_service: Any,
         upload_folder: Path,
         baidu_accurate_ocr_provider: Optional[Any] = None,
         contain_threshold: float = 0.8,
-        intersection_threshold: float = 0.3
+        intersection_threshold: float = 0.3,
+        fast_ocr_extractor: Optional[ElementExtractor] = None,
+        fast_ocr_min_confidence: float = 0.9
     ) -> Optional[HybridElementExtractor]:
         """
         创建混合元素提取器
@@ -182,6 +201,8 @@ class ExtractorFactory:
             baidu_accurate_ocr_provider: 百度高精度OCR Provider实例（可选，自动创建）
             contain_threshold: 包含判断阈值，默认0.8（80%面积在内部算包含）
             intersection_threshold: 交集判断阈值，默认0.3（30%重叠算有交集）
+            fast_ocr_extractor: 快速首轮文字识别提取器（如本地OCR），置信度足够时跳过百度OCR
+            fast_ocr_min_confidence: 首轮结果的最低平均置信度
         
         Returns:
             HybridElementExtractor实例，如果无法创建则返回None
@@ -196,16 +217,20 @@ class ExtractorFactory:
         )
         
         if baidu_ocr_extractor is None:
-            logger.warning("无法创建百度高精度OCR提取器，混合提取器创建失败")
-            return None
-        
-        logger.info("✅ 百度高精度OCR提取器已创建（用于混合提取）")
+            if fast_ocr_extractor is None:
+                logger.warning("无法创建百度高精度OCR提取器，混合提取器创建失败")
+                return None
+            logger.warning("百度高精度OCR不可用，混合提取器只使用本地OCR识别文字")
+        else:
+            logger.info("✅ 百度高精度OCR提取器已创建（用于混合提取）")
         
         return HybridElementExtractor(
             mineru_extractor=mineru_extractor,
             baidu_ocr_extractor=baidu_ocr_extractor,
             contain_threshold=contain_threshold,
-            intersection_threshold=intersection_threshold
+            intersection_threshold=intersection_threshold,
+            fast_ocr_extractor=fast_ocr_extractor,
+            fast_ocr_min_confidence=fast_ocr_min_confidence
         )
     
     @staticmethod
@@ -414,7 +439,9 @@ class InpaintProviderFactory:
         baidu_provider: Optional[BaiduInpaintProvider] = None,
         generative_provider: Optional[GenerativeEditInpaintProvider] = None,
         ai_service: Optional[Any] = None,
-        enhance_quality: bool = True
+        enhance_quality: bool = True,
+        enhance_mode: str = 'regions',
+        tile_workers: int = 4
     ) -> Optional[HybridInpaintProvider]:
         """
         创建混合Inpaint提供者（百度修复 + 生成式画质提升）
@@ -428,6 +455,8 @@ class InpaintProviderFactory:
             generative_provider: 生成式编辑提供者（可选，自动创建）
             ai_service: AI服务实例（用于创建生成式提供者）
             enhance_quality: 是否启用画质提升，默认True
+            enhance_mode: 画质提升模式，'regions'（只提升被修复区域）或 'full'（整图）
+            tile_workers: 按区域提升时的并行线程数
         
         Returns:
             HybridInpaintProvider实例，如果无法创建则返回None
@@ -450,8 +479,29 @@ class InpaintProviderFactory:
         return HybridInpaintProvider(
             baidu_provider=baidu_provider,
             generative_provider=generative_provider,
-            enhance_quality=enhance_quality
+            enhance_quality=enhance_quality,
+            enhance_mode=enhance_mode,
+            tile_workers=tile_workers
         )
+    
+    @staticmethod
+    def create_local_inpaint_provider(
+        fallback_provider: Optional[InpaintProvider] = None,
+        min_confidence: float = 0.8
+    ) -> LocalInpaintProvider:
+        """
+        创建本地CPU Inpaint提供者（纯色/渐变/Telea快速路径）
+        
+        Args:
+            fallback_provider: 本地无法处理的区域交给该提供者
+            min_confidence: 接受本地结果的最低置信度
+        
+        Returns:
+            LocalInpaintProvider实例
+        """
+        logger.info(f"创建LocalInpaintProvider（回退: "
+                    f"{fallback_provider.__class__.__name__ if fallback_provider else 'None'}）")
+        return LocalInpaintProvider(fallback_provider=fallback_provider, min_confidence=min_confidence)
 
 
 class ServiceConfig:
@@ -464,7 +514,9 @@ class ServiceConfig:
         inpaint_registry: InpaintProviderRegistry,
         max_depth: int = 1,
         min_image_size: int = 200,
-        min_image_area: int = 40000
+        min_image_area: int = 40000,
+        local_inpaint: bool = True,
+        local_inpaint_min_confidence: float = 0.8
     ):
         """
         初始化服务配置
@@ -476,6 +528,8 @@ class ServiceConfig:
             max_depth: 最大递归深度（默认1）
             min_image_size: 最小图片尺寸
             min_image_area: 最小图片面积
+            local_inpaint: 是否在远程重绘前做本地纯色/渐变填充预检查
+            local_inpaint_min_confidence: 预检查接受本地结果的最低置信度
         """
         self.upload_folder = upload_folder
         self.extractor_registry = extractor_registry
@@ -483,6 +537,8 @@ class ServiceConfig:
         self.max_depth = max_depth
         self.min_image_size = min_image_size
         self.min_image_area = min_image_area
+        self.local_inpaint = local_inpaint
+        self.local_inpaint_min_confidence = local_inpaint_min_confidence
     
     @classmethod
     def from_defaults(
@@ -493,7 +549,7 @@ class ServiceConfig:
         ai_service: Optional[Any] = None,
         use_hybrid_extractor: bool = True,
         use_hybrid_inpaint: bool = True,
-        extractor_method: Optional[str] = None,  # 'mineru' 或 'hybrid'，优先于 use_hybrid_extractor
+        extractor_method: Optional[str] = None,  # 'mineru' / 'hybrid' / 'local'，优先于 use_hybrid_extractor
         inpaint_method: Optional[str] = None,    # 'generative', 'baidu', 'hybrid'，优先于 use_hybrid_inpaint
         **kwargs
     ) -> 'ServiceConfig':
@@ -501,7 +557,7 @@ class ServiceConfig:
         从默认参数创建配置
         
         默认配置（推荐用于导出PPTX）：
-        - 元素提取：混合提取器（MinerU版面分析 + 百度高精度OCR）
+        - 元素提取：混合提取器（MinerU版面分析 + 百度高精度OCR；启用本地OCR时作为快速首轮）
         - 背景生成：混合Inpaint（百度图像修复 + 生成式画质提升）
         - 递归深度：1
         
@@ -525,7 +581,7 @@ class ServiceConfig:
             ai_service: AI服务实例（可选，用于生成式重绘）
             use_hybrid_extractor: 是否使用混合提取器（默认True，会被 extractor_method 覆盖）
             use_hybrid_inpaint: 是否使用混合Inpaint（默认True，会被 inpaint_method 覆盖）
-            extractor_method: 组件提取方法，'mineru' 或 'hybrid'（优先于 use_hybrid_extractor）
+            extractor_method: 组件提取方法，'mineru' / 'hybrid' / 'local'（本地离线OCR，只提取文字），优先于 use_hybrid_extractor
             inpaint_method: 背景修复方法，'generative', 'baidu', 'hybrid'（优先于 use_hybrid_inpaint）
             **kwargs: 其他配置参数
                 - max_depth: 最大递归深度（默认1）
@@ -534,6 +590,12 @@ class ServiceConfig:
                 - contain_threshold: 混合提取器包含判断阈值（默认0.8）
                 - intersection_threshold: 混合提取器交集判断阈值（默认0.3）
                 - enhance_quality: 混合Inpaint是否启用画质提升（默认True）
+                - enhance_mode: 混合Inpaint画质提升模式 'regions'/'full'（默认读取 INPAINT_ENHANCE_MODE）
+                - enhance_tile_workers: 按区域提升的并行线程数（默认读取 INPAINT_ENHANCE_TILE_WORKERS）
+                - local_inpaint: 是否启用本地纯色/渐变快速路径（默认读取 LOCAL_INPAINT_ENABLED）
+                - local_inpaint_min_confidence: 本地结果的最低置信度（默认读取 LOCAL_INPAINT_MIN_CONFIDENCE）
+                - local_ocr: 混合提取器是否先用本地OCR识别文字（默认读取 LOCAL_OCR_ENABLED）
+                - local_ocr_min_confidence: 本地OCR结果达到该置信度时跳过百度OCR（默认读取 LOCAL_OCR_MIN_CONFIDENCE）
         
         Returns:
             ServiceConfig实例
@@ -542,6 +604,7 @@ class ServiceConfig:
             ValueError: 如果 mineru_token 未配置
         """
         # 处理新参数：extractor_method 优先于 use_hybrid_extractor
+        use_local_extractor = (extractor_method == 'local')
         if extractor_method is not None:
             use_hybrid_extractor = (extractor_method == 'hybrid')
             logger.info(f"extractor_method={extractor_method} -> use_hybrid_extractor={use_hybrid_extractor}")
@@ -555,19 +618,25 @@ class ServiceConfig:
                 mineru_api_base = current_app.config.get('MINERU_API_BASE', 'https://mineru.net')
             if upload_folder is None:
                 upload_folder = current_app.config.get('UPLOAD_FOLDER', './uploads')
+            local_inpaint_default = current_app.config.get('LOCAL_INPAINT_ENABLED', True)
+            local_inpaint_min_confidence = current_app.config.get('LOCAL_INPAINT_MIN_CONFIDENCE', 0.8)
+            enhance_mode = current_app.config.get('INPAINT_ENHANCE_MODE', 'regions')
+            enhance_tile_workers = current_app.config.get('INPAINT_ENHANCE_TILE_WORKERS', 4)
+            local_ocr_default = current_app.config.get('LOCAL_OCR_ENABLED', False)
+            local_ocr_min_confidence = current_app.config.get('LOCAL_OCR_MIN_CONFIDENCE', 0.9)
         else:
+            local_ocr_default = False
+            local_ocr_min_confidence = 0.9
+            local_inpaint_default = True
+            local_inpaint_min_confidence = 0.8
+            enhance_mode = 'regions'
+            enhance_tile_workers = 4
             # 回退到默认值
             if mineru_api_base is None:
                 mineru_api_base = 'https://mineru.net'
             if upload_folder is None:
                 upload_folder = './uploads'
         
-        # 验证必需配置
-        if not mineru_token:
-            raise ValueError("MinerU token is required. Please configure MINERU_TOKEN.")
-        
-        from services.file_parser_service import FileParserService
-        
         # 解析upload_folder路径
         upload_path = Path(upload_folder)
         if not upload_path.is_absolute():
@@ -578,22 +647,44 @@ class ServiceConfig:
         
         logger.info(f"Upload folder resolved to: {upload_path}")
         
-        # 创建MinerU解析服务
-        parser_service = FileParserService(
-            mineru_token=mineru_token,
-            mineru_api_base=mineru_api_base
-        )
-        
         # 创建提取器注册表
         extractor_registry = ExtractorRegistry()
+        local_ocr_extractor = None
+        if use_local_extractor or (use_hybrid_extractor and kwargs.get('local_ocr', local_ocr_default)):
+            local_ocr_extractor = ExtractorFactory.create_local_ocr_extractor()
+        
+        # 纯本地提取不需要MinerU（离线部署可以不配置 MINERU_TOKEN）
+        parser_service = None
+        if not (use_local_extractor and local_ocr_extractor):
+            # 验证必需配置
+            if not mineru_token:
+                raise ValueError("MinerU token is required. Please configure MINERU_TOKEN.")
+            
+            from services.file_parser_service import FileParserService
+            
+            # 创建MinerU解析服务
+            parser_service = FileParserService(
+                mineru_token=mineru_token,
+                mineru_api_base=mineru_api_base
+            )
         
-        if use_hybrid_extractor:
-            # 尝试创建混合提取器（MinerU + 百度高精度OCR）
+        if use_local_extractor and local_ocr_extractor:
+            # 纯本地离线提取（不访问网络，只提取文字元素）
+            extractor_registry.register_default(local_ocr_extractor)
+            logger.info("✅ 本地OCR提取器已创建（离线文字识别）")
+        elif use_local_extractor:
+            mineru_extractor = MinerUElementExtractor(parser_service, upload_path)
+            extractor_registry.register_default(mineru_extractor)
+            logger.warning("⚠️ 本地OCR不可用，回退到MinerU提取器")
+        elif use_hybrid_extractor:
+            # 尝试创建混合提取器（MinerU + 百度高精度OCR，可选本地OCR快速首轮）
             hybrid_extractor = ExtractorFactory.create_hybrid_extractor(
                 parser_service=parser_service,
                 upload_folder=upload_path,
                 contain_threshold=kwargs.get('contain_threshold', 0.8),
-                intersection_threshold=kwargs.get('intersection_threshold', 0.3)
+                intersection_threshold=kwargs.get('intersection_threshold', 0.3),
+                fast_ocr_extractor=local_ocr_extractor,
+                fast_ocr_min_confidence=kwargs.get('local_ocr_min_confidence', local_ocr_min_confidence)
             )
             
             if hybrid_extractor:
@@ -625,7 +716,9 @@ class ServiceConfig:
             # 混合Inpaint提供者（百度修复 + 生成式画质提升）
             hybrid_inpaint = InpaintProviderFactory.create_hybrid_inpaint_provider(
                 ai_service=ai_service,
-                enhance_quality=kwargs.get('enhance_quality', True)
+                enhance_quality=kwargs.get('enhance_quality', True),
+                enhance_mode=kwargs.get('enhance_mode', enhance_mode),
+                tile_workers=kwargs.get('enhance_tile_workers', enhance_tile_workers)
             )
             
             if hybrid_inpaint:
@@ -662,13 +755,24 @@ class ServiceConfig:
             inpaint_registry.register_default(generative_provider)
             logger.info("✅ 重绘注册表已创建（GenerativeEdit通用）")
         
+        # 本地快速路径：纯色/渐变背景在本地填充，只把处理不了的区域交给上面的远程提供者
+        local_inpaint = kwargs.get('local_inpaint', local_inpaint_default)
+        local_inpaint_min_confidence = kwargs.get('local_inpaint_min_confidence', local_inpaint_min_confidence)
+        if local_inpaint:
+            inpaint_registry.register_default(InpaintProviderFactory.create_local_inpaint_provider(
+                fallback_provider=inpaint_registry.get_provider(None),
+                min_confidence=local_inpaint_min_confidence
+            ))
+        
         return cls(
             upload_folder=upload_path,
             extractor_registry=extractor_registry,
             inpaint_registry=inpaint_registry,
             max_depth=kwargs.get('max_depth', 1),
             min_image_size=kwargs.get('min_image_size', 200),
-            min_image_area=kwargs.get('min_image_area', 40000)
+            min_image_area=kwargs.get('min_image_area', 40000),
+            local_inpaint=local_inpaint,
+            local_inpaint_min_confidence=local_inpaint_min_confidence
         )
 
 
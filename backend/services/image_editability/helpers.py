@@ -4,8 +4,9 @@
 纯函数，不依赖任何具体实现
 """
 import logging
+import os
 import tempfile
-from typing import List
+from typing import List, Optional
 from PIL import Image
 
 from .data_models import EditableElement, BBox
@@ -33,7 +34,8 @@ def collect_bboxes_from_elements(elements: List[EditableElement]) -> List[tuple]
 
 def crop_element_from_image(
     source_image_path: str,
-    bbox: BBox
+    bbox: BBox,
+    output_dir: Optional[str] = None
 ) -> str:
     """
     从源图片中裁剪出元素区域
@@ -41,9 +43,11 @@ def crop_element_from_image(
     Args:
         source_image_path: 源图片路径
         bbox: 裁剪区域
+        output_dir: 临时文件所在目录（默认系统临时目录）；放在上传目录下时
+            即使调用方异常退出未能删除，也会被存储回收任务清理
         
     Returns:
-        裁剪后图片的临时文件路径
+        裁剪后图片的临时文件路径（由调用方负责删除）
     """
     img = Image.open(source_image_path)
     
@@ -52,7 +56,9 @@ def crop_element_from_image(
     cropped = img.crop(crop_box)
     
     # 保存到临时文件
-    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(suffix='.png', dir=output_dir, delete=False) as tmp:
         cropped.save(tmp.name)
         return tmp.name
 
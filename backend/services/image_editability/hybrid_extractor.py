@@ -2,7 +2,7 @@
 混合元素提取器 - 结合MinerU版面分析和百度高精度OCR的提取策略
 
 工作流程：
-1. MinerU和百度OCR并行识别（提升速度）
+1. MinerU和百度OCR并行识别（提升速度）；配置了本地OCR时先本地识别，置信度足够则不再调用百度OCR
 2. 结果合并：
    - 图片类型bbox里包含的百度OCR bbox → 删除百度OCR bbox
    - 表格类型bbox里包含的百度OCR bbox → 保留百度OCR bbox，删除MinerU表格bbox
@@ -170,21 +170,29 @@ class HybridElementExtractor(ElementExtractor):
     def __init__(
         self,
         mineru_extractor: MinerUElementExtractor,
-        baidu_ocr_extractor: BaiduAccurateOCRElementExtractor,
+        baidu_ocr_extractor: Optional[BaiduAccurateOCRElementExtractor],
         contain_threshold: float = 0.8,
-        intersection_threshold: float = 0.3
+        intersection_threshold: float = 0.3,
+        fast_ocr_extractor: Optional[ElementExtractor] = None,
+        fast_ocr_min_confidence: float = 0.9
     ):
         """
         初始化混合提取器
         
         Args:
             mineru_extractor: MinerU元素提取器
-            baidu_ocr_extractor: 百度高精度OCR提取器
+            baidu_ocr_extractor: 百度高精度OCR提取器（只配置本地OCR时可为None）
             contain_threshold: 包含判断阈值，默认0.8（80%面积在内部算包含）
             intersection_threshold: 交集判断阈值，默认0.3（30%重叠算有交集）
+            fast_ocr_extractor: 快速首轮文字识别提取器（如 LocalOCRElementExtractor），可选
+            fast_ocr_min_confidence: 首轮结果每行平均置信度都不低于该值时，跳过百度OCR
         """
+        if baidu_ocr_extractor is None and fast_ocr_extractor is None:
+            raise ValueError("baidu_ocr_extractor 和 fast_ocr_extractor 至少需要提供一个")
         self._mineru_extractor = mineru_extractor
         self._baidu_ocr_extractor = baidu_ocr_extractor
+        self._fast_ocr_extractor = fast_ocr_extractor
+        self._fast_ocr_min_confidence = fast_ocr_min_confidence
         self._contain_threshold = contain_threshold
         self._intersection_threshold = intersection_threshold
     
@@ -231,6 +239,11 @@ class HybridElementExtractor(ElementExtractor):
             return self._mineru_extractor.extract(image_path, element_type, **kwargs)
         
         def run_baidu_ocr():
+            if self._fast_ocr_extractor is not None:
+                fast_result = self._fast_ocr_extractor.extract(image_path, element_type, **kwargs)
+                if self._baidu_ocr_extractor is None or self._is_confident(fast_result):
+                    return fast_result
+                logger.info(f"{indent}  本地OCR置信度不足，改用百度OCR")
             return self._baidu_ocr_extractor.extract(image_path, element_type, **kwargs)
         
         with ThreadPoolExecutor(max_workers=2) as executor:
@@ -277,6 +290,22 @@ class HybridElementExtractor(ElementExtractor):
         
         return ExtractionResult(elements=merged_elements, context=context)
     
+    def _is_confident(self, result: ExtractionResult) -> bool:
+        """
+        首轮识别成功、有识别结果，且每行（包括首轮提取器自行丢弃的低分行）置信度都达到阈值
+        """
+        metadata = result.context.metadata
+        if metadata.get('error') or not result.elements:
+            return False
+        if 'min_score' in metadata and (metadata['min_score'] is None
+                                        or metadata['min_score'] < self._fast_ocr_min_confidence):
+            return False
+        for elem in result.elements:
+            probability = elem.get('metadata', {}).get('probability') or {}
+            if probability.get('average', 0.0) < self._fast_ocr_min_confidence:
+                return False
+        return True
+    
     def _merge_results(
         self,
         mineru_elements: List[Dict[str, Any]],
@@ -297,7 +326,7 @@ class HybridElementExtractor(ElementExtractor):
             depth: 递归深度（用于日志）
         
         Returns:
-            合并后的元素列表
+            合并后的元素列表（与输入共享元素字典，metadata 中原地写入 source 等标记）
         """
         indent = '  ' * depth
         
@@ -363,37 +392,32 @@ class HybridElementExtractor(ElementExtractor):
         merged = []
         
         # 添加图片元素（全部保留）
+        # 元素字典由提取器每次新建、只在本次合并中使用，直接原地标记来源，不再逐个复制
         for elem in image_elements:
-            elem_copy = elem.copy()
-            elem_copy['metadata'] = elem_copy.get('metadata', {}).copy()
-            elem_copy['metadata']['source'] = 'mineru'
-            merged.append(elem_copy)
+            elem.setdefault('metadata', {})['source'] = 'mineru'
+            merged.append(elem)
         
         # 添加表格元素（删除有文字的表格bbox）
         for idx, elem in enumerate(table_elements):
             if idx not in tables_to_remove:
-                elem_copy = elem.copy()
-                elem_copy['metadata'] = elem_copy.get('metadata', {}).copy()
-                elem_copy['metadata']['source'] = 'mineru'
-                merged.append(elem_copy)
+                elem.setdefault('metadata', {})['source'] = 'mineru'
+                merged.append(elem)
         
         # 添加其他MinerU元素（删除与百度OCR有交集的）
         for idx, elem in enumerate(other_elements):
             if idx not in other_to_remove:
-                elem_copy = elem.copy()
-                elem_copy['metadata'] = elem_copy.get('metadata', {}).copy()
-                elem_copy['metadata']['source'] = 'mineru'
-                merged.append(elem_copy)
+                elem.setdefault('metadata', {})['source'] = 'mineru'
+                merged.append(elem)
         
         # 添加保留的百度OCR元素
         for idx in baidu_to_keep:
             elem = baidu_elements[idx]
-            elem_copy = elem.copy()
-            elem_copy['metadata'] = elem_copy.get('metadata', {}).copy()
-            elem_copy['metadata']['source'] = 'baidu_ocr'
+            metadata = elem.setdefault('metadata', {})
+            if metadata.get('source') != 'local_ocr':
+                metadata['source'] = 'baidu_ocr'
             if idx in baidu_in_table:
-                elem_copy['metadata']['in_table'] = True
-            merged.append(elem_copy)
+                metadata['in_table'] = True
+            merged.append(elem)
         
         logger.info(f"{indent}  合并结果: 保留图片={len(image_elements)}, "
                    f"保留表格={len(table_elements) - len(tables_to_remove)}, "
@@ -409,7 +433,9 @@ def create_hybrid_extractor(
     parser_service: Optional[Any] = None,
     upload_folder: Optional[Any] = None,
     contain_threshold: float = 0.8,
-    intersection_threshold: float = 0.3
+    intersection_threshold: float = 0.3,
+    fast_ocr_extractor: Optional[ElementExtractor] = None,
+    fast_ocr_min_confidence: float = 0.9
 ) -> Optional[HybridElementExtractor]:
     """
     创建混合元素提取器
@@ -421,6 +447,8 @@ def create_hybrid_extractor(
         upload_folder: 上传文件夹路径（用于创建MinerU提取器）
         contain_threshold: 包含判断阈值
         intersection_threshold: 交集判断阈值
+        fast_ocr_extractor: 快速首轮文字识别提取器（可选）；百度OCR不可用时单独承担文字识别
+        fast_ocr_min_confidence: 首轮结果达到该置信度时跳过百度OCR
     
     Returns:
         HybridElementExtractor实例，如果无法创建则返回None
@@ -446,17 +474,20 @@ def create_hybrid_extractor(
             baidu_provider = create_baidu_accurate_ocr_provider()
             if baidu_provider is None:
                 logger.warning("无法创建百度高精度OCR Provider")
-                return None
-            baidu_ocr_extractor = BaiduAccurateOCRElementExtractor(baidu_provider)
-            logger.info("✅ 百度高精度OCR提取器已创建")
+            else:
+                baidu_ocr_extractor = BaiduAccurateOCRElementExtractor(baidu_provider)
+                logger.info("✅ 百度高精度OCR提取器已创建")
         except Exception as e:
             logger.error(f"创建百度高精度OCR提取器失败: {e}")
+        if baidu_ocr_extractor is None and fast_ocr_extractor is None:
             return None
     
     return HybridElementExtractor(
         mineru_extractor=mineru_extractor,
         baidu_ocr_extractor=baidu_ocr_extractor,
         contain_threshold=contain_threshold,
-        intersection_threshold=intersection_threshold
+        intersection_threshold=intersection_threshold,
+        fast_ocr_extractor=fast_ocr_extractor,
+        fast_ocr_min_confidence=fast_ocr_min_confidence
     )
 
@@ -6,11 +6,13 @@ Inpaint提供者 - 抽象不同的inpaint实现
 2. GenerativeEditInpaintProvider - 基于生成式大模型的整图编辑重绘（如Gemini图片编辑）
 3. BaiduInpaintProvider - 基于百度图像修复API的区域重绘
 4. HybridInpaintProvider - 混合方法：先百度修复去除文字，再生成式提升画质
+5. LocalInpaintProvider - 本地CPU快速路径（纯色/渐变/Telea），处理不了的区域再交给远程提供者
 
 以及注册表：
 - InpaintProviderRegistry - 元素类型到重绘方法的映射注册表
 """
 import logging
+import os
 import tempfile
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict
@@ -285,13 +287,29 @@ class HybridInpaintProvider(InpaintProvider):
     适用场景：
     - 需要精确去除文字且保证高画质的场景
     - 单独使用生成式模型容易遗漏文字的情况
+    
+    画质提升模式（enhance_mode）：
+    - 'regions'（默认）：只裁剪被修复区域（带上下文边距）作为小图块并行提升，
+      再羽化贴回原图，图片模型耗时与修复面积成正比；图块过多或总面积过大时自动回退到整图
+    - 'full'：整页图片送入生成式模型提升
     """
     
+    # 图片模型支持的宽高比，图块会扩展到最接近的比例
+    TILE_ASPECT_RATIOS = {
+        '1:1': 1.0, '4:3': 4 / 3, '3:4': 3 / 4, '3:2': 3 / 2, '2:3': 2 / 3, '16:9': 16 / 9, '9:16': 9 / 16,
+    }
+    
     def __init__(
         self,
         baidu_provider: BaiduInpaintProvider,
         generative_provider: 'GenerativeEditInpaintProvider',
-        enhance_quality: bool = True
+        enhance_quality: bool = True,
+        enhance_mode: str = 'regions',
+        tile_padding: int = 48,
+        feather_pixels: int = 12,
+        max_tiles: int = 8,
+        max_tile_area_ratio: float = 0.4,
+        tile_workers: int = 4
     ):
         """
         初始化混合Inpaint提供者
@@ -300,10 +318,22 @@ class HybridInpaintProvider(InpaintProvider):
             baidu_provider: 百度图像修复提供者
             generative_provider: 生成式编辑提供者（用于画质提升）
             enhance_quality: 是否在百度修复后使用生成式模型提升画质，默认True
+            enhance_mode: 画质提升模式，'regions'（按区域）或 'full'（整图）
+            tile_padding: 图块在修复区域外保留的上下文边距（像素）
+            feather_pixels: 贴回时的羽化宽度（像素）
+            max_tiles: 超过该图块数时回退到整图提升
+            max_tile_area_ratio: 图块总面积超过页面面积的该比例时回退到整图提升
+            tile_workers: 并行提升图块的线程数
         """
         self._baidu_provider = baidu_provider
         self._generative_provider = generative_provider
         self._enhance_quality = enhance_quality
+        self._enhance_mode = enhance_mode
+        self._tile_padding = tile_padding
+        self._feather_pixels = feather_pixels
+        self._max_tiles = max_tiles
+        self._max_tile_area_ratio = max_tile_area_ratio
+        self._tile_workers = max(1, tile_workers)
     
     def inpaint_regions(
         self,
@@ -318,11 +348,13 @@ class HybridInpaintProvider(InpaintProvider):
         支持的kwargs参数：
         - expand_pixels: int, 百度修复的扩展像素数，默认2
         - enhance_quality: bool, 是否提升画质，默认使用初始化时的值
-        - aspect_ratio: str, 画质提升的宽高比
-        - resolution: str, 画质提升的分辨率
+        - enhance_mode: str, 'regions' 或 'full'，默认使用初始化时的值
+        - aspect_ratio: str, 整图画质提升的宽高比
+        - resolution: str, 整图画质提升的分辨率
         """
         expand_pixels = kwargs.get('expand_pixels', 2)
         enhance_quality = kwargs.get('enhance_quality', self._enhance_quality)
+        enhance_mode = kwargs.get('enhance_mode', self._enhance_mode)
         
         try:
             # Step 1: 百度图像修复 - 精确去除文字
@@ -345,13 +377,18 @@ class HybridInpaintProvider(InpaintProvider):
             if enhance_quality and self._generative_provider:
                 logger.info("HybridInpaintProvider Step 2: 生成式画质提升...")
                 
-                # 使用专门的画质提升prompt，传入被修复的区域信息
-                enhanced_image = self._enhance_image_quality(
-                    repaired_image,
-                    inpainted_bboxes=bboxes,  # 传入被修复的区域
-                    aspect_ratio=kwargs.get('aspect_ratio'),
-                    resolution=kwargs.get('resolution')
-                )
+                enhanced_image = None
+                tiles = self._plan_tiles(repaired_image.size, bboxes) if enhance_mode == 'regions' else None
+                if tiles:
+                    enhanced_image = self._enhance_regions(repaired_image, bboxes, tiles)
+                else:
+                    # 使用专门的画质提升prompt，传入被修复的区域信息
+                    enhanced_image = self._enhance_image_quality(
+                        repaired_image,
+                        inpainted_bboxes=bboxes,  # 传入被修复的区域
+                        aspect_ratio=kwargs.get('aspect_ratio'),
+                        resolution=kwargs.get('resolution')
+                    )
                 
                 if enhanced_image:
                     logger.info("HybridInpaintProvider: 画质提升完成")
@@ -386,6 +423,7 @@ class HybridInpaintProvider(InpaintProvider):
         Returns:
             提升画质后的图像
         """
+        tmp_path = None
         try:
             # 保存临时图片
             with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
@@ -451,6 +489,354 @@ class HybridInpaintProvider(InpaintProvider):
         except Exception as e:
             logger.error(f"画质提升失败: {e}", exc_info=True)
             return None
+        
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def _plan_tiles(self, image_size: tuple, bboxes: List[tuple]) -> Optional[List[tuple]]:
+        """
+        把被修复区域规划为若干图块
+        
+        相距较近的区域合并到同一图块，每个图块加上上下文边距并扩展到最接近的支持宽高比。
+        
+        Returns:
+            [(x0, y0, x1, y1, aspect_ratio), ...]；不适合按区域处理时返回 None（回退到整图）
+        """
+        from utils.mask_utils import merge_overlapping_bboxes
+        
+        if not bboxes:
+            return None
+        
+        width, height = image_size
+        padding = self._tile_padding
+        cores = merge_overlapping_bboxes(list(bboxes), merge_threshold=padding * 2)
+        if len(cores) > self._max_tiles:
+            logger.info(f"HybridInpaintProvider: {len(cores)} 个图块超过上限 {self._max_tiles}，使用整图提升")
+            return None
+        
+        tiles = []
+        total_area = 0
+        for x0, y0, x1, y1 in cores:
+            box = (max(0, int(x0) - padding), max(0, int(y0) - padding),
+                   min(width, int(x1) + padding), min(height, int(y1) + padding))
+            tile = self._fit_aspect_ratio(box, width, height)
+            tiles.append(tile)
+            total_area += (tile[2] - tile[0]) * (tile[3] - tile[1])
+        
+        if total_area > width * height * self._max_tile_area_ratio:
+            logger.info(f"HybridInpaintProvider: 图块总面积占比 {total_area / (width * height):.0%}，使用整图提升")
+            return None
+        return tiles
+    
+    def _fit_aspect_ratio(self, box: tuple, width: int, height: int) -> tuple:
+        """把图块扩展到最接近的支持宽高比（只扩展短边，超出图片时平移回图片内）"""
+        x0, y0, x1, y1 = box
+        box_w, box_h = x1 - x0, y1 - y0
+        ratio_name, ratio = min(
+            self.TILE_ASPECT_RATIOS.items(),
+            key=lambda item: abs(item[1] - box_w / box_h)
+        )
+        
+        if box_w / box_h < ratio:
+            target_w, target_h = min(width, round(box_h * ratio)), box_h
+        else:
+            target_w, target_h = box_w, min(height, round(box_w / ratio))
+        
+        def place(start, size, target, limit):
+            start = start - (target - size) // 2
+            return max(0, min(start, limit - target))
+        
+        new_x0 = place(x0, box_w, target_w, width)
+        new_y0 = place(y0, box_h, target_h, height)
+        return (new_x0, new_y0, new_x0 + target_w, new_y0 + target_h, ratio_name)
+    
+    def _enhance_regions(
+        self,
+        image: Image.Image,
+        inpainted_bboxes: List[tuple],
+        tiles: List[tuple]
+    ) -> Optional[Image.Image]:
+        """
+        并行提升各图块画质并羽化贴回
+        
+        单个图块失败时保留该区域的百度修复结果；全部失败时返回 None。
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from PIL import ImageDraw, ImageFilter
+        
+        logger.info(f"HybridInpaintProvider: 按区域提升画质，{len(tiles)} 个图块")
+        
+        with ThreadPoolExecutor(max_workers=min(self._tile_workers, len(tiles))) as executor:
+            results = list(executor.map(
+                lambda tile: self._enhance_tile(image, inpainted_bboxes, tile), tiles
+            ))
+        
+        result = image.copy()
+        enhanced_count = 0
+        for tile, enhanced in zip(tiles, results):
+            if enhanced is None:
+                continue
+            x0, y0, x1, y1, _ = tile
+            
+            # 只贴回被修复区域（外扩羽化宽度），图块边缘保留原图，避免接缝
+            mask = Image.new('L', enhanced.size, 0)
+            draw = ImageDraw.Draw(mask)
+            feather = self._feather_pixels
+            for bx0, by0, bx1, by1 in inpainted_bboxes:
+                if bx1 <= x0 or bx0 >= x1 or by1 <= y0 or by0 >= y1:
+                    continue
+                draw.rectangle(
+                    (bx0 - x0 - feather, by0 - y0 - feather, bx1 - x0 + feather, by1 - y0 + feather),
+                    fill=255
+                )
+            if feather > 0:
+                mask = mask.filter(ImageFilter.GaussianBlur(feather / 2))
+            result.paste(enhanced, (x0, y0), mask)
+            enhanced_count += 1
+        
+        logger.info(f"HybridInpaintProvider: {enhanced_count}/{len(tiles)} 个图块提升完成")
+        return result if enhanced_count else None
+    
+    def _enhance_tile(self, image: Image.Image, inpainted_bboxes: List[tuple], tile: tuple) -> Optional[Image.Image]:
+        """提升单个图块画质，返回与图块同尺寸的图片"""
+        x0, y0, x1, y1, aspect_ratio = tile
+        tile_w, tile_h = x1 - x0, y1 - y0
+        
+        # 图块坐标系下的被修复区域
+        local_bboxes = []
+        for bx0, by0, bx1, by1 in inpainted_bboxes:
+            if bx1 <= x0 or bx0 >= x1 or by1 <= y0 or by0 >= y1:
+                continue
+            local_bboxes.append((max(bx0, x0) - x0, max(by0, y0) - y0, min(bx1, x1) - x0, min(by1, y1) - y0))
+        
+        resolution = '1K' if max(tile_w, tile_h) <= 1024 else '2K'
+        tile_image = image.crop((x0, y0, x1, y1))
+        enhanced = self._enhance_image_quality(
+            tile_image,
+            inpainted_bboxes=local_bboxes,
+            aspect_ratio=aspect_ratio,
+            resolution=resolution
+        )
+        if enhanced is None:
+            return None
+        enhanced = enhanced.convert(image.mode)
+        if enhanced.size != (tile_w, tile_h):
+            enhanced = enhanced.resize((tile_w, tile_h), Image.LANCZOS)
+        return enhanced
+
+
+class LocalInpaintProvider(InpaintProvider):
+    """
+    本地CPU Inpaint提供者 - 纯色/渐变背景的快速路径
+    
+    AI生成的幻灯片中，文字下方的背景大多是纯色或平滑渐变，无需调用远程服务。
+    对每个区域采样其外圈一圈背景像素，依次尝试：
+    1. 纯色填充：外圈颜色方差很小时用中位色填充
+    2. 渐变插值：对外圈像素拟合线性平面 (a*x + b*y + c)，残差很小时按平面填充
+    3. OpenCV Telea 修复：外圈有轻微纹理且区域不大时使用（需要可选依赖 opencv）
+    
+    每种方法给出一个置信度（0-1），达不到 min_confidence 的区域交给 fallback_provider
+    （百度/生成式/混合），已在本地处理的区域不会再发送到远程。
+    
+    优点：常见场景下省去每页数秒的网络延迟和API费用
+    缺点：无法还原复杂纹理、照片背景，这类区域仍依赖远程服务
+    """
+    
+    # 置信度 = 1 - 残差 / 容差（残差为0-255空间下的RMS）
+    FLAT_TOLERANCE = 24.0
+    GRADIENT_TOLERANCE = 24.0
+    TEXTURE_TOLERANCE = 48.0
+    
+    def __init__(
+        self,
+        fallback_provider: Optional[InpaintProvider] = None,
+        min_confidence: float = 0.8,
+        ring_width: int = 6,
+        max_telea_area: int = 160000
+    ):
+        """
+        初始化本地Inpaint提供者
+        
+        Args:
+            fallback_provider: 本地无法处理的区域交给该提供者（None 表示尽力在本地处理）
+            min_confidence: 接受本地结果的最低置信度
+            ring_width: 采样背景的外圈宽度（像素）
+            max_telea_area: 允许使用 Telea 修复的最大区域面积（像素）
+        """
+        self._fallback_provider = fallback_provider
+        self._min_confidence = min_confidence
+        self._ring_width = ring_width
+        self._max_telea_area = max_telea_area
+    
+    def inpaint_regions(
+        self,
+        image: Image.Image,
+        bboxes: List[tuple],
+        types: Optional[List[str]] = None,
+        **kwargs
+    ) -> Optional[Image.Image]:
+        """
+        在本地填充能处理的区域，其余区域交给 fallback_provider
+        
+        支持的kwargs参数：
+        - expand_pixels: int, 扩展像素数，默认10
+        - save_mask_path: str, mask保存路径，可选
+        - local_only: bool, 为True时只要有区域无法在本地处理就返回None（用作跳过重绘的预检查）
+        - 其余参数原样传给 fallback_provider
+        """
+        import numpy as np
+        
+        expand_pixels = kwargs.get('expand_pixels', 10)
+        save_mask_path = kwargs.get('save_mask_path')
+        local_only = kwargs.pop('local_only', False)
+        
+        try:
+            work = np.asarray(image.convert('RGB'), dtype=np.float32).copy()
+            height, width = work.shape[:2]
+            regions = [self._clip_box(bbox, expand_pixels, width, height) for bbox in bboxes]
+            
+            # 所有待移除区域的并集，采样背景时要排除（相邻文字不能当作背景）
+            covered = np.zeros((height, width), dtype=bool)
+            for box in regions:
+                if box:
+                    x0, y0, x1, y1 = box
+                    covered[y0:y1, x0:x1] = True
+            
+            escalated = []
+            methods: Dict[str, int] = {}
+            for index, box in enumerate(regions):
+                if box is None:
+                    continue
+                method, confidence, fill = self._fill_region(work, covered, box)
+                if fill is not None and confidence >= self._min_confidence:
+                    x0, y0, x1, y1 = box
+                    work[y0:y1, x0:x1] = fill
+                    methods[method] = methods.get(method, 0) + 1
+                else:
+                    escalated.append(index)
+            
+            if save_mask_path and (not escalated or not local_only):
+                create_mask_from_bboxes(image.size, bboxes, expand_pixels=expand_pixels).save(save_mask_path)
+            
+            result = Image.fromarray(np.clip(work + 0.5, 0, 255).astype(np.uint8), 'RGB')
+            logger.info(f"LocalInpaintProvider: 本地处理 {sum(methods.values())}/{len(bboxes)} 个区域 {methods}, "
+                        f"{len(escalated)} 个区域需要远程处理")
+            
+            if not escalated:
+                return result
+            if local_only:
+                return None
+            
+            escalated_bboxes = [bboxes[i] for i in escalated]
+            escalated_types = [types[i] for i in escalated] if types else None
+            if self._fallback_provider is not None:
+                fallback_kwargs = {k: v for k, v in kwargs.items() if k != 'save_mask_path'}
+                remote_result = self._fallback_provider.inpaint_regions(
+                    image=result,
+                    bboxes=escalated_bboxes,
+                    types=escalated_types,
+                    **fallback_kwargs
+                )
+                if remote_result is not None:
+                    return remote_result
+                logger.warning("LocalInpaintProvider: 远程修复失败，使用本地尽力结果")
+            
+            # 没有可用的远程提供者：用置信度最高的本地方法尽力填充
+            for index in escalated:
+                box = regions[index]
+                _, _, fill = self._fill_region(work, covered, box, best_effort=True)
+                if fill is not None:
+                    x0, y0, x1, y1 = box
+                    work[y0:y1, x0:x1] = fill
+            return Image.fromarray(np.clip(work + 0.5, 0, 255).astype(np.uint8), 'RGB')
+        
+        except Exception as e:
+            logger.error(f"LocalInpaintProvider处理失败: {e}", exc_info=True)
+            if self._fallback_provider is not None:
+                return self._fallback_provider.inpaint_regions(image=image, bboxes=bboxes, types=types, **kwargs)
+            return None
+    
+    @staticmethod
+    def _clip_box(bbox, expand_pixels: int, width: int, height: int) -> Optional[tuple]:
+        x0, y0, x1, y1 = bbox
+        x0 = max(0, int(x0) - expand_pixels)
+        y0 = max(0, int(y0) - expand_pixels)
+        x1 = min(width, int(round(x1)) + expand_pixels)
+        y1 = min(height, int(round(y1)) + expand_pixels)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1, y1)
+    
+    def _fill_region(self, work, covered, box: tuple, best_effort: bool = False):
+        """
+        为单个区域计算填充内容
+        
+        Returns:
+            (方法名, 置信度, 填充数组)；无法处理时填充数组为 None
+        """
+        import numpy as np
+        
+        height, width = work.shape[:2]
+        x0, y0, x1, y1 = box
+        ring = self._ring_width
+        rx0, ry0 = max(0, x0 - ring), max(0, y0 - ring)
+        rx1, ry1 = min(width, x1 + ring), min(height, y1 + ring)
+        
+        ring_mask = ~covered[ry0:ry1, rx0:rx1]
+        ys, xs = np.nonzero(ring_mask)
+        if len(xs) < 16:
+            return 'none', 0.0, None
+        samples = work[ry0:ry1, rx0:rx1][ys, xs]
+        xs = xs.astype(np.float32) + rx0
+        ys = ys.astype(np.float32) + ry0
+        
+        # 1. 纯色
+        flat_residual = float(np.sqrt(samples.var(axis=0).mean()))
+        flat_confidence = max(0.0, 1.0 - flat_residual / self.FLAT_TOLERANCE)
+        if flat_confidence >= self._min_confidence:
+            color = np.median(samples, axis=0)
+            return 'flat', flat_confidence, np.broadcast_to(color, (y1 - y0, x1 - x0, 3))
+        
+        # 2. 线性渐变：最小二乘拟合每个通道的平面
+        design = np.stack([xs, ys, np.ones_like(xs)], axis=1)
+        coeffs, _, _, _ = np.linalg.lstsq(design, samples, rcond=None)
+        gradient_residual = float(np.sqrt(((design @ coeffs - samples) ** 2).mean()))
+        gradient_confidence = max(0.0, 1.0 - gradient_residual / self.GRADIENT_TOLERANCE)
+        
+        def gradient_fill():
+            grid_y, grid_x = np.mgrid[y0:y1, x0:x1].astype(np.float32)
+            return (grid_x[..., None] * coeffs[0] + grid_y[..., None] * coeffs[1] + coeffs[2])
+        
+        if gradient_confidence >= self._min_confidence:
+            return 'gradient', gradient_confidence, gradient_fill()
+        
+        # 3. 轻微纹理：OpenCV Telea（只在区域附近裁剪处理）
+        texture_confidence = max(0.0, 1.0 - gradient_residual / self.TEXTURE_TOLERANCE)
+        area = (x1 - x0) * (y1 - y0)
+        if (texture_confidence >= self._min_confidence or best_effort) and area <= self._max_telea_area:
+            fill = self._telea_fill(work, covered, box, (rx0, ry0, rx1, ry1))
+            if fill is not None:
+                return 'telea', texture_confidence, fill
+        
+        if best_effort:
+            return 'gradient', gradient_confidence, gradient_fill()
+        return 'none', max(flat_confidence, gradient_confidence), None
+    
+    @staticmethod
+    def _telea_fill(work, covered, box: tuple, ring_box: tuple):
+        try:
+            import cv2
+        except ImportError:
+            return None
+        import numpy as np
+        
+        x0, y0, x1, y1 = box
+        rx0, ry0, rx1, ry1 = ring_box
+        patch = np.clip(work[ry0:ry1, rx0:rx1] + 0.5, 0, 255).astype(np.uint8)
+        mask = covered[ry0:ry1, rx0:rx1].astype(np.uint8) * 255
+        repaired = cv2.inpaint(patch, mask, 3, cv2.INPAINT_TELEA)
+        return repaired[y0 - ry0:y1 - ry0, x0 - rx0:x1 - rx0].astype(np.float32)
 
 
 class InpaintProviderRegistry:
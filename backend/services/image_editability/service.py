@@ -8,14 +8,16 @@
 4. 零具体实现依赖 - 完全依赖抽象接口
 """
 import logging
+import os
 import uuid
 from typing import List, Optional, Tuple
 from PIL import Image
 
+from .budget import RecursionBudget
 from .data_models import BBox, EditableElement, EditableImage
 from .coordinate_mapper import CoordinateMapper
 from .extractors import ElementExtractor, ExtractionResult
-from .inpaint_providers import InpaintProvider
+from .inpaint_providers import InpaintProvider, LocalInpaintProvider
 from .factories import ServiceConfig
 from .helpers import collect_bboxes_from_elements, should_recurse_into_element, crop_element_from_image
 
@@ -59,6 +61,11 @@ class ImageEditabilityService:
         self._min_image_size = config.min_image_size
         self._min_image_area = config.min_image_area
         self._max_child_coverage_ratio = 0.85
+        # 重绘前的预检查：所有区域都是纯色/渐变背景时直接本地填充，跳过远程重绘（LOCAL_INPAINT_ENABLED 关闭时不做）
+        self._simple_fill_provider = (
+            LocalInpaintProvider(min_confidence=config.local_inpaint_min_confidence)
+            if config.local_inpaint else None
+        )
         
         extractors = self._extractor_registry.get_all_extractors()
         inpaint_providers = self._inpaint_registry.get_all_providers()
@@ -76,7 +83,9 @@ class ImageEditabilityService:
         parent_bbox: Optional[BBox] = None,
         root_image_size: Optional[Tuple[int, int]] = None,
         element_type: Optional[str] = None,
-        root_image_path: Optional[str] = None
+        root_image_path: Optional[str] = None,
+        root_image: Optional[Image.Image] = None,
+        budget: Optional[RecursionBudget] = None
     ) -> EditableImage:
         """
         将图片转换为可编辑结构（递归）
@@ -91,6 +100,8 @@ class ImageEditabilityService:
             root_image_size: 根图片尺寸（内部使用）
             element_type: 元素类型，用于选择提取器（内部使用）
             root_image_path: 根图片路径（内部使用）
+            root_image: 已加载的根图片，子元素之间共享，避免重复解码（内部使用）
+            budget: 递归预算（同一次导出的所有页面共享），用尽后不再递归拆分子元素
         
         Returns:
             EditableImage对象
@@ -137,18 +148,27 @@ class ImageEditabilityService:
         
         logger.info(f"{'  ' * depth}提取到 {len(elements)} 个元素")
         
+        if budget is not None and depth > 0:
+            elements = self._clip_elements_to_budget(elements, budget, depth)
+        
         # 3. 生成clean background（根据元素类型选择重绘方法）
         clean_background = None
-        if self._inpaint_registry and elements:
+        will_inpaint = bool(self._inpaint_registry and elements)
+        if budget is not None and depth == 0:
+            # 页面本身总是完整处理，子元素的用量在递归前预留
+            budget.charge_page(len(elements), inpaint=will_inpaint)
+        if will_inpaint:
             clean_background = self._generate_clean_background(
                 image_path=image_path,
+                image=img,
                 elements=elements,
                 image_id=image_id,
                 depth=depth,
                 parent_bbox=parent_bbox,
                 root_image_path=root_image_path,
                 image_size=(width, height),
-                element_type=element_type  # 传递元素类型以选择对应的重绘方法
+                element_type=element_type,  # 传递元素类型以选择对应的重绘方法
+                root_image=root_image
             )
         
         # 4. 递归处理子元素
@@ -161,7 +181,9 @@ class ImageEditabilityService:
                 image_id=image_id,
                 root_image_size=root_image_size,
                 current_image_size=(width, height),
-                root_image_path=root_image_path
+                root_image_path=root_image_path,
+                root_image=root_image,
+                budget=budget
             )
         
         # 5. 构建结果
@@ -300,7 +322,9 @@ class ImageEditabilityService:
         parent_bbox: Optional[BBox],
         root_image_path: str,
         image_size: Tuple[int, int],
-        element_type: Optional[str] = None
+        element_type: Optional[str] = None,
+        image: Optional[Image.Image] = None,
+        root_image: Optional[Image.Image] = None
     ) -> Optional[str]:
         """
         生成clean background
@@ -308,6 +332,8 @@ class ImageEditabilityService:
         根据元素类型从注册表选择对应的重绘方法：
         - 如果指定了element_type，使用该类型对应的重绘方法
         - 否则使用默认的重绘方法
+        
+        调用重绘方法前先做预检查：所有区域周围都是纯色/平滑渐变时直接本地填充，不调用重绘服务。
         """
         logger.info(f"{'  ' * depth}生成clean background (element_type={element_type})...")
         
@@ -319,7 +345,7 @@ class ImageEditabilityService:
         
         try:
             bboxes = collect_bboxes_from_elements(elements)
-            img = Image.open(image_path)
+            img = image if image is not None else Image.open(image_path)
             img_width, img_height = img.size
             element_types = [elem.element_type for elem in elements]
             
@@ -336,10 +362,10 @@ class ImageEditabilityService:
             else:
                 crop_box = None
             
-            # 加载完整页面图像
+            # 加载完整页面图像（子元素复用父级已加载的根图片）
             full_page_img = None
             if root_image_path != image_path:
-                full_page_img = Image.open(root_image_path)
+                full_page_img = root_image if root_image is not None else Image.open(root_image_path)
             
             # 过滤覆盖过大的bbox
             filtered_bboxes = []
@@ -360,17 +386,32 @@ class ImageEditabilityService:
             output_dir = self._upload_folder / 'editable_images' / image_id
             output_dir.mkdir(parents=True, exist_ok=True)
             
-            # 调用注册表中选择的重绘方法
-            logger.info(f"{'  ' * depth}使用 {inpaint_provider.__class__.__name__} 进行重绘")
-            result_img = inpaint_provider.inpaint_regions(
-                image=img,
-                bboxes=filtered_bboxes,
-                types=filtered_types,
-                expand_pixels=10,
-                save_mask_path=str(output_dir / 'mask.png'),
-                full_page_image=full_page_img,
-                crop_box=crop_box
-            )
+            # 预检查：背景足够简单时跳过重绘（本地提供者自身已包含这一步）
+            result_img = None
+            if self._simple_fill_provider is not None and not isinstance(inpaint_provider, LocalInpaintProvider):
+                result_img = self._simple_fill_provider.inpaint_regions(
+                    image=img,
+                    bboxes=filtered_bboxes,
+                    types=filtered_types,
+                    expand_pixels=10,
+                    save_mask_path=str(output_dir / 'mask.png'),
+                    local_only=True
+                )
+                if result_img is not None:
+                    logger.info(f"{'  ' * depth}背景为纯色/渐变，跳过 {inpaint_provider.__class__.__name__} 重绘")
+            
+            if result_img is None:
+                # 调用注册表中选择的重绘方法
+                logger.info(f"{'  ' * depth}使用 {inpaint_provider.__class__.__name__} 进行重绘")
+                result_img = inpaint_provider.inpaint_regions(
+                    image=img,
+                    bboxes=filtered_bboxes,
+                    types=filtered_types,
+                    expand_pixels=10,
+                    save_mask_path=str(output_dir / 'mask.png'),
+                    full_page_image=full_page_img,
+                    crop_box=crop_box
+                )
             
             if result_img is None:
                 return None
@@ -384,6 +425,27 @@ class ImageEditabilityService:
             logger.error(f"生成clean background失败: {e}", exc_info=True)
             return None
     
+    def _clip_elements_to_budget(
+        self,
+        elements: List[EditableElement],
+        budget: RecursionBudget,
+        depth: int
+    ) -> List[EditableElement]:
+        """
+        按元素预算截断子图提取结果（在重绘前进行，已完成的提取结果不会被丢弃）
+        
+        超出额度时保留面积最大的元素，其余元素不参与重绘，留在子图背景中
+        """
+        granted = budget.take_elements(len(elements))
+        if granted == len(elements):
+            return elements
+        
+        kept = set(sorted(range(len(elements)), key=lambda i: elements[i].bbox.area, reverse=True)[:granted])
+        for idx, element in enumerate(elements):
+            if idx not in kept:
+                budget.record_skip(element.element_id, element.element_type, depth, 'elements')
+        return [element for idx, element in enumerate(elements) if idx in kept]
+    
     def _process_children(
         self,
         elements: List[EditableElement],
@@ -392,9 +454,15 @@ class ImageEditabilityService:
         image_id: str,
         root_image_size: Tuple[int, int],
         current_image_size: Tuple[int, int],
-        root_image_path: str
+        root_image_path: str,
+        root_image: Optional[Image.Image] = None,
+        budget: Optional[RecursionBudget] = None
     ):
-        """递归处理子元素（通过裁剪原图获取子图，并行处理多个子元素）"""
+        """
+        递归处理子元素（通过裁剪原图获取子图，并行处理多个子元素）
+        
+        有预算时按面积从大到小处理，预算用尽后剩余元素保持为普通图片
+        """
         logger.info(f"{'  ' * depth}递归处理子元素...")
         
         # 筛选需要递归的元素
@@ -412,16 +480,42 @@ class ImageEditabilityService:
         if not elements_to_process:
             return
         
+        if budget is not None:
+            # 按面积从大到小依次预留预算，预留不到的元素保持为普通图片
+            elements_to_process.sort(key=lambda e: e.bbox.area, reverse=True)
+            reserved = []
+            for element in elements_to_process:
+                reason = budget.try_reserve_child()
+                if reason:
+                    budget.record_skip(element.element_id, element.element_type, depth + 1, reason)
+                else:
+                    reserved.append(element)
+            elements_to_process = reserved
+            if not elements_to_process:
+                return
+        
+        # 根图片只解码一次，所有子元素的重绘共享（只读使用，线程安全）
+        if root_image is None:
+            root_image = Image.open(root_image_path)
+            root_image.load()
+        
         # 并行处理多个子元素
         from concurrent.futures import ThreadPoolExecutor, as_completed
         
+        crop_dir = str(self._upload_folder / 'editable_images' / image_id / 'crops')
+        
         def process_single_element(element):
             """处理单个子元素"""
+            child_image_path = None
+            if budget is not None and budget.expired:
+                # 排队期间超时，不再开始新的递归
+                return element, None, None, 'time'
             try:
-                # 从当前图片裁剪出子区域
+                # 从当前图片裁剪出子区域（子图只在递归分析期间使用）
                 child_image_path = crop_element_from_image(
                     source_image_path=current_image_path,
-                    bbox=element.bbox
+                    bbox=element.bbox,
+                    output_dir=crop_dir
                 )
                 
                 child_editable = self.make_image_editable(
@@ -431,13 +525,22 @@ class ImageEditabilityService:
                     parent_bbox=element.bbox_global,
                     root_image_size=root_image_size,
                     element_type=element.element_type,
-                    root_image_path=root_image_path
+                    root_image_path=root_image_path,
+                    root_image=root_image,
+                    budget=budget
                 )
                 
-                return element, child_editable, None
+                return element, child_editable, None, None
             
             except Exception as e:
-                return element, None, e
+                return element, None, e, None
+            
+            finally:
+                if child_image_path:
+                    try:
+                        os.remove(child_image_path)
+                    except OSError:
+                        pass
         
         logger.info(f"{'  ' * depth}  并行处理 {len(elements_to_process)} 个子元素...")
         
@@ -447,10 +550,12 @@ class ImageEditabilityService:
             futures = {executor.submit(process_single_element, elem): elem for elem in elements_to_process}
             
             for future in as_completed(futures):
-                element, child_editable, error = future.result()
+                element, child_editable, error, skip_reason = future.result()
                 
                 if error:
                     logger.error(f"{'  ' * depth}  ✗ {element.element_id} 失败: {error}")
+                elif skip_reason:
+                    budget.record_skip(element.element_id, element.element_type, depth + 1, skip_reason)
                 else:
                     element.children = child_editable.elements
                     element.inpainted_background_path = child_editable.clean_background
@@ -17,6 +17,17 @@ from services.prompts import get_text_attribute_extraction_prompt
 logger = logging.getLogger(__name__)
 
 
+def _existing_image_path(image: Union[str, Image.Image]) -> Optional[str]:
+    """返回图片对应的已有文件路径（路径本身，或直接从文件打开的PIL图片的filename），否则None"""
+    if isinstance(image, str):
+        return image
+    import os
+    filename = getattr(image, 'filename', None)
+    if filename and os.path.isfile(filename):
+        return filename
+    return None
+
+
 @dataclass
 class ColoredSegment:
     """
@@ -263,12 +274,6 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
         thinking_budget = kwargs.get('thinking_budget', 500)
         
         try:
-            # 准备图片
-            if isinstance(image, str):
-                pil_image = Image.open(image)
-            else:
-                pil_image = image
-            
             # 构建prompt
             # 统一使用 content_hint 格式
             if text_content:
@@ -284,7 +289,7 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
             
             # 调用AI服务（需要支持图片输入的generate_json）
             # 这里假设text_provider支持带图片的generate方法
-            result_json = self._call_vision_model(pil_image, prompt, thinking_budget)
+            result_json = self._call_vision_model(image, prompt, thinking_budget)
             
             # 解析结果
             return self._parse_result(result_json)
@@ -293,12 +298,12 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
             logger.error(f"CaptionModelTextAttributeExtractor提取失败: {e}", exc_info=True)
             return TextStyleResult(confidence=0.0, metadata={'error': str(e)})
     
-    def _call_vision_model(self, image: Image.Image, prompt: str, thinking_budget: int) -> Dict[str, Any]:
+    def _call_vision_model(self, image: Union[str, Image.Image], prompt: str, thinking_budget: int) -> Dict[str, Any]:
         """
         调用视觉语言模型，使用 ai_service.generate_json_with_image（带重试机制）
         
         Args:
-            image: PIL Image对象
+            image: 图片路径或PIL Image对象
             prompt: 提示词
             thinking_budget: 思考预算
         
@@ -308,10 +313,13 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
         import tempfile
         import os
         
-        # 保存临时图片文件
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-            image.save(tmp_path)
+        # 已有文件的图片直接使用原路径（Provider侧会复用编码缓存），仅内存图片才写临时文件
+        tmp_path = _existing_image_path(image)
+        need_cleanup = tmp_path is None
+        if need_cleanup:
+            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
+                tmp_path = tmp_file.name
+                image.save(tmp_path)
         
         try:
             # 使用 ai_service.generate_json_with_image（带重试机制）
@@ -333,7 +341,7 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
             return {}
         
         finally:
-            if os.path.exists(tmp_path):
+            if need_cleanup and os.path.exists(tmp_path):
                 os.remove(tmp_path)
     
     @staticmethod
@@ -459,18 +467,13 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
             return {}
         
         try:
-            # 准备图片
-            if isinstance(full_image, str):
-                pil_image = Image.open(full_image)
-                tmp_path = full_image  # 如果已经是路径，直接使用
-                need_cleanup = False
-            else:
-                pil_image = full_image
-                # 保存临时图片文件
+            # 准备图片：已有文件直接使用原路径，内存图片保存为临时文件
+            tmp_path = _existing_image_path(full_image)
+            need_cleanup = tmp_path is None
+            if need_cleanup:
                 with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
                     tmp_path = tmp_file.name
-                    pil_image.save(tmp_path)
-                need_cleanup = True
+                    full_image.save(tmp_path)
             
             # 构建文本元素的 JSON 描述
             elements_for_prompt = []
@@ -0,0 +1,94 @@
+"""
+上传文件存储后端
+
+通过 STORAGE_BACKEND 选择：
+- local: 直接使用本地上传目录（默认）
+- local_object: 把另一个本地目录当作对象存储的替身，用于开发/测试多节点路径
+- s3: S3 兼容对象存储（需要可选依赖 boto3）
+"""
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from config import Config
+
+from .base import StorageBackend
+from .local import LocalStorageBackend
+from .object_store import ObjectStorageBackend, LocalObjectStoreBackend
+
+logger = logging.getLogger(__name__)
+
+_instances: Dict[Tuple[str, str], StorageBackend] = {}
+_instances_lock = threading.Lock()
+
+
+def _get_config(key: str):
+    """优先读取当前 Flask 应用配置，应用上下文之外回退到 Config"""
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context() and key in current_app.config:
+            return current_app.config[key]
+    except ImportError:
+        pass
+    return getattr(Config, key)
+
+
+def create_storage(backend: str, upload_folder: str) -> StorageBackend:
+    """按名称创建存储后端实例"""
+    backend = (backend or 'local').lower()
+    presign_expires = _get_config('STORAGE_PRESIGN_EXPIRES')
+
+    if backend == 'local':
+        return LocalStorageBackend(upload_folder)
+    if backend == 'local_object':
+        return LocalObjectStoreBackend(
+            upload_folder,
+            object_root=_get_config('STORAGE_LOCAL_OBJECT_ROOT'),
+            secret_key=_get_config('SECRET_KEY'),
+            presign_expires=presign_expires,
+        )
+    if backend == 's3':
+        from .s3 import S3StorageBackend
+        return S3StorageBackend(
+            upload_folder,
+            bucket=_get_config('S3_BUCKET'),
+            endpoint_url=_get_config('S3_ENDPOINT_URL'),
+            access_key=_get_config('S3_ACCESS_KEY'),
+            secret_key=_get_config('S3_SECRET_KEY'),
+            region=_get_config('S3_REGION'),
+            prefix=_get_config('S3_PREFIX'),
+            presign_expires=presign_expires,
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}. Supported: local, local_object, s3")
+
+
+def get_storage(upload_folder: Optional[str] = None) -> StorageBackend:
+    """
+    获取存储后端（按 后端类型 + 上传目录 缓存，进程内共享）
+
+    Args:
+        upload_folder: 本地上传目录，默认读取 UPLOAD_FOLDER 配置
+    """
+    backend = _get_config('STORAGE_BACKEND')
+    upload_folder = upload_folder or _get_config('UPLOAD_FOLDER')
+    cache_key = (backend, upload_folder)
+
+    with _instances_lock:
+        storage = _instances.get(cache_key)
+        if storage is None:
+            storage = create_storage(backend, upload_folder)
+            _instances[cache_key] = storage
+            logger.info(f"Storage backend initialized: {storage.__class__.__name__} (cache: {upload_folder})")
+        return storage
+
+
+def reset_storage() -> None:
+    """清空存储后端实例缓存（用于测试或配置变更后）"""
+    with _instances_lock:
+        _instances.clear()
+
+
+__all__ = [
+    'StorageBackend', 'LocalStorageBackend', 'ObjectStorageBackend', 'LocalObjectStoreBackend',
+    'create_storage', 'get_storage', 'reset_storage',
+]
@@ -0,0 +1,138 @@
+"""
+存储后端抽象接口
+"""
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional
+
+
+class StorageBackend(ABC):
+    """
+    上传文件存储后端
+
+    key 为相对上传目录的 posix 路径，与数据库中保存的相对路径一致
+    （例如 "{project_id}/pages/{page_id}_v1.png"）。
+
+    所有后端都把本地上传目录（cache_root）作为工作目录：业务代码照常把文件写到本地，
+    写完后调用 commit(key) 持久化到后端；读取时调用 ensure_local(key) 拿到本地路径，
+    远程后端会在本地缺失时从对象存储拉取（读穿透缓存）。本地后端两者都是空操作。
+    """
+
+    # 是否为多节点共享的远程存储
+    is_remote = False
+
+    def __init__(self, cache_root: str):
+        self.cache_root = Path(cache_root)
+        self.cache_root.mkdir(exist_ok=True, parents=True)
+
+    @staticmethod
+    def normalize_key(key: str) -> str:
+        """规范化 key（统一分隔符、去掉开头的 /），拒绝越出上传目录的路径"""
+        key = key.replace('\\', '/').lstrip('/')
+        parts = [part for part in key.split('/') if part not in ('', '.')]
+        if any(part == '..' for part in parts):
+            raise ValueError(f"Invalid storage key: {key}")
+        return '/'.join(parts)
+
+    def local_path(self, key: str) -> Path:
+        """key 对应的本地缓存路径（不保证存在）"""
+        return self.cache_root / self.normalize_key(key)
+
+    def save_bytes(self, key: str, data: bytes) -> str:
+        """写入字节内容并持久化，返回规范化后的 key"""
+        key = self.normalize_key(key)
+        path = self.local_path(key)
+        path.parent.mkdir(exist_ok=True, parents=True)
+        _atomic_write(path, data)
+        self.commit(key)
+        return key
+
+    @abstractmethod
+    def commit(self, key: str) -> None:
+        """把已写入本地缓存的文件持久化到后端"""
+
+    def commit_tree(self, prefix: str) -> None:
+        """持久化本地目录 prefix 下的所有文件"""
+        root = self.local_path(prefix)
+        if not root.is_dir():
+            return
+        for path in root.rglob('*'):
+            if path.is_file():
+                self.commit(path.relative_to(self.cache_root).as_posix())
+
+    @abstractmethod
+    def ensure_local(self, key: str, validate: bool = False) -> Optional[Path]:
+        """
+        返回 key 的本地文件路径，文件不存在时返回 None
+
+        Args:
+            key: 存储 key
+            validate: 本地已有缓存时是否与后端比对（用于 template.png 这类会被覆盖的 key）
+        """
+
+    def ensure_local_tree(self, prefix: str) -> Optional[Path]:
+        """确保 prefix 下的所有文件都在本地缓存中，返回本地目录路径"""
+        for key in self.list_keys(prefix):
+            self.ensure_local(key)
+        root = self.local_path(prefix)
+        return root if root.exists() else None
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """文件是否存在"""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """删除文件（后端和本地缓存），返回是否删除了文件"""
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> None:
+        """删除 prefix 目录下的所有文件"""
+
+    @abstractmethod
+    def list_keys(self, prefix: str) -> List[str]:
+        """列出 prefix 目录下的所有文件 key"""
+
+    def get_download_url(self, key: str, expires_in: Optional[int] = None,
+                         filename: Optional[str] = None) -> Optional[str]:
+        """
+        生成可直接下载的预签名URL（客户端可被重定向过去，不经过应用进程）
+
+        Returns:
+            URL，后端不支持时返回 None
+        """
+        return None
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """先写临时文件再替换，避免并发读到半截文件"""
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_copy(src, dest: Path) -> None:
+    """把文件对象或路径原子地复制到 dest"""
+    dest.parent.mkdir(exist_ok=True, parents=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(dest.parent), prefix=f'.{dest.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if isinstance(src, (str, Path)):
+                with open(src, 'rb') as src_file:
+                    shutil.copyfileobj(src_file, f)
+            else:
+                shutil.copyfileobj(src, f)
+        os.replace(tmp_path, dest)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
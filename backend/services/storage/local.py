@@ -0,0 +1,48 @@
+"""
+本地文件系统存储后端（默认）
+"""
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+from .base import StorageBackend
+
+
+class LocalStorageBackend(StorageBackend):
+    """直接使用本地上传目录，单节点部署的默认后端"""
+
+    def commit(self, key: str) -> None:
+        # 文件已经在最终位置
+        pass
+
+    def ensure_local(self, key: str, validate: bool = False) -> Optional[Path]:
+        path = self.local_path(key)
+        return path if path.is_file() else None
+
+    def ensure_local_tree(self, prefix: str) -> Optional[Path]:
+        root = self.local_path(prefix)
+        return root if root.exists() else None
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key).is_file()
+
+    def delete(self, key: str) -> bool:
+        path = self.local_path(key)
+        if path.is_file():
+            path.unlink()
+            return True
+        return False
+
+    def delete_prefix(self, prefix: str) -> None:
+        root = self.local_path(prefix)
+        if root.is_dir():
+            shutil.rmtree(root)
+
+    def list_keys(self, prefix: str) -> List[str]:
+        root = self.local_path(prefix)
+        if not root.is_dir():
+            return []
+        return sorted(
+            path.relative_to(self.cache_root).as_posix()
+            for path in root.rglob('*') if path.is_file()
+        )
@@ -0,0 +1,227 @@
+"""
+对象存储后端基类，以及用于本地开发/测试的对象存储替身
+"""
+import logging
+import os
+import shutil
+import threading
+from abc import abstractmethod
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .base import StorageBackend, atomic_copy
+
+logger = logging.getLogger(__name__)
+
+
+class ObjectStorageBackend(StorageBackend):
+    """
+    远程对象存储后端基类
+
+    本地上传目录作为读穿透缓存：commit 把本地文件上传为对象，ensure_local 在本地缺失时下载对象。
+    子类只需实现 _put / _get / _stat / _delete / _list 这组对象级原语。
+    """
+
+    is_remote = True
+
+    def __init__(self, cache_root: str, presign_expires: int = 3600):
+        super().__init__(cache_root)
+        self.presign_expires = presign_expires
+        # 同一 key 的并发下载只执行一次
+        self._fetch_locks = {}
+        self._fetch_locks_guard = threading.Lock()
+
+    # ---- 对象级原语 ----
+
+    @abstractmethod
+    def _put(self, key: str, path: Path) -> None:
+        """上传本地文件为对象"""
+
+    @abstractmethod
+    def _get(self, key: str, fileobj) -> bool:
+        """下载对象写入 fileobj，对象不存在时返回 False"""
+
+    @abstractmethod
+    def _stat(self, key: str) -> Optional[Tuple[int, float]]:
+        """返回对象 (大小, 修改时间戳)，不存在时返回 None"""
+
+    @abstractmethod
+    def _delete(self, keys: List[str]) -> None:
+        """批量删除对象"""
+
+    @abstractmethod
+    def _list(self, prefix: str) -> List[str]:
+        """列出以 prefix 开头的所有对象 key"""
+
+    # ---- StorageBackend 接口 ----
+
+    def commit(self, key: str) -> None:
+        key = self.normalize_key(key)
+        path = self.local_path(key)
+        if not path.is_file():
+            raise FileNotFoundError(f"Cannot commit missing local file: {path}")
+        self._put(key, path)
+        logger.debug(f"Committed {key} to {self.__class__.__name__}")
+
+    def ensure_local(self, key: str, validate: bool = False) -> Optional[Path]:
+        key = self.normalize_key(key)
+        path = self.local_path(key)
+
+        if path.is_file():
+            if not validate:
+                return path
+            stat = self._stat(key)
+            if stat is None:
+                # 对象已被删除，本地缓存失效
+                path.unlink(missing_ok=True)
+                return None
+            local_stat = path.stat()
+            if stat[0] == local_stat.st_size and stat[1] <= local_stat.st_mtime:
+                return path
+
+        with self._fetch_lock(key):
+            # 等锁期间可能已被其他线程下载
+            if path.is_file() and not validate:
+                return path
+            return self._fetch(key, path)
+
+    def _fetch(self, key: str, path: Path) -> Optional[Path]:
+        path.parent.mkdir(exist_ok=True, parents=True)
+        tmp_path = path.with_name(f'.{path.name}.{threading.get_ident()}.download')
+        try:
+            with open(tmp_path, 'wb') as f:
+                found = self._get(key, f)
+            if not found:
+                return None
+            os.replace(tmp_path, path)
+            logger.debug(f"Fetched {key} into local cache")
+            return path
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _fetch_lock(self, key: str) -> threading.Lock:
+        with self._fetch_locks_guard:
+            lock = self._fetch_locks.get(key)
+            if lock is None:
+                if len(self._fetch_locks) > 1024:
+                    self._fetch_locks = {k: v for k, v in self._fetch_locks.items() if v.locked()}
+                lock = self._fetch_locks[key] = threading.Lock()
+            return lock
+
+    def exists(self, key: str) -> bool:
+        key = self.normalize_key(key)
+        return self.local_path(key).is_file() or self._stat(key) is not None
+
+    def delete(self, key: str) -> bool:
+        key = self.normalize_key(key)
+        existed = self._stat(key) is not None
+        if existed:
+            self._delete([key])
+        path = self.local_path(key)
+        if path.is_file():
+            path.unlink()
+            existed = True
+        return existed
+
+    def delete_prefix(self, prefix: str) -> None:
+        keys = self._list(self._dir_prefix(prefix))
+        for start in range(0, len(keys), 1000):
+            self._delete(keys[start:start + 1000])
+        root = self.local_path(prefix)
+        if root.is_dir():
+            shutil.rmtree(root)
+
+    def list_keys(self, prefix: str) -> List[str]:
+        return sorted(self._list(self._dir_prefix(prefix)))
+
+    def _dir_prefix(self, prefix: str) -> str:
+        prefix = self.normalize_key(prefix)
+        return f"{prefix}/" if prefix else ''
+
+
+class LocalObjectStoreBackend(ObjectStorageBackend):
+    """
+    对象存储替身：把另一个本地目录当作"桶"
+
+    行为与 S3 后端一致（上传、读穿透缓存、预签名下载），用于在没有对象存储的开发/测试环境中
+    验证多节点部署路径。预签名URL是 itsdangerous 签名的令牌，由 /files/_object/<token> 路由校验后返回文件。
+    """
+
+    SIGNING_SALT = 'storage-presigned-download'
+
+    def __init__(self, cache_root: str, object_root: str, secret_key: str, presign_expires: int = 3600):
+        super().__init__(cache_root, presign_expires)
+        self.object_root = Path(object_root)
+        self.object_root.mkdir(exist_ok=True, parents=True)
+        self.secret_key = secret_key
+
+    def _object_path(self, key: str) -> Path:
+        return self.object_root / key
+
+    def _put(self, key: str, path: Path) -> None:
+        atomic_copy(path, self._object_path(key))
+
+    def _get(self, key: str, fileobj) -> bool:
+        object_path = self._object_path(key)
+        if not object_path.is_file():
+            return False
+        with open(object_path, 'rb') as f:
+            shutil.copyfileobj(f, fileobj)
+        return True
+
+    def _stat(self, key: str) -> Optional[Tuple[int, float]]:
+        try:
+            stat = self._object_path(key).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def _delete(self, keys: List[str]) -> None:
+        for key in keys:
+            self._object_path(key).unlink(missing_ok=True)
+
+    def _list(self, prefix: str) -> List[str]:
+        root = self._object_path(prefix.rstrip('/')) if prefix else self.object_root
+        if not root.is_dir():
+            return []
+        return [
+            path.relative_to(self.object_root).as_posix()
+            for path in root.rglob('*') if path.is_file() and not path.name.endswith('.tmp')
+        ]
+
+    def _serializer(self):
+        from itsdangerous import URLSafeTimedSerializer
+        return URLSafeTimedSerializer(self.secret_key, salt=self.SIGNING_SALT)
+
+    def get_download_url(self, key: str, expires_in: Optional[int] = None,
+                         filename: Optional[str] = None) -> Optional[str]:
+        key = self.normalize_key(key)
+        token = self._serializer().dumps({
+            'k': key,
+            'f': filename,
+            'e': expires_in or self.presign_expires,
+        })
+        return f"/files/_object/{token}"
+
+    def resolve_download_token(self, token: str) -> Optional[Tuple[Path, Optional[str]]]:
+        """
+        校验预签名令牌
+
+        Returns:
+            (对象文件路径, 下载文件名)，令牌无效或过期时返回 None
+        """
+        from itsdangerous import BadSignature, SignatureExpired
+
+        serializer = self._serializer()
+        try:
+            # 先不校验时效取出令牌自带的有效期，再按该有效期校验
+            payload = serializer.loads(token)
+            serializer.loads(token, max_age=payload.get('e', self.presign_expires))
+        except (SignatureExpired, BadSignature):
+            return None
+
+        object_path = self._object_path(self.normalize_key(payload['k']))
+        if not object_path.is_file():
+            return None
+        return object_path, payload.get('f')
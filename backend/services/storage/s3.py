@@ -0,0 +1,105 @@
+"""
+S3 兼容对象存储后端（AWS S3 / MinIO / 阿里云 OSS / 腾讯云 COS 等）
+
+需要安装可选依赖：uv sync --extra s3（或 pip install boto3）
+"""
+import logging
+import mimetypes
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+from .object_store import ObjectStorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class S3StorageBackend(ObjectStorageBackend):
+    """S3 兼容对象存储，本地上传目录作为读穿透缓存"""
+
+    def __init__(self, cache_root: str, bucket: str, endpoint_url: Optional[str] = None,
+                 access_key: Optional[str] = None, secret_key: Optional[str] = None,
+                 region: Optional[str] = None, prefix: str = '', presign_expires: int = 3600):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise ImportError(
+                "STORAGE_BACKEND=s3 requires boto3. Install it with: uv sync --extra s3"
+            ) from e
+
+        if not bucket:
+            raise ValueError("S3_BUCKET is required when STORAGE_BACKEND=s3")
+
+        super().__init__(cache_root, presign_expires)
+        self.bucket = bucket
+        self.prefix = self.normalize_key(prefix) if prefix else ''
+        self._client_error = ClientError
+        # boto3 client 是线程安全的，可以在任务线程之间共享
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+            region_name=region or None,
+        )
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _storage_key(self, object_key: str) -> str:
+        return object_key[len(self.prefix) + 1:] if self.prefix else object_key
+
+    def _is_not_found(self, error) -> bool:
+        code = error.response.get('Error', {}).get('Code')
+        return code in ('404', 'NoSuchKey', 'NotFound')
+
+    def _put(self, key: str, path: Path) -> None:
+        content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        self.client.upload_file(
+            str(path), self.bucket, self._object_key(key),
+            ExtraArgs={'ContentType': content_type},
+        )
+
+    def _get(self, key: str, fileobj) -> bool:
+        try:
+            self.client.download_fileobj(self.bucket, self._object_key(key), fileobj)
+            return True
+        except self._client_error as e:
+            if self._is_not_found(e):
+                return False
+            raise
+
+    def _stat(self, key: str) -> Optional[Tuple[int, float]]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except self._client_error as e:
+            if self._is_not_found(e):
+                return None
+            raise
+        return head['ContentLength'], head['LastModified'].timestamp()
+
+    def _delete(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        self.client.delete_objects(
+            Bucket=self.bucket,
+            Delete={'Objects': [{'Key': self._object_key(key)} for key in keys], 'Quiet': True},
+        )
+
+    def _list(self, prefix: str) -> List[str]:
+        keys = []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._object_key(prefix)):
+            for item in page.get('Contents', []):
+                keys.append(self._storage_key(item['Key']))
+        return keys
+
+    def get_download_url(self, key: str, expires_in: Optional[int] = None,
+                         filename: Optional[str] = None) -> Optional[str]:
+        params = {'Bucket': self.bucket, 'Key': self._object_key(self.normalize_key(key))}
+        if filename:
+            params['ResponseContentDisposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+        return self.client.generate_presigned_url(
+            'get_object', Params=params, ExpiresIn=expires_in or self.presign_expires,
+        )
@@ -0,0 +1,554 @@
+"""
+Storage GC Service - 回收上传目录中不再需要的文件
+
+回收对象：
+- editable_images/<image_id>/：可编辑导出的中间产物（元素裁剪图、mask、干净背景、子图裁剪）
+- 上传目录根下的 tmp* 临时目录（编辑/素材生成时保存的参考图，任务异常退出时可能残留）
+- mineru_files/<extract_id>/：未被任何项目/页面/参考文件内容引用的 MinerU 解析结果
+- <project_id>/exports/：超过保留期的导出文件
+- <project_id>/pages/：超出保留版本数的历史图片版本，以及数据库中没有引用的页面图片
+- 数据库中已不存在的项目目录
+
+保留策略分三种，可同时启用：按时间（各类文件的 TTL）、按版本数（每页保留最近 N 个版本）、
+按总磁盘预算（超出后从最旧的可回收文件开始删除）。所有删除都经过存储后端，远程后端下对象也会一并删除。
+默认只回收中间产物和临时文件；导出文件、历史版本这类用户可见的内容需要显式配置保留策略才会清理。
+注意：孤儿文件的发现基于本地目录（远程后端下即本地缓存），桶内的残留对象需配合生命周期规则。
+"""
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+EDITABLE_IMAGES_DIR = 'editable_images'
+MINERU_FILES_DIR = 'mineru_files'
+
+_PROJECT_DIR_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+_TEMP_DIR_PATTERN = re.compile(r'^tmp[A-Za-z0-9_]{6,}$')
+# 内容中的 MinerU 引用：/files/mineru/<extract_id>/... 或 mineru_files/<extract_id>/...
+_MINERU_REF_PATTERN = re.compile(r'mineru(?:_files)?/([A-Za-z0-9_-]+)')
+
+GC_LOCK_FILE = '.storage_gc.lock'
+
+_gc_thread: Optional[threading.Thread] = None
+_gc_stop = threading.Event()
+
+
+@dataclass
+class GCCandidate:
+    """一个可回收的文件或目录"""
+    category: str
+    key: str  # 相对上传目录的存储key
+    size: int
+    mtime: float
+    is_dir: bool = False
+    version_id: Optional[str] = None  # 历史图片版本对应的 PageImageVersion ID
+
+
+@dataclass
+class GCReport:
+    """一次回收的统计结果"""
+    dry_run: bool = False
+    total_bytes_before: int = 0
+    reclaimed_bytes: Dict[str, int] = field(default_factory=dict)
+    deleted: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+    duration: float = 0.0
+    keys: Set[str] = field(default_factory=set, repr=False)  # 已回收（dry run 下为已计入）的key
+
+    def add(self, candidate: GCCandidate):
+        self.keys.add(candidate.key)
+        self.reclaimed_bytes[candidate.category] = self.reclaimed_bytes.get(candidate.category, 0) + candidate.size
+        self.deleted[candidate.category] = self.deleted.get(candidate.category, 0) + 1
+
+    @property
+    def total_reclaimed(self) -> int:
+        return sum(self.reclaimed_bytes.values())
+
+    def to_dict(self) -> dict:
+        return {
+            'dry_run': self.dry_run,
+            'total_bytes_before': self.total_bytes_before,
+            'total_reclaimed': self.total_reclaimed,
+            'reclaimed_bytes': dict(self.reclaimed_bytes),
+            'deleted': dict(self.deleted),
+            'errors': self.errors,
+            'duration': round(self.duration, 3),
+        }
+
+
+def _hours(value: float) -> float:
+    return float(value) * 3600
+
+
+def _tree_stats(path: Path):
+    """返回 (总字节数, 最新修改时间)；目录按其中最新的文件计算（空目录取目录本身的修改时间）"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return 0, 0.0
+    if not path.is_dir():
+        return stat.st_size, stat.st_mtime
+
+    total, newest = 0, 0.0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                file_stat = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            total += file_stat.st_size
+            newest = max(newest, file_stat.st_mtime)
+    return total, newest or stat.st_mtime
+
+
+class StorageGarbageCollector:
+    """
+    上传目录回收器
+
+    需要在 Flask 应用上下文中运行（读取数据库中的引用）。
+    """
+
+    def __init__(self, upload_folder: str,
+                 editable_ttl_hours: float = 24,
+                 mineru_ttl_hours: float = 24,
+                 export_ttl_hours: float = 0,
+                 orphan_ttl_hours: float = 24,
+                 keep_image_versions: int = 0,
+                 max_total_mb: int = 0,
+                 min_age_minutes: float = 30,
+                 batch_size: int = 200):
+        """
+        Args:
+            upload_folder: 上传目录
+            editable_ttl_hours: editable_images 与临时目录的保留时间
+            mineru_ttl_hours: 未被引用的 MinerU 解析结果的保留时间
+            export_ttl_hours: 导出文件的保留时间（0 表示不按时间清理）
+            orphan_ttl_hours: 数据库中没有引用的页面图片/项目目录的保留时间
+            keep_image_versions: 每页保留的最近版本数（当前版本始终保留，0 表示不限制）
+            max_total_mb: 上传目录总大小预算（MB，0 表示不限制）
+            min_age_minutes: 任何文件被回收前的最短存在时间，避免删除进行中的任务产物
+            batch_size: 每批删除的数量（历史版本按批提交数据库）
+        """
+        self.upload_folder = Path(upload_folder)
+        self.editable_ttl = _hours(editable_ttl_hours)
+        self.mineru_ttl = _hours(mineru_ttl_hours)
+        self.export_ttl = _hours(export_ttl_hours)
+        self.orphan_ttl = _hours(orphan_ttl_hours)
+        self.keep_image_versions = keep_image_versions
+        self.max_total_bytes = max_total_mb * 1024 * 1024
+        self.min_age = min_age_minutes * 60
+        self.batch_size = max(1, batch_size)
+
+    @classmethod
+    def from_config(cls, config, upload_folder: Optional[str] = None) -> 'StorageGarbageCollector':
+        """从 Flask app.config（或 Config）创建"""
+        get = config.get if isinstance(config, dict) else lambda key, default=None: getattr(config, key, default)
+        return cls(
+            upload_folder or get('UPLOAD_FOLDER'),
+            editable_ttl_hours=get('GC_EDITABLE_TTL_HOURS', Config.GC_EDITABLE_TTL_HOURS),
+            mineru_ttl_hours=get('GC_MINERU_TTL_HOURS', Config.GC_MINERU_TTL_HOURS),
+            export_ttl_hours=get('GC_EXPORT_TTL_HOURS', Config.GC_EXPORT_TTL_HOURS),
+            orphan_ttl_hours=get('GC_ORPHAN_TTL_HOURS', Config.GC_ORPHAN_TTL_HOURS),
+            keep_image_versions=get('GC_KEEP_IMAGE_VERSIONS', Config.GC_KEEP_IMAGE_VERSIONS),
+            max_total_mb=get('GC_MAX_TOTAL_MB', Config.GC_MAX_TOTAL_MB),
+            min_age_minutes=get('GC_MIN_AGE_MINUTES', Config.GC_MIN_AGE_MINUTES),
+            batch_size=get('GC_BATCH_SIZE', Config.GC_BATCH_SIZE),
+        )
+
+    # ========== 入口 ==========
+
+    def run(self, dry_run: bool = False) -> GCReport:
+        """
+        执行一次回收
+
+        Args:
+            dry_run: 只统计不删除
+
+        Returns:
+            GCReport
+        """
+        started = time.monotonic()
+        now = time.time()
+        report = GCReport(dry_run=dry_run)
+        if not self.upload_folder.is_dir():
+            return report
+
+        if self.max_total_bytes:
+            report.total_bytes_before = _tree_stats(self.upload_folder)[0]
+
+        expired = [c for c in self._collect_expendable() if self._is_expired(c, now)]
+        expired.extend(self._collect_orphans(now))
+        self._delete(expired, report, dry_run)
+
+        if self.keep_image_versions > 0:
+            self._delete(self._collect_old_versions(self.keep_image_versions, now), report, dry_run)
+
+        if self.max_total_bytes:
+            self._enforce_budget(report, now, dry_run)
+
+        report.duration = time.monotonic() - started
+        return report
+
+    # ========== 候选收集 ==========
+
+    def _ttl_for(self, category: str) -> float:
+        return {
+            'editable_images': self.editable_ttl,
+            'temp': self.editable_ttl,
+            'mineru': self.mineru_ttl,
+            'exports': self.export_ttl,
+        }[category]
+
+    def _is_expired(self, candidate: GCCandidate, now: float) -> bool:
+        ttl = self._ttl_for(candidate.category)
+        return ttl > 0 and now - candidate.mtime >= max(ttl, self.min_age)
+
+    def _collect_expendable(self) -> List[GCCandidate]:
+        """收集按时间回收的候选（可编辑导出中间产物、临时目录、未引用的 MinerU 结果、导出文件）"""
+        candidates = []
+
+        editable_root = self.upload_folder / EDITABLE_IMAGES_DIR
+        for entry in self._iter_dir(editable_root):
+            candidates.append(self._candidate('editable_images', entry))
+
+        for entry in self._iter_dir(self.upload_folder):
+            if entry.is_dir() and _TEMP_DIR_PATTERN.match(entry.name):
+                candidates.append(self._candidate('temp', entry))
+
+        mineru_root = self.upload_folder / MINERU_FILES_DIR
+        mineru_entries = [entry for entry in self._iter_dir(mineru_root) if entry.is_dir()]
+        if mineru_entries:
+            referenced = self._referenced_mineru_ids()
+            candidates.extend(
+                self._candidate('mineru', entry)
+                for entry in mineru_entries if entry.name not in referenced
+            )
+
+        for project_dir in self._iter_dir(self.upload_folder):
+            if not _PROJECT_DIR_PATTERN.match(project_dir.name):
+                continue
+            for entry in self._iter_dir(project_dir / 'exports'):
+                if entry.is_file():
+                    candidates.append(self._candidate('exports', entry))
+
+        return candidates
+
+    def _collect_orphans(self, now: float) -> List[GCCandidate]:
+        """收集数据库中已没有引用的项目目录和页面图片"""
+        from models import db, Project, Page, PageImageVersion
+
+        project_dirs = [d for d in self._iter_dir(self.upload_folder)
+                        if d.is_dir() and _PROJECT_DIR_PATTERN.match(d.name)]
+        if not project_dirs:
+            return []
+
+        grace = max(self.orphan_ttl, self.min_age)
+        project_ids = {row[0] for row in db.session.query(Project.id)}
+
+        # 被引用的页面图片文件名；同一版本的 _thumb.jpg 与 _w*.xxx 缩略图通过文件名前缀匹配
+        referenced_names: Set[str] = set()
+        for (path,) in db.session.query(PageImageVersion.image_path):
+            referenced_names.add(Path(path.replace('\\', '/')).name)
+        for generated, cached in db.session.query(Page.generated_image_path, Page.cached_image_path):
+            for path in (generated, cached):
+                if path:
+                    referenced_names.add(Path(path.replace('\\', '/')).name)
+        referenced_stems = {name.rsplit('.', 1)[0] for name in referenced_names}
+
+        candidates = []
+        for project_dir in project_dirs:
+            if project_dir.name not in project_ids:
+                candidate = self._candidate('orphans', project_dir)
+                if now - candidate.mtime >= grace:
+                    candidates.append(candidate)
+                continue
+
+            for entry in self._iter_dir(project_dir / 'pages'):
+                if not entry.is_file() or self._is_referenced_page_file(entry.name, referenced_names, referenced_stems):
+                    continue
+                candidate = self._candidate('orphans', entry)
+                if now - candidate.mtime >= grace:
+                    candidates.append(candidate)
+        return candidates
+
+    @staticmethod
+    def _is_referenced_page_file(name: str, referenced_names: Set[str], referenced_stems: Set[str]) -> bool:
+        if name in referenced_names:
+            return True
+        # {stem}_thumb.jpg / {stem}_w320.webp 属于同一版本
+        stem = name.rsplit('.', 1)[0]
+        while '_' in stem:
+            stem = stem.rsplit('_', 1)[0]
+            if stem in referenced_stems:
+                return True
+        return False
+
+    def _collect_old_versions(self, keep: int, now: float) -> List[GCCandidate]:
+        """收集每页超出保留数量的历史版本（当前版本始终保留）"""
+        from sqlalchemy import func
+        from models import db, Page, PageImageVersion
+
+        pages_over_limit = (
+            db.session.query(PageImageVersion.page_id)
+            .group_by(PageImageVersion.page_id)
+            .having(func.count(PageImageVersion.id) > keep)
+            .all()
+        )
+
+        candidates = []
+        for (page_id,) in pages_over_limit:
+            versions = (
+                PageImageVersion.query.filter_by(page_id=page_id)
+                .order_by(PageImageVersion.version_number.desc())
+                .all()
+            )
+            for version in versions[keep:]:
+                if version.is_current:
+                    continue
+                candidate = self._version_candidate(version)
+                if now - candidate.mtime >= self.min_age:
+                    candidates.append(candidate)
+        return candidates
+
+    def _version_candidate(self, version) -> GCCandidate:
+        """历史版本：原图 + _thumb.jpg + 缩略图金字塔"""
+        image_path = Path(version.image_path.replace('\\', '/'))
+        local_dir = self.upload_folder / image_path.parent
+        size, mtime = 0, version.created_at.timestamp() if version.created_at else 0.0
+        for entry in self._iter_dir(local_dir):
+            if entry.name == image_path.name or entry.name.startswith(f"{image_path.stem}_"):
+                entry_size, entry_mtime = _tree_stats(entry)
+                size += entry_size
+                mtime = max(mtime, entry_mtime)
+        return GCCandidate('versions', image_path.as_posix(), size, mtime, version_id=version.id)
+
+    def _referenced_mineru_ids(self) -> Set[str]:
+        """扫描项目/页面/参考文件内容中引用的 MinerU 解析结果ID"""
+        from models import db, Project, Page, ReferenceFile
+
+        columns = [
+            Project.idea_prompt, Project.outline_text, Project.description_text, Project.extra_requirements,
+            Page.outline_content, Page.description_content,
+            ReferenceFile.markdown_content,
+        ]
+        referenced = set()
+        for column in columns:
+            query = db.session.query(column).filter(column.like('%mineru%'))
+            for (text,) in query.yield_per(200):
+                if text:
+                    referenced.update(_MINERU_REF_PATTERN.findall(text))
+        return referenced
+
+    def _enforce_budget(self, report: GCReport, now: float, dry_run: bool):
+        """超出磁盘预算时，从最旧的可回收文件开始删除，直到低于预算"""
+        current = report.total_bytes_before - report.total_reclaimed
+        if current <= self.max_total_bytes:
+            return
+
+        pool = [c for c in self._collect_expendable() if now - c.mtime >= self.min_age]
+        # 预算模式下每页历史版本只保留最近两个（当前版本和上一个版本；回退过的当前版本另外始终保留）
+        pool.extend(self._collect_old_versions(keep=2, now=now))
+        pool = [c for c in pool if c.key not in report.keys]
+        pool.sort(key=lambda c: c.mtime)
+
+        selected = []
+        for candidate in pool:
+            if current <= self.max_total_bytes:
+                break
+            selected.append(candidate)
+            current -= candidate.size
+
+        if current > self.max_total_bytes:
+            logger.warning(
+                f"Storage GC: uploads still over budget after reclaiming everything eligible "
+                f"({current / 1024 / 1024:.1f}MB > {self.max_total_bytes / 1024 / 1024:.1f}MB)"
+            )
+        self._delete(selected, report, dry_run)
+
+    # ========== 删除 ==========
+
+    def _delete(self, candidates: List[GCCandidate], report: GCReport, dry_run: bool):
+        """分批删除候选；历史版本同时删除数据库记录，每批提交一次"""
+        from models import db, PageImageVersion
+        from services.file_service import FileService
+
+        file_service = FileService(str(self.upload_folder))
+        storage = file_service.storage
+
+        for start in range(0, len(candidates), self.batch_size):
+            batch = candidates[start:start + self.batch_size]
+            for candidate in batch:
+                if candidate.key in report.keys:
+                    continue
+                if dry_run:
+                    report.add(candidate)
+                    continue
+                try:
+                    if candidate.version_id:
+                        version = PageImageVersion.query.get(candidate.version_id)
+                        # 生成期间可能被切换为当前版本
+                        if version is None or version.is_current:
+                            continue
+                        file_service.delete_page_image_version(version.image_path)
+                        db.session.delete(version)
+                    elif candidate.is_dir:
+                        storage.delete_prefix(candidate.key)
+                    else:
+                        storage.delete(candidate.key)
+                    report.add(candidate)
+                except Exception as e:
+                    report.errors += 1
+                    logger.warning(f"Storage GC: failed to delete {candidate.key}: {e}")
+
+            if not dry_run and any(c.version_id for c in batch):
+                try:
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    report.errors += 1
+                    logger.error(f"Storage GC: failed to commit version cleanup: {e}", exc_info=True)
+
+    # ========== 工具方法 ==========
+
+    def _candidate(self, category: str, path: Path) -> GCCandidate:
+        size, mtime = _tree_stats(path)
+        key = path.relative_to(self.upload_folder).as_posix()
+        return GCCandidate(category, key, size, mtime, is_dir=path.is_dir())
+
+    @staticmethod
+    def _iter_dir(path: Path) -> Iterable[Path]:
+        try:
+            return list(path.iterdir())
+        except OSError:
+            return []
+
+
+def run_storage_gc(app, dry_run: bool = False, min_interval: float = 0) -> GCReport:
+    """
+    在应用上下文中执行一次回收（进程间通过文件锁互斥，多 worker 部署时只有一个进程在回收）
+
+    Args:
+        dry_run: 只统计不删除
+        min_interval: 距上次（任一进程）开始回收不足该秒数时跳过，0 表示总是执行
+
+    Returns:
+        GCReport；其他进程正在回收或刚回收过时返回空报告
+    """
+    upload_folder = app.config['UPLOAD_FOLDER']
+    with _process_lock(upload_folder) as lock:
+        if not lock:
+            logger.debug("Storage GC already running in another process, skipping")
+            return GCReport(dry_run=dry_run)
+
+        now = time.time()
+        last_run = lock.read_last_run()
+        if min_interval > 0 and last_run is not None and now - last_run < min_interval:
+            logger.debug(f"Storage GC ran {now - last_run:.0f}s ago in another process, skipping")
+            return GCReport(dry_run=dry_run)
+        if not dry_run:
+            lock.write_last_run(now)
+
+        with app.app_context():
+            report = StorageGarbageCollector.from_config(app.config).run(dry_run=dry_run)
+
+    logger.info(
+        f"Storage GC {'(dry run) ' if dry_run else ''}reclaimed {report.total_reclaimed / 1024 / 1024:.1f}MB "
+        f"in {report.duration:.1f}s: {report.reclaimed_bytes}, deleted={report.deleted}, errors={report.errors}"
+    )
+    return report
+
+
+class _process_lock:
+    """
+    非阻塞的进程间文件锁（不支持 fcntl 的平台上不加锁）
+
+    锁文件内容为最近一次开始回收的时间戳，供各 worker 判断是否已有进程在本周期内回收过。
+    """
+
+    def __init__(self, upload_folder: str):
+        self._path = os.path.join(upload_folder, GC_LOCK_FILE)
+        self._file = None
+        self._acquired = False
+
+    def __enter__(self) -> '_process_lock':
+        try:
+            import fcntl
+        except ImportError:
+            self._acquired = True
+            return self
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        self._file = open(self._path, 'a+')
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._acquired = True
+        except OSError:
+            self._file.close()
+            self._file = None
+        return self
+
+    def __bool__(self) -> bool:
+        return self._acquired
+
+    def read_last_run(self) -> Optional[float]:
+        """读取最近一次开始回收的时间戳（没有记录时返回 None）"""
+        try:
+            with open(self._path, 'r') as f:
+                return float(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def write_last_run(self, timestamp: float):
+        """记录本次开始回收的时间戳（持有锁时调用）"""
+        try:
+            with open(self._path, 'w') as f:
+                f.write(f"{timestamp:.3f}")
+        except OSError as e:
+            logger.warning(f"Failed to record storage GC run time: {e}")
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            self._file.close()  # 关闭文件即释放锁
+            self._file = None
+        return False
+
+
+def start_storage_gc(app) -> Optional[threading.Thread]:
+    """
+    启动后台回收线程（每 GC_INTERVAL_SECONDS 执行一次，首次执行在一个周期之后）
+
+    Returns:
+        后台线程，未启用时返回 None
+    """
+    global _gc_thread
+    interval = app.config.get('GC_INTERVAL_SECONDS', Config.GC_INTERVAL_SECONDS)
+    if interval <= 0:
+        return None
+    if _gc_thread is not None and _gc_thread.is_alive():
+        return _gc_thread
+
+    def loop():
+        while not _gc_stop.wait(interval):
+            try:
+                # 每个 worker 都有自己的回收线程，本周期内已有其他进程回收过时跳过（留 10% 余量抵消计时误差）
+                run_storage_gc(app, min_interval=interval * 0.9)
+            except Exception as e:
+                logger.error(f"Storage GC failed: {e}", exc_info=True)
+
+    _gc_stop.clear()
+    _gc_thread = threading.Thread(target=loop, name='storage-gc', daemon=True)
+    _gc_thread.start()
+    logger.info(f"Storage GC scheduled every {interval}s")
+    return _gc_thread
+
+
+def stop_storage_gc():
+    """停止后台回收线程"""
+    _gc_stop.set()
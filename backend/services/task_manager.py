@@ -3,13 +3,18 @@ Task Manager - handles background tasks using ThreadPoolExecutor
 No need for Celery or Redis, uses in-memory task tracking
 """
 import logging
+import queue
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Callable, List, Dict, Any
 from datetime import datetime
+from flask import current_app
 from sqlalchemy import func
 from models import db, Task, Page, Material, PageImageVersion
 from utils import get_filtered_pages
+from services.ai_service import ReferenceImageBundle
+from services.storage import get_storage
+from services.thumbnail_service import schedule_page_thumbnails
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -67,7 +72,7 @@ task_manager = TaskManager(max_workers=4)
 
 
 def save_image_with_version(image, project_id: str, page_id: str, file_service,
-                            page_obj=None, image_format: str = 'PNG') -> tuple[str, int]:
+                            page_obj=None, image_format: str = None) -> tuple[str, int]:
     """
     保存图片并创建历史版本记录的公共函数
 
@@ -77,26 +82,26 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
         page_id: 页面ID
         file_service: FileService 实例
         page_obj: Page 对象（可选，如果提供则更新页面状态）
-        image_format: 图片格式，默认 PNG
+        image_format: 图片格式，默认 Config.PAGE_IMAGE_FORMAT
 
     Returns:
         tuple: (image_path, version_number) - 图片路径和版本号
 
     这个函数会：
     1. 计算下一个版本号（使用 MAX 查询确保安全）
-    2. 标记所有旧版本为非当前版本
-    3. 保存图片到最终位置
-    4. 生成并保存压缩的缓存图片
-    5. 创建新版本记录
+    2. 保存图片到最终位置（fsync 后原子替换）
+    3. 生成并保存压缩的缓存图片
+    4. 标记所有旧版本为非当前版本，创建新版本记录
+    5. 提交事务（文件落盘之后才写数据库，编码期间不占用 SQLite 写锁）
     6. 如果提供了 page_obj，更新页面状态和图片路径
+    7. 提交后台任务生成多分辨率缩略图（不阻塞当前流程）
+
+    批量生成时在独立的 I/O 线程池中调用（见 generate_images_task），图片模型的并发槽位不等待编码。
     """
     # 使用 MAX 查询确保版本号安全（即使有版本被删除也不会重复）
     max_version = db.session.query(func.max(PageImageVersion.version_number)).filter_by(page_id=page_id).scalar() or 0
     next_version = max_version + 1
 
-    # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
-    PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
-
     # 保存原图到最终位置（使用版本号）
     image_path = file_service.save_generated_image(
         image, project_id, page_id,
@@ -111,6 +116,9 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
         quality=85
     )
 
+    # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
+    PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
+
     # 创建新版本记录
     new_version = PageImageVersion(
         page_id=page_id,
@@ -130,6 +138,12 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
     # 提交事务
     db.session.commit()
 
+    # 后台生成缩略图金字塔（生成完成前前端回退到 _thumb.jpg）
+    schedule_page_thumbnails(
+        current_app._get_current_object(), new_version.id,
+        project_id, page_id, next_version, image_path
+    )
+
     logger.debug(f"Page {page_id} image saved as version {next_version}: {image_path}, cached: {cached_image_path}")
 
     return image_path, next_version
@@ -319,6 +333,8 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
             
             # 注意：不在任务开始时获取模板路径，而是在每个子线程中动态获取
             # 这样可以确保即使用户在上传新模板后立即生成，也能使用最新模板
+            # 模板图和素材图在整个任务内只加载、缩放和编码一次，所有页面线程共享
+            reference_bundle = ReferenceImageBundle(ai_service)
             
             # Initialize progress
             task.set_progress({
@@ -332,84 +348,127 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
             completed = 0
             failed = 0
             
-            def generate_single_image(page_id, page_data, page_index):
+            def prepare_page(page_id, page_data, page_index):
                 """
-                Generate image for a single page
+                准备阶段：读取页面描述、构建提示词、解析并预加载参考图（CPU/IO 密集，耗时短）
                 注意：只传递 page_id（字符串），不传递 ORM 对象，避免跨线程会话问题
                 """
                 # 关键修复：在子线程中也需要应用上下文
+                with app.app_context():
+                    logger.debug(f"Preparing image generation for page {page_id}, index {page_index}")
+                    # Get page from database in this thread
+                    page_obj = Page.query.get(page_id)
+                    if not page_obj:
+                        raise ValueError(f"Page {page_id} not found")
+                    
+                    # Update page status
+                    page_obj.status = 'GENERATING'
+                    db.session.commit()
+                    logger.debug(f"Page {page_id} status updated to GENERATING")
+                    
+                    # Get description content
+                    desc_content = page_obj.get_description_content()
+                    if not desc_content:
+                        raise ValueError("No description content for page")
+                    
+                    # 获取描述文本（可能是 text 字段或 text_content 数组）
+                    desc_text = desc_content.get('text', '')
+                    if not desc_text and desc_content.get('text_content'):
+                        # 如果 text 字段不存在，尝试从 text_content 数组获取
+                        text_content = desc_content.get('text_content', [])
+                        if isinstance(text_content, list):
+                            desc_text = '\n'.join(text_content)
+                        else:
+                            desc_text = str(text_content)
+                    
+                    logger.debug(f"Got description text for page {page_id}: {desc_text[:100]}...")
+                    
+                    # 从当前页面的描述内容中提取图片 URL
+                    page_additional_ref_images = []
+                    has_material_images = False
+                    
+                    # 从描述文本中提取图片
+                    if desc_text:
+                        image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
+                        if image_urls:
+                            logger.info(f"Found {len(image_urls)} image(s) in page {page_id} description")
+                            page_additional_ref_images = image_urls
+                            has_material_images = True
+                    
+                    # 在子线程中动态获取模板路径，确保使用最新模板
+                    page_ref_image_path = None
+                    if use_template:
+                        page_ref_image_path = file_service.get_template_path(project_id)
+                        # 注意：如果有风格描述，即使没有模板图片也允许生成
+                        # 这个检查已经在 controller 层完成，这里不再检查
+                    
+                    # Generate image prompt
+                    prompt = ai_service.generate_image_prompt(
+                        outline, page_data, desc_text, page_index,
+                        has_material_images=has_material_images,
+                        extra_requirements=extra_requirements,
+                        language=language,
+                        has_template=use_template
+                    )
+                    logger.debug(f"Generated image prompt for page {page_id}")
+                    
+                    # 预加载参考图（下载、MinerU 路径解析、解码缩放），图片生成阶段直接复用
+                    for ref in filter(None, [page_ref_image_path] + page_additional_ref_images):
+                        reference_bundle.get(ref)
+                    
+                    return {
+                        'page_id': page_id,
+                        'page_index': page_index,
+                        'prompt': prompt,
+                        'ref_image_path': page_ref_image_path,
+                        'additional_ref_images': page_additional_ref_images,
+                    }
+            
+            def generate_prepared_image(prepared):
+                """
+                生成阶段：只执行耗时的图片模型调用，拿到图片后立即释放并发槽位（编码和写盘交给 I/O 线程池）
+                """
+                page_id = prepared['page_id']
+                page_index = prepared['page_index']
                 with app.app_context():
                     try:
-                        logger.debug(f"Starting image generation for page {page_id}, index {page_index}")
-                        # Get page from database in this thread
-                        page_obj = Page.query.get(page_id)
-                        if not page_obj:
-                            raise ValueError(f"Page {page_id} not found")
-                        
-                        # Update page status
-                        page_obj.status = 'GENERATING'
-                        db.session.commit()
-                        logger.debug(f"Page {page_id} status updated to GENERATING")
-                        
-                        # Get description content
-                        desc_content = page_obj.get_description_content()
-                        if not desc_content:
-                            raise ValueError("No description content for page")
-                        
-                        # 获取描述文本（可能是 text 字段或 text_content 数组）
-                        desc_text = desc_content.get('text', '')
-                        if not desc_text and desc_content.get('text_content'):
-                            # 如果 text 字段不存在，尝试从 text_content 数组获取
-                            text_content = desc_content.get('text_content', [])
-                            if isinstance(text_content, list):
-                                desc_text = '\n'.join(text_content)
-                            else:
-                                desc_text = str(text_content)
-                        
-                        logger.debug(f"Got description text for page {page_id}: {desc_text[:100]}...")
-                        
-                        # 从当前页面的描述内容中提取图片 URL
-                        page_additional_ref_images = []
-                        has_material_images = False
-                        
-                        # 从描述文本中提取图片
-                        if desc_text:
-                            image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
-                            if image_urls:
-                                logger.info(f"Found {len(image_urls)} image(s) in page {page_id} description")
-                                page_additional_ref_images = image_urls
-                                has_material_images = True
-                        
-                        # 在子线程中动态获取模板路径，确保使用最新模板
-                        page_ref_image_path = None
-                        if use_template:
-                            page_ref_image_path = file_service.get_template_path(project_id)
-                            # 注意：如果有风格描述，即使没有模板图片也允许生成
-                            # 这个检查已经在 controller 层完成，这里不再检查
-                        
-                        # Generate image prompt
-                        prompt = ai_service.generate_image_prompt(
-                            outline, page_data, desc_text, page_index,
-                            has_material_images=has_material_images,
-                            extra_requirements=extra_requirements,
-                            language=language,
-                            has_template=use_template
-                        )
-                        logger.debug(f"Generated image prompt for page {page_id}")
-                        
                         # Generate image
                         logger.info(f"🎨 Calling AI service to generate image for page {page_index}/{len(pages)}...")
                         image = ai_service.generate_image(
-                            prompt, page_ref_image_path, aspect_ratio, resolution,
-                            additional_ref_images=page_additional_ref_images if page_additional_ref_images else None
+                            prepared['prompt'], prepared['ref_image_path'], aspect_ratio, resolution,
+                            additional_ref_images=prepared['additional_ref_images'] or None,
+                            reference_bundle=reference_bundle
                         )
                         logger.info(f"✅ Image generated successfully for page {page_index}")
                         
                         if not image:
                             raise ValueError("Failed to generate image")
                         
-                        # 优化：直接在子线程中计算版本号并保存到最终位置
-                        # 每个页面独立，使用数据库事务保证版本号原子性，避免临时文件
+                        return (page_id, image, None)
+                        
+                    except Exception as e:
+                        import traceback
+                        error_detail = traceback.format_exc()
+                        logger.error(f"Failed to generate image for page {page_id}: {error_detail}")
+                        return (page_id, None, str(e))
+            
+            def persist_page_image(page_id, image):
+                """
+                持久化阶段（I/O 线程池）：编码并写入原图和缓存图，文件落盘后再提交版本记录
+                """
+                try:
+                    return _persist_page_image(page_id, image)
+                finally:
+                    persist_slots.release()
+            
+            def _persist_page_image(page_id, image):
+                with app.app_context():
+                    try:
+                        page_obj = Page.query.get(page_id)
+                        if not page_obj:
+                            raise ValueError(f"Page {page_id} not found")
+                        
+                        # 每个页面独立，使用数据库事务保证版本号原子性，直接保存到最终位置
                         image_path, next_version = save_image_with_version(
                             image, project_id, page_id, file_service, page_obj=page_obj
                         )
@@ -417,22 +476,77 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                         return (page_id, image_path, None)
                         
                     except Exception as e:
-                        import traceback
-                        error_detail = traceback.format_exc()
-                        logger.error(f"Failed to generate image for page {page_id}: {error_detail}")
+                        logger.error(f"Failed to save image for page {page_id}: {e}", exc_info=True)
                         return (page_id, None, str(e))
             
-            # Use ThreadPoolExecutor for parallel generation
+            # 三级流水线：准备阶段的线程池提前为所有页面构建提示词和参考图，
+            # 每准备好一页就提交给有界的图片生成线程池，生成线程不会空等准备工作；
+            # 图片返回后交给 I/O 线程池编码写盘，生成线程立即处理下一页
+            results = queue.Queue()
+            
+            def on_prepared(page_id):
+                def callback(prepare_future):
+                    try:
+                        prepared = prepare_future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to prepare image generation for page {page_id}: {e}", exc_info=e)
+                        results.put((page_id, None, str(e)))
+                        return
+                    try:
+                        image_future = image_executor.submit(generate_prepared_image, prepared)
+                    except Exception as e:
+                        # 提交失败也必须为该页放入结果，否则主线程会一直等待
+                        logger.error(f"Failed to submit image generation for page {page_id}: {e}", exc_info=e)
+                        results.put((page_id, None, str(e)))
+                        return
+                    image_future.add_done_callback(on_generated(page_id))
+                return callback
+            
+            def on_generated(page_id):
+                def callback(image_future):
+                    try:
+                        _, image, error = image_future.result()
+                    except Exception as e:
+                        results.put((page_id, None, str(e)))
+                        return
+                    if error:
+                        results.put((page_id, None, error))
+                        return
+                    # 等待空闲的 I/O 槽位再交出图片：编码跟不上生成速度时由生成线程等待，
+                    # 而不是在无界队列里堆积整页分辨率的解码图片
+                    persist_slots.acquire()
+                    try:
+                        persist_future = io_executor.submit(persist_page_image, page_id, image)
+                    except Exception as e:
+                        persist_slots.release()
+                        logger.error(f"Failed to submit image persistence for page {page_id}: {e}", exc_info=e)
+                        results.put((page_id, None, str(e)))
+                        return
+                    persist_future.add_done_callback(on_persisted(page_id))
+                return callback
+            
+            def on_persisted(page_id):
+                def callback(persist_future):
+                    try:
+                        results.put(persist_future.result())
+                    except Exception as e:
+                        results.put((page_id, None, str(e)))
+                return callback
+            
             # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(generate_single_image, page.id, page_data, i)
-                    for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
-                ]
+            prepare_workers = max(1, min(app.config.get('IMAGE_PREPARE_WORKERS', 4), len(pages)))
+            io_workers = max(1, app.config.get('IMAGE_IO_WORKERS', 2))
+            persist_slots = threading.BoundedSemaphore(io_workers)
+            with ThreadPoolExecutor(max_workers=io_workers) as io_executor, \
+                    ThreadPoolExecutor(max_workers=max_workers) as image_executor, \
+                    ThreadPoolExecutor(max_workers=prepare_workers) as prepare_executor:
+                for i, (page, page_data) in enumerate(zip(pages, pages_data), 1):
+                    prepare_future = prepare_executor.submit(prepare_page, page.id, page_data, i)
+                    prepare_future.add_done_callback(on_prepared(page.id))
                 
                 # Process results as they complete
-                for future in as_completed(futures):
-                    page_id, image_path, error = future.result()
+                for _ in range(len(pages)):
+                    page_id, image_path, error = results.get()
                     
                     db.session.expire_all()
                     
@@ -548,7 +662,7 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
                 # 这个检查已经在 controller 层完成，这里不再检查
             
             # Generate image prompt
-            page_data = page.get_outline_content() or {}
+            page_data = dict(page.get_outline_content() or {})
             if page.part:
                 page_data['part'] = page.part
             
@@ -842,7 +956,7 @@ def export_editable_pptx_with_recursive_analysis_task(
         page_ids: 可选的页面ID列表（如果提供，只导出这些页面）
         max_depth: 最大递归深度
         max_workers: 并发处理数
-        export_extractor_method: 组件提取方法 ('mineru' 或 'hybrid')
+        export_extractor_method: 组件提取方法 ('mineru' / 'hybrid' / 'local')
         export_inpaint_method: 背景修复方法 ('generative', 'baidu', 'hybrid')
         app: Flask应用实例
     """
@@ -977,6 +1091,7 @@ def export_editable_pptx_with_recursive_analysis_task(
             )
             
             logger.info(f"✓ 可编辑PPTX已创建: {output_path}")
+            get_storage(app.config['UPLOAD_FOLDER']).commit(f"{project_id}/exports/{filename}")
             
             # Step 4: 标记任务完成
             download_path = f"/files/{project_id}/exports/{filename}"
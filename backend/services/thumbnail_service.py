@@ -0,0 +1,104 @@
+"""
+Thumbnail Service - 在后台为页面图片生成多分辨率、多格式的缩略图
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from PIL import Image, features
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 按浏览器优先级排列（AVIF 体积最小，JPEG 为兜底格式）
+SUPPORTED_THUMBNAIL_FORMATS = ('avif', 'webp', 'jpeg')
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_thumbnail_widths() -> List[int]:
+    """配置的缩略图宽度（升序）"""
+    return sorted({int(w) for w in Config.THUMBNAIL_WIDTHS.split(',') if w.strip()})
+
+
+def get_thumbnail_formats() -> List[str]:
+    """配置的缩略图格式（过滤掉当前 Pillow 不支持编码的格式，始终包含 JPEG 兜底）"""
+    configured = [f.strip().lower() for f in Config.THUMBNAIL_FORMATS.split(',') if f.strip()]
+    formats = [
+        f for f in SUPPORTED_THUMBNAIL_FORMATS
+        if f in configured and (f == 'jpeg' or features.check(f))
+    ]
+    if 'jpeg' not in formats:
+        formats.append('jpeg')
+    return formats
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=Config.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnail',
+            )
+        return _executor
+
+
+def schedule_page_thumbnails(app, version_id: str, project_id: str, page_id: str,
+                             version_number: int, image_path: str) -> Optional[Future]:
+    """
+    提交后台任务：从已保存的原图生成缩略图金字塔，并记录到 PageImageVersion.thumbnails
+
+    在原图和 _thumb.jpg 保存、版本记录提交之后调用，不阻塞生成/请求流程。
+    缩略图生成前前端回退到 _thumb.jpg。
+
+    Args:
+        app: Flask app 实例（后台线程需要应用上下文）
+        version_id: PageImageVersion ID
+        project_id: 项目ID
+        page_id: 页面ID
+        version_number: 版本号
+        image_path: 原图相对路径
+
+    Returns:
+        Future，未启用时返回 None
+    """
+    if not Config.THUMBNAIL_WIDTHS:
+        return None
+    return _get_executor().submit(
+        _build_page_thumbnails, app, version_id, project_id, page_id, version_number, image_path
+    )
+
+
+def _build_page_thumbnails(app, version_id: str, project_id: str, page_id: str,
+                           version_number: int, image_path: str):
+    from models import db, PageImageVersion
+    from services.file_service import FileService
+
+    with app.app_context():
+        try:
+            file_service = FileService(app.config['UPLOAD_FOLDER'])
+            with Image.open(file_service.get_absolute_path(image_path)) as image:
+                image.load()
+                thumbnails = file_service.save_thumbnail_set(
+                    image, project_id, page_id, version_number,
+                    widths=get_thumbnail_widths(),
+                    formats=get_thumbnail_formats(),
+                )
+
+            version = PageImageVersion.query.get(version_id)
+            if version is None:
+                # 版本在生成期间被删除
+                logger.debug(f"Version {version_id} removed before thumbnails were recorded")
+                return None
+            version.set_thumbnails(thumbnails)
+            db.session.commit()
+            logger.debug(f"Thumbnails for page {page_id} v{version_number}: {sorted(thumbnails, key=int)}")
+            return thumbnails
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Failed to build thumbnails for page {page_id} v{version_number}: {e}", exc_info=True)
+            return None
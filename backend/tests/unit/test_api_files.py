@@ -0,0 +1,145 @@
+"""
+静态文件路由测试
+
+验证带版本号的页面图片使用长期缓存、ETag 304、Range 请求以及 X-Accel-Redirect 模式
+"""
+
+import os
+import pytest
+
+
+@pytest.fixture
+def page_file(app):
+    pages_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'proj-files', 'pages')
+    os.makedirs(pages_dir, exist_ok=True)
+    with open(os.path.join(pages_dir, 'page1_v2.png'), 'wb') as f:
+        f.write(b'0123456789')
+    with open(os.path.join(pages_dir, 'page1.png'), 'wb') as f:
+        f.write(b'mutable')
+    return '/files/proj-files/pages/page1_v2.png'
+
+
+class TestServeFile:
+    """serve_file 缓存与条件请求测试"""
+
+    def test_versioned_image_is_immutable(self, client, page_file):
+        response = client.get(page_file)
+        assert response.status_code == 200
+        assert response.data == b'0123456789'
+        assert response.cache_control.immutable
+        assert response.cache_control.max_age > 0
+        assert 'attachment' not in response.headers.get('Content-Disposition', '')
+
+        etag = response.headers['ETag']
+        assert not etag.startswith('W/')
+        cached = client.get(page_file, headers={'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.data == b''
+
+    def test_unversioned_image_revalidates(self, client, page_file):
+        response = client.get('/files/proj-files/pages/page1.png')
+        assert response.status_code == 200
+        assert response.cache_control.no_cache
+        assert not response.cache_control.immutable
+
+    def test_range_request(self, client, page_file):
+        response = client.get(page_file, headers={'Range': 'bytes=2-5'})
+        assert response.status_code == 206
+        assert response.data == b'2345'
+        assert response.headers['Content-Range'] == 'bytes 2-5/10'
+
+    def test_x_accel_redirect(self, app, client, page_file):
+        app.config['FILE_SENDFILE_MODE'] = 'x-accel'
+        try:
+            response = client.get(page_file)
+        finally:
+            app.config['FILE_SENDFILE_MODE'] = ''
+        assert response.status_code == 200
+        assert response.data == b''
+        assert response.headers['X-Accel-Redirect'] == '/protected-uploads/proj-files/pages/page1_v2.png'
+        assert response.cache_control.immutable
+
+
+class TestThumbnailPyramid:
+    """缩略图金字塔生成与 ?w= 选择测试"""
+
+    @pytest.fixture
+    def pyramid(self, app):
+        from PIL import Image
+        from services.file_service import FileService
+
+        with app.app_context():
+            file_service = FileService(app.config['UPLOAD_FOLDER'])
+            image = Image.new('RGB', (1000, 500), color='blue')
+            file_service.save_cached_image(image, 'proj-thumbs', 'page1', 1)
+            return file_service.save_thumbnail_set(
+                image, 'proj-thumbs', 'page1', 1,
+                widths=[320, 640, 1280], formats=['webp', 'jpeg'],
+            )
+
+    def test_skips_widths_larger_than_source(self, pyramid):
+        assert sorted(pyramid, key=int) == ['320', '640']
+        assert pyramid['320']['webp'] == 'proj-thumbs/pages/page1_v1_w320.webp'
+
+    def test_selects_size_and_format(self, client, pyramid):
+        url = '/files/proj-thumbs/pages/page1_v1_thumb.jpg?w=400'
+        response = client.get(url, headers={'Accept': 'image/webp,*/*'})
+        assert response.status_code == 200
+        assert response.mimetype == 'image/webp'
+        assert response.cache_control.immutable
+        assert 'Accept' in response.vary
+
+        # 没有明确声明 WebP 时回退到 JPEG
+        response = client.get(url, headers={'Accept': '*/*'})
+        assert response.mimetype == 'image/jpeg'
+
+    def test_falls_back_to_cached_image(self, client, pyramid):
+        response = client.get('/files/proj-thumbs/pages/page1_v1_thumb.jpg?w=1600')
+        assert response.status_code == 200
+        assert response.mimetype == 'image/jpeg'
+        assert not response.cache_control.immutable
+
+
+class TestServeMineruFile:
+    """远程存储后端下 MinerU 解析结果的读穿透"""
+
+    @pytest.fixture
+    def remote_storage(self, app, tmp_path, monkeypatch):
+        import services.storage
+        from controllers import file_controller
+        from services.storage import LocalObjectStoreBackend
+
+        storage = LocalObjectStoreBackend(
+            app.config['UPLOAD_FOLDER'],
+            object_root=str(tmp_path / 'objects'),
+            secret_key='test-secret',
+        )
+        monkeypatch.setattr(services.storage, 'get_storage', lambda upload_folder=None: storage)
+        monkeypatch.setattr(file_controller, 'get_storage', lambda upload_folder=None: storage)
+        return storage
+
+    def test_serves_sibling_after_single_file_prefetch(self, client, remote_storage):
+        from utils.path_utils import build_prefix_index, clear_prefix_indexes, find_mineru_file_with_prefix
+
+        names = ('aaaaaa111.jpg', 'bbbbbb222.jpg', 'cccccc333.jpg')
+        for name in names:
+            remote_storage.save_bytes(f'mineru_files/ext9/images/{name}', name.encode())
+        extract_dir = remote_storage.local_path('mineru_files/ext9')
+        build_prefix_index(extract_dir)
+
+        # 模拟另一个节点：本地只有索引清单，AI 服务先拉取了其中一个文件
+        for name in names:
+            (extract_dir / 'images' / name).unlink()
+        clear_prefix_indexes()
+        assert find_mineru_file_with_prefix('/files/mineru/ext9/images/aaaaaa111.jpg').is_file()
+
+        response = client.get('/files/mineru/ext9/images/bbbbbb222.jpg')
+        assert response.status_code == 200
+        assert response.data == b'bbbbbb222.jpg'
+
+        # 前缀匹配：清单中有该文件但本地缺失，拉取所在目录后命中
+        response = client.get('/files/mineru/ext9/images/cccccc.jpg')
+        assert response.status_code == 200
+        assert response.data == b'cccccc333.jpg'
+
+        assert client.get('/files/mineru/ext9/images/dddddd.jpg').status_code == 404
@@ -122,3 +122,60 @@ class TestProjectDelete:
         
         assert response.status_code == 404
 
+
+
+class TestProjectList:
+    """项目列表测试"""
+    
+    def test_list_projects_summary_with_cursor(self, client):
+        """测试摘要模式 + keyset 分页遍历全部项目且不重复"""
+        created_ids = []
+        for i in range(3):
+            response = client.post('/api/projects', json={
+                'creation_type': 'idea',
+                'idea_prompt': f'历史项目{i}'
+            })
+            created_ids.append(assert_success_response(response, 201)['data']['project_id'])
+        
+        seen_ids = []
+        cursor = None
+        while True:
+            url = '/api/projects?view=summary&limit=2' + (f'&cursor={cursor}' if cursor else '')
+            data = assert_success_response(client.get(url))['data']
+            for project in data['projects']:
+                assert 'pages' not in project
+                assert project['page_count'] == 0
+                seen_ids.append(project['project_id'])
+            cursor = data['next_cursor']
+            if not data['has_more']:
+                assert cursor is None
+                break
+        
+        assert len(seen_ids) == len(set(seen_ids))
+        assert set(created_ids) <= set(seen_ids)
+    
+    def test_list_projects_invalid_cursor(self, client):
+        """测试无效的分页游标"""
+        response = client.get('/api/projects?view=summary&cursor=not-a-cursor')
+        assert response.status_code == 400
+    
+    def test_list_projects_summary_cover_is_thumbnail(self, app, client):
+        """测试摘要模式的封面使用缩略图而不是整张缓存图"""
+        from models import db, Page
+        
+        response = client.post('/api/projects', json={
+            'creation_type': 'idea',
+            'idea_prompt': '带封面的项目'
+        })
+        project_id = assert_success_response(response, 201)['data']['project_id']
+        with app.app_context():
+            page = Page(project_id=project_id, order_index=0)
+            page.generated_image_path = f'{project_id}/pages/p1_v1.png'
+            page.cached_image_path = f'{project_id}/pages/p1_v1_thumb.jpg'
+            db.session.add(page)
+            db.session.commit()
+        
+        data = assert_success_response(client.get('/api/projects?view=summary&limit=100'))['data']
+        project = next(p for p in data['projects'] if p['project_id'] == project_id)
+        assert project['image_page_count'] == 1
+        assert project['cover_image_url'] == f'/files/{project_id}/pages/p1_v1_thumb.jpg?w=512'
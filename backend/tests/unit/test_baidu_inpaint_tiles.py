@@ -0,0 +1,55 @@
+"""
+百度图像修复分块测试
+
+验证大图按区域簇切成图块分别请求，并只把矩形区域贴回原图
+"""
+
+import threading
+
+from PIL import Image
+
+from services.ai_providers.image.baidu_inpainting_provider import BaiduInpaintingProvider
+
+
+class RecordingBaiduProvider(BaiduInpaintingProvider):
+    """不发请求：记录每次请求的图片尺寸，并把整张图涂成白色"""
+
+    def __init__(self):
+        super().__init__('test-token')
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def inpaint(self, image, rectangles):
+        with self._lock:
+            self.requests.append((image.size, list(rectangles)))
+        return Image.new('RGB', image.size, (255, 255, 255))
+
+
+def test_small_image_single_request():
+    provider = RecordingBaiduProvider()
+    image = Image.new('RGB', (1600, 900), (0, 0, 255))
+
+    provider.inpaint_bboxes(image, [(100, 100, 200, 150), (1300, 700, 1400, 750)], expand_pixels=0)
+
+    assert [size for size, _ in provider.requests] == [(1600, 900)]
+
+
+def test_large_image_split_into_tiles():
+    provider = RecordingBaiduProvider()
+    image = Image.new('RGB', (3840, 2160), (0, 0, 255))
+    bboxes = [(100, 100, 400, 160), (100, 180, 400, 240), (3000, 1800, 3500, 1900)]
+
+    result = provider.inpaint_bboxes(image, bboxes, expand_pixels=0)
+
+    sizes = sorted(size for size, _ in provider.requests)
+    # 前两行文字距离很近，合并为同一图块
+    assert len(sizes) == 2
+    assert all(w * h < 3840 * 2160 / 10 for w, h in sizes)
+    assert sum(len(rects) for _, rects in provider.requests) == 3
+
+    assert result.size == image.size
+    assert result.getpixel((250, 130)) == (255, 255, 255)
+    assert result.getpixel((3200, 1850)) == (255, 255, 255)
+    # 图块里的上下文和两行之间的空隙不被修改
+    assert result.getpixel((250, 170)) == (0, 0, 255)
+    assert result.getpixel((50, 50)) == (0, 0, 255)
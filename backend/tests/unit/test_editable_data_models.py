@@ -0,0 +1,55 @@
+"""
+可编辑元素数据模型测试
+
+验证 __slots__ 数据类的紧凑序列化可以无损往返
+"""
+
+import json
+
+from services.image_editability import BBox, EditableElement, EditableImage
+
+
+def _make_image():
+    child = EditableElement(
+        element_id='a_0_0',
+        element_type='text',
+        bbox=BBox(1, 2, 30, 12),
+        bbox_global=BBox(101, 202, 130, 212),
+        content='hello'
+    )
+    element = EditableElement(
+        element_id='a_0',
+        element_type='image',
+        bbox=BBox(100, 200, 400, 500),
+        bbox_global=BBox(100, 200, 400, 500),
+        image_path='/tmp/a_0.png',
+        children=[child],
+        inpainted_background_path='/tmp/a_0_bg.png',
+        metadata={'source': 'mineru'}
+    )
+    return EditableImage(
+        image_id='a',
+        image_path='/tmp/page.png',
+        width=1920,
+        height=1080,
+        elements=[element],
+        clean_background='/tmp/bg.png'
+    )
+
+
+def test_compact_round_trip():
+    image = _make_image()
+
+    compact = json.loads(json.dumps(image.to_compact()))
+    restored = EditableImage.from_compact(compact)
+
+    assert restored == image
+    assert restored.to_dict() == image.to_dict()
+    assert len(json.dumps(compact)) < len(json.dumps(image.to_dict()))
+
+
+def test_models_use_slots():
+    image = _make_image()
+
+    for obj in (image, image.elements[0], image.elements[0].bbox):
+        assert not hasattr(obj, '__dict__')
@@ -0,0 +1,41 @@
+"""
+导出服务测试
+
+验证 PAGE_IMAGE_FORMAT=webp 保存的页面原图可以导出为 PPTX（python-pptx 不支持 WebP）
+"""
+
+import io
+
+from PIL import Image
+from pptx import Presentation
+
+from config import Config
+from services.export_service import ExportService
+from services.file_service import FileService
+
+
+def test_pptx_export_with_webp_page_images(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'PAGE_IMAGE_FORMAT', 'webp')
+    file_service = FileService(str(tmp_path))
+    image_paths = [
+        file_service.get_absolute_path(
+            file_service.save_generated_image(Image.new('RGB', (160, 90), color), 'proj', f'page{i}', version_number=1)
+        )
+        for i, color in enumerate([(200, 30, 30), (30, 200, 30)])
+    ]
+    assert all(path.endswith('_v1.webp') for path in image_paths)
+
+    pptx_bytes = ExportService.create_pptx_from_images(image_paths)
+
+    prs = Presentation(io.BytesIO(pptx_bytes))
+    assert len(prs.slides) == 2
+    for slide in prs.slides:
+        picture = slide.shapes[0]
+        assert picture.image.content_type == 'image/png'
+        assert Image.open(io.BytesIO(picture.image.blob)).size == (160, 90)
+
+
+def test_picture_source_keeps_supported_formats(tmp_path):
+    png_path = str(tmp_path / 'bg.png')
+    Image.new('RGB', (8, 8)).save(png_path)
+    assert ExportService._pptx_picture_source(png_path) == png_path
@@ -0,0 +1,75 @@
+"""
+混合重绘按区域画质提升测试
+
+验证只把被修复区域（带上下文）的图块送入生成式模型，并贴回原图
+"""
+
+import threading
+from types import SimpleNamespace
+
+from PIL import Image
+
+from services.image_editability import HybridInpaintProvider, InpaintProvider
+
+
+class PassthroughProvider(InpaintProvider):
+    def inpaint_regions(self, image, bboxes, types=None, **kwargs):
+        return image.copy()
+
+
+class FakeAIService:
+    """记录每次调用的图片尺寸和参数，返回纯红色图片（尺寸故意与输入不同）"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def edit_image(self, prompt, current_image_path, aspect_ratio, resolution, **kwargs):
+        with Image.open(current_image_path) as tile:
+            with self._lock:
+                self.calls.append((tile.size, aspect_ratio, resolution))
+        return Image.new('RGB', (1024, 1024), (255, 0, 0))
+
+
+def _provider(ai_service, **kwargs):
+    generative = SimpleNamespace(ai_service=ai_service, aspect_ratio='16:9', resolution='2K')
+    return HybridInpaintProvider(PassthroughProvider(), generative, **kwargs)
+
+
+class TestRegionEnhancement:
+    """按区域画质提升测试"""
+
+    def test_only_tiles_are_enhanced(self):
+        ai_service = FakeAIService()
+        image = Image.new('RGB', (1600, 900), (0, 0, 255))
+        bboxes = [(100, 100, 300, 140), (1200, 700, 1400, 760)]
+
+        result = _provider(ai_service, tile_padding=32, feather_pixels=0).inpaint_regions(image, bboxes)
+
+        assert result.size == image.size
+        assert len(ai_service.calls) == 2
+        for size, aspect_ratio, resolution in ai_service.calls:
+            assert size[0] * size[1] < 1600 * 900 * 0.2
+            assert aspect_ratio in HybridInpaintProvider.TILE_ASPECT_RATIOS
+            assert resolution == '1K'
+        # 修复区域被替换，图块外和图块内的非修复区域保持原样
+        assert result.getpixel((200, 120)) == (255, 0, 0)
+        assert result.getpixel((1300, 730)) == (255, 0, 0)
+        assert result.getpixel((800, 450)) == (0, 0, 255)
+        assert result.getpixel((100 - 20, 120)) == (0, 0, 255)
+
+    def test_large_area_falls_back_to_full_image(self):
+        ai_service = FakeAIService()
+        image = Image.new('RGB', (1600, 900), (0, 0, 255))
+
+        _provider(ai_service).inpaint_regions(image, [(100, 100, 1500, 800)])
+
+        assert ai_service.calls == [((1600, 900), '16:9', '2K')]
+
+    def test_full_mode(self):
+        ai_service = FakeAIService()
+        image = Image.new('RGB', (1600, 900), (0, 0, 255))
+
+        _provider(ai_service, enhance_mode='full').inpaint_regions(image, [(100, 100, 300, 140)])
+
+        assert ai_service.calls == [((1600, 900), '16:9', '2K')]
@@ -0,0 +1,158 @@
+"""
+批量图片生成流水线测试
+
+验证准备 → 生成 → 持久化三级流水线中每一页都会产出结果（失败的页面不会让任务卡住），
+持久化阶段的交接有界，原图按 PAGE_IMAGE_FORMAT 保存
+"""
+
+import threading
+
+import pytest
+from PIL import Image
+
+from services.file_service import FileService
+from services.task_manager import generate_images_task
+
+
+class FakeAIService:
+    """不调用模型：按页面返回纯色图片，可指定生成失败的页面"""
+
+    image_provider = None
+
+    def __init__(self, fail_pages=()):
+        self.fail_pages = set(fail_pages)
+        self.generated = 0
+        self._lock = threading.Lock()
+
+    def flatten_outline(self, outline):
+        return outline
+
+    def extract_image_urls_from_markdown(self, text):
+        return []
+
+    def generate_image_prompt(self, outline, page_data, desc_text, page_index, **kwargs):
+        return f"page {page_index}"
+
+    def generate_image(self, prompt, ref_image_path=None, aspect_ratio='16:9', resolution='2K', **kwargs):
+        if prompt in self.fail_pages:
+            raise RuntimeError('model error')
+        with self._lock:
+            self.generated += 1
+        return Image.new('RGB', (64, 36), (20, 40, 60))
+
+
+@pytest.fixture
+def project_pages(app):
+    from models import db, Project, Page, Task
+
+    with app.app_context():
+        project = Project(creation_type='idea')
+        db.session.add(project)
+        db.session.flush()
+        pages = []
+        for index in range(4):
+            page = Page(project_id=project.id, order_index=index)
+            page.set_description_content({'text': f'第 {index + 1} 页'})
+            db.session.add(page)
+            pages.append(page)
+        task = Task(project_id=project.id, task_type='GENERATE_IMAGES')
+        db.session.add(task)
+        db.session.commit()
+        yield project.id, task.id, [page.id for page in pages]
+
+        for page in Page.query.filter_by(project_id=project.id):
+            db.session.delete(page)
+        db.session.delete(Task.query.get(task.id))
+        db.session.delete(Project.query.get(project.id))
+        db.session.commit()
+
+
+def _run(app, project_id, task_id, ai_service, max_workers=2):
+    outline = [{'title': f'p{i}'} for i in range(4)]
+    generate_images_task(
+        task_id, project_id, ai_service, FileService(app.config['UPLOAD_FOLDER']), outline,
+        use_template=False, max_workers=max_workers, app=app
+    )
+
+
+def test_every_page_reports_a_result(app, project_pages):
+    from models import Page, Task
+
+    project_id, task_id, page_ids = project_pages
+    _run(app, project_id, task_id, FakeAIService(fail_pages={'page 2'}))
+
+    with app.app_context():
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED'
+        assert task.get_progress() == {'total': 4, 'completed': 3, 'failed': 1}
+        statuses = [Page.query.get(page_id).status for page_id in page_ids]
+        assert statuses[1] == 'FAILED'
+
+
+def test_submit_failure_does_not_hang(app, project_pages, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from models import Task
+
+    project_id, task_id, _ = project_pages
+    original_submit = ThreadPoolExecutor.submit
+
+    def flaky_submit(self, fn, *args, **kwargs):
+        if fn.__name__ == 'persist_page_image' and args[0] == project_pages[2][0]:
+            raise RuntimeError('cannot schedule new futures after shutdown')
+        return original_submit(self, fn, *args, **kwargs)
+
+    monkeypatch.setattr(ThreadPoolExecutor, 'submit', flaky_submit)
+    worker = threading.Thread(target=_run, args=(app, project_id, task_id, FakeAIService()), daemon=True)
+    worker.start()
+    worker.join(timeout=10)
+
+    assert not worker.is_alive()
+    with app.app_context():
+        assert Task.query.get(task_id).get_progress() == {'total': 4, 'completed': 3, 'failed': 1}
+
+
+def test_persist_stage_is_bounded_and_uses_page_image_format(app, project_pages, monkeypatch):
+    import os
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from config import Config
+    from models import Page
+
+    project_id, task_id, page_ids = project_pages
+    monkeypatch.setattr(Config, 'PAGE_IMAGE_FORMAT', 'webp')
+    monkeypatch.setitem(app.config, 'IMAGE_IO_WORKERS', 1)
+
+    # 统计已交给 I/O 线程池但还没写完的图片数
+    lock = threading.Lock()
+    counts = {'handed_off': 0, 'saved': 0, 'max_pending': 0}
+    original_submit = ThreadPoolExecutor.submit
+    original_save = FileService.save_generated_image
+
+    def counting_submit(self, fn, *args, **kwargs):
+        if fn.__name__ == 'persist_page_image':
+            with lock:
+                counts['handed_off'] += 1
+                counts['max_pending'] = max(counts['max_pending'], counts['handed_off'] - counts['saved'])
+        return original_submit(self, fn, *args, **kwargs)
+
+    def slow_save(self, *args, **kwargs):
+        time.sleep(0.1)  # 编码慢于生成
+        path = original_save(self, *args, **kwargs)
+        with lock:
+            counts['saved'] += 1
+        return path
+
+    monkeypatch.setattr(ThreadPoolExecutor, 'submit', counting_submit)
+    monkeypatch.setattr(FileService, 'save_generated_image', slow_save)
+    _run(app, project_id, task_id, FakeAIService(), max_workers=4)
+
+    # 生成线程在 I/O 槽位空闲前持有图片，不在无界队列中堆积
+    assert counts['saved'] == 4
+    assert counts['max_pending'] == 1
+
+    with app.app_context():
+        for page_id in page_ids:
+            image_path = Page.query.get(page_id).generated_image_path
+            assert image_path.endswith('_v1.webp')
+            with Image.open(os.path.join(app.config['UPLOAD_FOLDER'], image_path)) as image:
+                assert image.format == 'WEBP'
@@ -0,0 +1,103 @@
+"""
+图片编码负载缓存测试
+
+验证同一图片文件只编码一次、可接受格式直接透传原始字节、超限时重新编码
+"""
+
+import os
+import pytest
+from unittest.mock import MagicMock
+from PIL import Image
+
+from services.ai_service import AIService, ReferenceImageBundle
+from utils.image_payload import encode_image, encode_image_file, clear_image_payload_cache, share_image
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    clear_image_payload_cache()
+    yield
+    clear_image_payload_cache()
+
+
+@pytest.fixture
+def png_path(tmp_path):
+    path = tmp_path / 'ref.png'
+    Image.new('RGB', (200, 100), color='red').save(path)
+    return str(path)
+
+
+class TestEncodeImageFile:
+    """文件编码测试"""
+
+    def test_passthrough_accepted_format(self, png_path):
+        encoded = encode_image_file(png_path, accepted_formats=('PNG',))
+        assert encoded.passthrough
+        assert encoded.mime_type == 'image/png'
+        with open(png_path, 'rb') as f:
+            assert encoded.data == f.read()
+
+    def test_reencode_when_format_not_accepted(self, png_path):
+        encoded = encode_image_file(png_path, target_format='JPEG', accepted_formats=('JPEG',))
+        assert not encoded.passthrough
+        assert encoded.mime_type == 'image/jpeg'
+        assert encoded.data[:2] == b'\xff\xd8'
+
+    def test_resize_respects_max_side(self, png_path):
+        encoded = encode_image_file(png_path, max_side=50, accepted_formats=('PNG',))
+        assert not encoded.passthrough
+        assert encoded.size == (50, 25)
+        assert encoded.source_size == (200, 100)
+
+    def test_cached_until_file_changes(self, png_path):
+        first = encode_image_file(png_path)
+        assert encode_image_file(png_path) is first
+
+        Image.new('RGB', (300, 100), color='blue').save(png_path)
+        os.utime(png_path, ns=(0, os.stat(png_path).st_mtime_ns + 1_000_000))
+        second = encode_image_file(png_path)
+        assert second is not first
+        assert second.source_size == (300, 100)
+
+
+class TestEncodeImage:
+    """PIL图片编码测试"""
+
+    def test_file_backed_image_uses_cache(self, png_path):
+        with Image.open(png_path) as img:
+            encoded = encode_image(img, accepted_formats=('PNG',))
+        assert encoded is encode_image_file(png_path, accepted_formats=('PNG',))
+
+    def test_in_memory_image_is_encoded(self):
+        encoded = encode_image(Image.new('RGBA', (10, 10)), target_format='JPEG')
+        assert encoded.mime_type == 'image/jpeg'
+        assert encoded.data_url.startswith('data:image/jpeg;base64,')
+
+    def test_shared_image_encoded_once(self):
+        image = share_image(Image.new('RGB', (10, 10)))
+        assert encode_image(image) is encode_image(image)
+
+
+class TestReferenceImageBundle:
+    """任务级参考图缓存测试"""
+
+    @pytest.fixture
+    def ai_service(self):
+        service = MagicMock()
+        service.image_provider.MAX_REFERENCE_IMAGE_SIDE = 100
+        service.load_reference_image.side_effect = lambda ref: AIService.load_reference_image(service, ref)
+        return service
+
+    def test_loads_and_downsizes_once(self, ai_service, png_path):
+        bundle = ReferenceImageBundle(ai_service)
+        first = bundle.get(png_path)
+        assert first.size == (100, 50)
+        assert bundle.get(png_path) is first
+        ai_service.load_reference_image.assert_called_once_with(png_path)
+
+    def test_small_image_keeps_file_backing(self, ai_service, tmp_path):
+        path = tmp_path / 'small.png'
+        Image.new('RGB', (50, 20)).save(path)
+        image = ReferenceImageBundle(ai_service).get(str(path))
+        assert image.size == (50, 20)
+        assert image.filename == str(path)
@@ -0,0 +1,128 @@
+"""
+本地重绘快速路径测试
+
+验证纯色/渐变背景在本地填充，纹理背景交给回退提供者
+"""
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from services.image_editability import (
+    ElementExtractor,
+    ExtractorRegistry,
+    ImageEditabilityService,
+    InpaintProvider,
+    InpaintProviderRegistry,
+    LocalInpaintProvider,
+    ServiceConfig,
+)
+from services.image_editability.extractors import ExtractionResult
+
+
+class RecordingProvider(InpaintProvider):
+    """记录收到的区域，并把区域涂成白色"""
+
+    def __init__(self):
+        self.calls = []
+
+    def inpaint_regions(self, image, bboxes, types=None, **kwargs):
+        self.calls.append((list(bboxes), types))
+        result = image.copy()
+        draw = ImageDraw.Draw(result)
+        for bbox in bboxes:
+            draw.rectangle(bbox, fill=(255, 255, 255))
+        return result
+
+
+class SingleTextExtractor(ElementExtractor):
+    """返回固定的一个文字元素"""
+
+    def extract(self, image_path, element_type=None, **kwargs):
+        return ExtractionResult(elements=[{'bbox': [50, 50, 150, 80], 'type': 'text'}])
+
+    def supports_type(self, element_type):
+        return True
+
+
+def _gradient(width=400, height=200):
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    array = np.stack([20 + x / 2 + y / 8, 100 + y / 4, 200 - x / 4], axis=2)
+    return Image.fromarray(np.clip(array, 0, 255).astype(np.uint8), 'RGB')
+
+
+class TestLocalInpaintProvider:
+    """本地快速路径测试"""
+
+    def test_flat_background_handled_locally(self):
+        image = Image.new('RGB', (300, 200), (30, 60, 90))
+        ImageDraw.Draw(image).rectangle((50, 50, 150, 80), fill=(255, 255, 255))
+        fallback = RecordingProvider()
+
+        result = LocalInpaintProvider(fallback_provider=fallback).inpaint_regions(
+            image, [(50, 50, 150, 80)], types=['text'], expand_pixels=4
+        )
+
+        assert fallback.calls == []
+        assert np.abs(np.asarray(result, dtype=int) - (30, 60, 90)).max() <= 1
+
+    def test_gradient_background_interpolated(self):
+        clean = _gradient()
+        image = clean.copy()
+        ImageDraw.Draw(image).rectangle((120, 60, 260, 110), fill=(0, 0, 0))
+
+        result = LocalInpaintProvider().inpaint_regions(image, [(120, 60, 260, 110)], expand_pixels=4)
+
+        diff = np.abs(np.asarray(result, dtype=int) - np.asarray(clean, dtype=int))
+        assert diff.max() <= 2
+
+    def test_textured_region_escalated(self):
+        rng = np.random.default_rng(0)
+        noise = rng.integers(0, 256, size=(200, 400, 3), dtype=np.uint8)
+        image = _gradient()
+        image.paste(Image.fromarray(noise[:80, :120]), (250, 100))
+        fallback = RecordingProvider()
+
+        result = LocalInpaintProvider(fallback_provider=fallback).inpaint_regions(
+            image, [(20, 20, 80, 40), (280, 120, 340, 160)], types=['text', 'image'], expand_pixels=4
+        )
+
+        # 只有纹理区域被发送到远程，且远程收到的是已在本地填充过的图片
+        assert fallback.calls == [([(280, 120, 340, 160)], ['image'])]
+        assert result.getpixel((300, 140)) == (255, 255, 255)
+        assert result.getpixel((50, 30)) != (255, 255, 255)
+
+    def test_local_only_declines_textured_regions(self):
+        rng = np.random.default_rng(1)
+        image = Image.fromarray(rng.integers(0, 256, size=(200, 400, 3), dtype=np.uint8))
+        flat = Image.new('RGB', (300, 200), (30, 60, 90))
+        fallback = RecordingProvider()
+        provider = LocalInpaintProvider(fallback_provider=fallback)
+
+        # 预检查模式：任何区域需要远程重绘时返回 None，由调用方走原有重绘流程
+        assert provider.inpaint_regions(image, [(100, 50, 200, 120)], local_only=True) is None
+        assert fallback.calls == []
+        assert provider.inpaint_regions(flat, [(50, 50, 150, 80)], local_only=True) is not None
+
+
+def test_service_precheck_follows_config(tmp_path):
+    image_path = tmp_path / 'page.png'
+    image = Image.new('RGB', (300, 200), (30, 60, 90))
+    ImageDraw.Draw(image).rectangle((50, 50, 150, 80), fill=(255, 255, 255))
+    image.save(image_path)
+
+    def run(**options):
+        remote = RecordingProvider()
+        config = ServiceConfig(
+            upload_folder=tmp_path,
+            extractor_registry=ExtractorRegistry().register_default(SingleTextExtractor()),
+            inpaint_registry=InpaintProviderRegistry().register_default(remote),
+            **options
+        )
+        ImageEditabilityService(config).make_image_editable(str(image_path))
+        return remote.calls
+
+    # 纯色背景由预检查本地填充；关闭 LOCAL_INPAINT_ENABLED 后总是走远程重绘
+    assert run() == []
+    assert len(run(local_inpaint=False)) == 1
+    # 预检查使用配置的置信度阈值（阈值高于 1 时本地结果永不被接受）
+    assert len(run(local_inpaint_min_confidence=1.01)) == 1
@@ -0,0 +1,119 @@
+"""
+本地OCR提取器测试
+
+验证本地OCR输出与百度高精度OCR相同的元素格式，以及作为混合提取器快速首轮时的回退逻辑
+"""
+
+from services.image_editability import (
+    ElementExtractor,
+    HybridElementExtractor,
+    LocalOCRElementExtractor,
+)
+from services.image_editability.extractors import ExtractionResult
+
+
+def fake_engine(lines):
+    def run(image_path):
+        return lines, [0.01]
+    return run
+
+
+class CountingExtractor(ElementExtractor):
+    def __init__(self, elements=None):
+        self.calls = 0
+        self.elements = elements or []
+
+    def supports_type(self, element_type):
+        return True
+
+    def extract(self, image_path, element_type=None, **kwargs):
+        self.calls += 1
+        return ExtractionResult(elements=list(self.elements))
+
+
+def test_local_ocr_element_format():
+    engine = fake_engine([
+        [[[10.2, 20], [110, 20], [110, 40.6], [10.2, 40.6]], '标题', 0.98],
+        [[[0, 0], [5, 0], [5, 5], [0, 5]], '噪点', 0.2],
+        [[[0, 50], [50, 50], [50, 60], [0, 60]], '  ', 0.99],
+    ])
+
+    result = LocalOCRElementExtractor(ocr_engine=engine).extract('slide.png')
+
+    assert result.elements == [{
+        'bbox': [10, 20, 110, 41],
+        'type': 'text',
+        'content': '标题',
+        'image_path': None,
+        'metadata': {'line_idx': 0, 'source': 'local_ocr', 'probability': {'average': 0.98, 'min': 0.98}},
+    }]
+
+
+def test_hybrid_skips_remote_ocr_when_local_is_confident():
+    local = LocalOCRElementExtractor(ocr_engine=fake_engine([
+        [[[10, 10], [90, 10], [90, 30], [10, 30]], 'hello', 0.97],
+    ]))
+    remote = CountingExtractor()
+    hybrid = HybridElementExtractor(CountingExtractor(), remote, fast_ocr_extractor=local)
+
+    result = hybrid.extract('slide.png')
+
+    assert remote.calls == 0
+    assert [e['metadata']['source'] for e in result.elements] == ['local_ocr']
+
+
+def test_hybrid_falls_back_to_remote_ocr():
+    local = LocalOCRElementExtractor(ocr_engine=fake_engine([
+        [[[10, 10], [90, 10], [90, 30], [10, 30]], 'he1lo', 0.6],
+    ]))
+    remote = CountingExtractor([{'bbox': [10, 10, 90, 30], 'type': 'text', 'content': 'hello', 'metadata': {}}])
+    hybrid = HybridElementExtractor(CountingExtractor(), remote, fast_ocr_extractor=local)
+
+    result = hybrid.extract('slide.png')
+
+    assert remote.calls == 1
+    assert [e['content'] for e in result.elements] == ['hello']
+
+
+def test_engine_failure_is_reported():
+    def broken(image_path):
+        raise RuntimeError('model missing')
+
+    result = LocalOCRElementExtractor(ocr_engine=broken).extract('slide.png')
+
+    assert result.elements == []
+    assert result.context.metadata['error'] == 'model missing'
+
+
+def test_hybrid_falls_back_on_dropped_or_empty_lines():
+    remote = CountingExtractor([{'bbox': [10, 10, 90, 30], 'type': 'text', 'content': 'hello', 'metadata': {}}])
+
+    # 低于 min_score 被本地提取器丢弃的行同样触发兜底
+    dropped = LocalOCRElementExtractor(ocr_engine=fake_engine([
+        [[[10, 10], [90, 10], [90, 30], [10, 30]], 'hello', 0.97],
+        [[[10, 40], [90, 40], [90, 60], [10, 60]], 'w0rld', 0.3],
+    ]))
+    HybridElementExtractor(CountingExtractor(), remote, fast_ocr_extractor=dropped).extract('slide.png')
+    assert remote.calls == 1
+
+    # 本地没有识别出任何文字时不视为可信
+    empty = LocalOCRElementExtractor(ocr_engine=fake_engine([]))
+    result = HybridElementExtractor(CountingExtractor(), remote, fast_ocr_extractor=empty).extract('slide.png')
+    assert remote.calls == 2
+    assert [e['content'] for e in result.elements] == ['hello']
+
+
+def test_local_method_does_not_require_mineru_token(monkeypatch, tmp_path):
+    from services.image_editability import ServiceConfig
+
+    monkeypatch.setattr(LocalOCRElementExtractor, 'is_available', staticmethod(lambda: True))
+
+    config = ServiceConfig.from_defaults(
+        mineru_token='',
+        upload_folder=str(tmp_path),
+        extractor_method='local',
+        inpaint_method='generative',
+        ai_service=object()
+    )
+
+    assert isinstance(config.extractor_registry.get_extractor(None), LocalOCRElementExtractor)
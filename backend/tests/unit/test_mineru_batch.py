@@ -0,0 +1,135 @@
+"""
+MinerU批量提交与自适应轮询测试
+
+验证并发的单文件解析请求被合并为一次MinerU批量任务，并发的图片被打包为一个多页PDF，
+且轮询间隔按历史耗时自适应
+"""
+
+import json
+import threading
+import pytest
+from unittest.mock import patch
+from PIL import Image
+
+from services.file_parser_service import FileParserService, MinerUBatchSubmitter, MinerUImageBatcher
+from services.image_editability import MinerUElementExtractor
+
+
+@pytest.fixture
+def parser_service():
+    return FileParserService(mineru_token='mock-token')
+
+
+class TestMinerUBatchSubmitter:
+    """批量提交测试"""
+
+    def test_concurrent_submissions_share_one_batch(self, parser_service):
+        """窗口期内的并发请求只触发一次批量解析，并各自拿到自己的结果"""
+        calls = []
+
+        def fake_parse_files_batch(files, max_wait_time=600):
+            calls.append([name for _, name in files])
+            return {name: (f'# {name}', f'extract_{name}', None) for _, name in files}
+
+        submitter = MinerUBatchSubmitter(parser_service, batch_window=0.2)
+        with patch.object(parser_service, 'parse_files_batch', side_effect=fake_parse_files_batch):
+            futures = {}
+            threads = []
+            for i in range(5):
+                name = f'image_{i}.pdf'
+                t = threading.Thread(target=lambda n=name: futures.__setitem__(n, submitter.submit('/tmp/x.pdf', n)))
+                threads.append(t)
+                t.start()
+            for t in threads:
+                t.join()
+
+            results = {name: f.result(timeout=5) for name, f in futures.items()}
+
+        assert len(calls) == 1
+        assert sorted(calls[0]) == sorted(futures.keys())
+        assert results['image_3.pdf'] == ('# image_3.pdf', 'extract_image_3.pdf', None)
+
+    def test_max_batch_size_flushes_immediately(self, parser_service):
+        """达到批量上限时立即提交，不等待窗口期"""
+        with patch.object(parser_service, 'parse_files_batch',
+                          side_effect=lambda files, max_wait_time=600: {n: ('md', 'id', None) for _, n in files}) as mocked:
+            submitter = MinerUBatchSubmitter(parser_service, batch_window=60, max_batch_size=2)
+            f1 = submitter.submit('/tmp/a.pdf', 'a.pdf')
+            f2 = submitter.submit('/tmp/b.pdf', 'b.pdf')
+            assert f1.result(timeout=5) == ('md', 'id', None)
+            assert f2.result(timeout=5) == ('md', 'id', None)
+            mocked.assert_called_once()
+
+    def test_batch_exception_propagates_to_all_waiters(self, parser_service):
+        """批量任务异常时，所有等待者都收到异常"""
+        with patch.object(parser_service, 'parse_files_batch', side_effect=RuntimeError('boom')):
+            submitter = MinerUBatchSubmitter(parser_service, batch_window=0.05)
+            f1 = submitter.submit('/tmp/a.pdf', 'a.pdf')
+            f2 = submitter.submit('/tmp/b.pdf', 'b.pdf')
+            with pytest.raises(RuntimeError):
+                f1.result(timeout=5)
+            with pytest.raises(RuntimeError):
+                f2.result(timeout=5)
+
+
+class TestMinerUImageBatcher:
+    """多图打包为单个PDF测试"""
+
+    def test_images_packed_into_one_pdf(self, parser_service, tmp_path):
+        paths = []
+        for i, size in enumerate([(320, 180), (200, 300), (64, 64)]):
+            path = tmp_path / f'slide_{i}.png'
+            Image.new('RGB', size, (i * 80, 0, 0)).save(path)
+            paths.append(str(path))
+        uploads = []
+
+        def fake_parse_files_batch(files, max_wait_time=600):
+            uploads.extend(files)
+            return {name: ('md', 'extract_1', None) for _, name in files}
+
+        batcher = MinerUImageBatcher(parser_service, batch_window=0.2)
+        with patch.object(parser_service, 'parse_files_batch', side_effect=fake_parse_files_batch):
+            futures = [batcher.submit(p) for p in paths + [str(tmp_path / 'missing.png')]]
+            results = [f.result(timeout=5) for f in futures]
+
+        # 一次上传，内存中的PDF每张图片一页
+        assert len(uploads) == 1
+        pdf_bytes, _ = uploads[0]
+        assert isinstance(pdf_bytes, bytes)
+        assert pdf_bytes.count(b'/Type /Page') - pdf_bytes.count(b'/Type /Pages') == 3
+        assert results[:3] == [('extract_1', 0, None), ('extract_1', 1, None), ('extract_1', 2, None)]
+        assert results[3][0] is None and 'missing.png' in results[3][2]
+
+    def test_extract_reads_own_page(self, parser_service, tmp_path):
+        result_dir = tmp_path / 'mineru_files' / 'extract_1'
+        result_dir.mkdir(parents=True)
+        pages = [
+            {'page_size': [100, 50], 'para_blocks': [{'type': 'title', 'bbox': [10, 10, 50, 20],
+                                                        'lines': [{'spans': [{'type': 'text', 'content': 'first'}]}]}]},
+            {'page_size': [50, 100], 'para_blocks': [{'type': 'text', 'bbox': [5, 5, 25, 10],
+                                                        'lines': [{'spans': [{'type': 'text', 'content': 'second'}]}]}]},
+        ]
+        (result_dir / 'layout.json').write_text(json.dumps({'pdf_info': pages}))
+        (result_dir / 'x_content_list.json').write_text('[]')
+
+        extractor = MinerUElementExtractor(parser_service, tmp_path)
+        elements = extractor._extract_from_result(str(result_dir), (200, 400), depth=0, page_index=1)
+
+        assert [(e['content'], e['bbox']) for e in elements] == [('second', [20.0, 20.0, 100.0, 40.0])]
+
+
+class TestAdaptivePolling:
+    """自适应轮询间隔测试"""
+
+    def test_backoff_without_history(self):
+        with patch.object(FileParserService, '_observed_parse_seconds', None):
+            intervals = [FileParserService._next_poll_interval(0, attempt) for attempt in range(10)]
+        assert intervals[0] == FileParserService.POLL_MIN_INTERVAL
+        assert intervals == sorted(intervals)
+        assert intervals[-1] == FileParserService.POLL_MAX_INTERVAL
+
+    def test_waits_until_expected_completion(self):
+        with patch.object(FileParserService, '_observed_parse_seconds', 6.0):
+            assert FileParserService._next_poll_interval(1.0, 0) == pytest.approx(5.0)
+            # 已超过历史耗时：回到指数退避
+            assert FileParserService._next_poll_interval(7.0, 0) == FileParserService.POLL_MIN_INTERVAL
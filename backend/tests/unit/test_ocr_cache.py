@@ -0,0 +1,75 @@
+"""
+OCR结果缓存测试
+
+验证相同图片内容 + 相同参数不再重复请求，以及按容量淘汰
+"""
+
+import pytest
+from PIL import Image
+
+from config import Config
+from services.ai_providers.ocr import BaiduAccurateOCRProvider, OCRResultCache, get_ocr_cache
+
+
+class CountingAccurateProvider(BaiduAccurateOCRProvider):
+    """不发请求：记录请求次数，返回固定的原始响应"""
+
+    def __init__(self):
+        super().__init__('test-token')
+        self.requests = []
+
+    def _request_api(self, image_path, form_data):
+        self.requests.append(form_data)
+        response = {
+            'log_id': len(self.requests),
+            'words_result_num': 1,
+            'words_result': [{'words': 'hello', 'location': {'left': 1, 'top': 2, 'width': 30, 'height': 10}}],
+        }
+        return response, (64, 32)
+
+
+@pytest.fixture
+def ocr_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'OCR_CACHE_ENABLED', True)
+    monkeypatch.setattr(Config, 'OCR_CACHE_DIR', str(tmp_path / 'ocr_cache'))
+    return tmp_path
+
+
+def test_identical_content_hits_cache(ocr_cache_dir):
+    first = ocr_cache_dir / 'a.png'
+    copy = ocr_cache_dir / 'b.png'
+    Image.new('RGB', (64, 32), (10, 20, 30)).save(first)
+    copy.write_bytes(first.read_bytes())
+    provider = CountingAccurateProvider()
+
+    result = provider.recognize(str(first))
+    cached = provider.recognize(str(copy))
+
+    # 内容相同的不同文件只请求一次，解析结果一致
+    assert len(provider.requests) == 1
+    assert cached['text_lines'] == result['text_lines']
+    assert cached['image_size'] == (64, 32)
+
+    # 参数不同则重新请求
+    provider.recognize(str(copy), language_type='ENG')
+    assert len(provider.requests) == 2
+
+    stats = get_ocr_cache().stats()
+    assert stats['hits'] == 1 and stats['entries'] == 2
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = OCRResultCache(str(tmp_path), max_bytes=250)
+    value = {'response': {'words': 'x' * 60}}
+    keys = [OCRResultCache.make_key('baidu_table', str(i), {}) for i in range(3)]
+
+    cache.put(keys[0], value)
+    cache.put(keys[1], value)
+    assert cache.get(keys[0]) == value  # keys[0] 变为最近使用
+    cache.put(keys[2], value)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == value
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['entries'] == 2
+    assert stats['hit_rate'] == pytest.approx(2 / 3)
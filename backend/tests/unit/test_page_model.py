@@ -0,0 +1,84 @@
+"""
+Page模型单元测试
+"""
+
+from models import Page
+
+
+class TestPageParsedContentCache:
+    """页面JSON内容解析缓存测试"""
+    
+    def test_parsed_content_is_cached(self):
+        page = Page(project_id='p', order_index=0)
+        page.set_outline_content({'title': '第一页', 'points': ['要点1']})
+        
+        first = page.get_outline_content()
+        assert first == {'title': '第一页', 'points': ['要点1']}
+        assert page.get_outline_content() is first
+    
+    def test_cache_invalidated_on_set(self):
+        page = Page(project_id='p', order_index=0)
+        page.set_description_content({'text': '旧描述'})
+        assert page.get_description_content()['text'] == '旧描述'
+        
+        page.set_description_content({'text': '新描述'})
+        assert page.get_description_content()['text'] == '新描述'
+        
+        page.set_description_content(None)
+        assert page.get_description_content() is None
+    
+    def test_cache_invalidated_on_direct_assignment(self):
+        page = Page(project_id='p', order_index=0)
+        page.set_outline_content({'title': 'A'})
+        assert page.get_outline_content()['title'] == 'A'
+        
+        page.outline_content = '{"title": "B"}'
+        assert page.get_outline_content()['title'] == 'B'
+        
+        page.outline_content = 'not json'
+        assert page.get_outline_content() is None
+
+
+class TestOutlineSnapshot:
+    """项目大纲快照缓存测试"""
+    
+    def test_snapshot_reused_until_outline_changes(self, client):
+        from models import db, Project
+        from utils.outline_utils import get_outline_snapshot, clear_outline_snapshots
+        
+        db_session = db.session
+        clear_outline_snapshots()
+        project = Project(creation_type='outline')
+        db_session.add(project)
+        db_session.commit()
+        pages = []
+        for i, part in enumerate(['第一部分', '第一部分', None]):
+            page = Page(project_id=project.id, order_index=i, part=part)
+            page.set_outline_content({'title': f'页面{i}'})
+            pages.append(page)
+        db_session.add_all(pages)
+        db_session.commit()
+        
+        snapshot = get_outline_snapshot(project.id)
+        assert snapshot.outline == [
+            {'part': '第一部分', 'pages': [{'title': '页面0'}, {'title': '页面1'}]},
+            {'title': '页面2'}
+        ]
+        assert snapshot.flat_outline[1] == {'title': '页面1', 'part': '第一部分'}
+        
+        # 与大纲无关的字段变化不影响快照
+        pages[0].status = 'GENERATING'
+        db_session.commit()
+        assert get_outline_snapshot(project.id) is snapshot
+        
+        # 大纲内容变化后重新构建
+        pages[2].set_outline_content({'title': '新标题'})
+        db_session.commit()
+        rebuilt = get_outline_snapshot(project.id)
+        assert rebuilt is not snapshot
+        assert rebuilt.outline[-1] == {'title': '新标题'}
+        
+        # 删除页面后重新构建
+        db_session.delete(pages[1])
+        db_session.commit()
+        assert get_outline_snapshot(project.id).outline[0]['pages'] == [{'title': '页面0'}]
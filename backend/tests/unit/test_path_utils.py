@@ -0,0 +1,79 @@
+"""
+MinerU 文件前缀匹配测试
+"""
+
+import os
+import pytest
+
+from utils import path_utils
+from utils.path_utils import build_prefix_index, clear_prefix_indexes, find_file_with_prefix
+
+
+@pytest.fixture(autouse=True)
+def _clear_indexes():
+    clear_prefix_indexes()
+    yield
+    clear_prefix_indexes()
+
+
+@pytest.fixture
+def extract_dir(tmp_path):
+    images = tmp_path / 'extract' / 'images'
+    images.mkdir(parents=True)
+    for name in ('abcdef123456.jpg', 'abcdef999.png', 'zzzzzz000.jpg'):
+        (images / name).write_bytes(b'x')
+    return tmp_path / 'extract'
+
+
+def test_direct_and_prefix_match(extract_dir):
+    images = extract_dir / 'images'
+    assert find_file_with_prefix(images / 'zzzzzz000.jpg') == images / 'zzzzzz000.jpg'
+    assert find_file_with_prefix(images / 'ABCDEF.jpg') == images / 'abcdef123456.jpg'
+    assert find_file_with_prefix(images / 'abcdef.png') == images / 'abcdef999.png'
+    assert find_file_with_prefix(images / 'abcdef.gif') is None
+    assert find_file_with_prefix(images / 'abc.jpg') is None
+
+
+def test_manifest_avoids_directory_listing(extract_dir, monkeypatch):
+    build_prefix_index(extract_dir)
+    assert (extract_dir / path_utils.PREFIX_INDEX_MANIFEST).is_file()
+
+    def fail_listdir(path):
+        raise AssertionError(f"unexpected listdir({path})")
+
+    monkeypatch.setattr(path_utils.os, 'listdir', fail_listdir)
+    images = extract_dir / 'images'
+    assert find_file_with_prefix(images / 'abcdef.jpg') == images / 'abcdef123456.jpg'
+    assert find_file_with_prefix(images / 'zzzzzz.jpg') == images / 'zzzzzz000.jpg'
+
+
+def test_listing_cache_refreshes_when_directory_changes(extract_dir):
+    images = extract_dir / 'images'
+    assert find_file_with_prefix(images / 'newfile.jpg') is None
+
+    (images / 'newfile_1.jpg').write_bytes(b'x')
+    os.utime(images, ns=(0, images.stat().st_mtime_ns + 1_000_000))
+    assert find_file_with_prefix(images / 'newfile.jpg') == images / 'newfile_1.jpg'
+
+
+def test_mineru_path_resolves_through_storage(tmp_path, monkeypatch):
+    import services.storage
+    from services.storage import LocalObjectStoreBackend
+    from utils.path_utils import find_mineru_file_with_prefix
+
+    storage = LocalObjectStoreBackend(
+        str(tmp_path / 'uploads'),
+        object_root=str(tmp_path / 'objects'),
+        secret_key='test-secret',
+    )
+    monkeypatch.setattr(services.storage, 'get_storage', lambda upload_folder=None: storage)
+    key = storage.save_bytes('mineru_files/ext1/images/abcdef123456.jpg', b'x')
+
+    # 模拟另一个节点：解析结果只在对象存储中，按前缀查找时先拉到上传目录
+    storage.local_path(key).unlink()
+    path = find_mineru_file_with_prefix('/files/mineru/ext1/images/abcdef.jpg')
+    assert path == tmp_path / 'uploads' / 'mineru_files' / 'ext1' / 'images' / 'abcdef123456.jpg'
+    assert path.read_bytes() == b'x'
+
+    assert find_mineru_file_with_prefix('/files/mineru/../secret.txt') is None
+    assert find_mineru_file_with_prefix('/files/other/ext1/a.jpg') is None
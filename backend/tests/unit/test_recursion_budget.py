@@ -0,0 +1,89 @@
+"""
+递归预算测试
+
+验证页面总是完整处理、子元素按面积从大到小占用预算，用尽后保留为图片并记录
+"""
+
+from PIL import Image
+
+from services.export_service import ExportWarnings
+from services.image_editability import (
+    ElementExtractor,
+    ExtractorRegistry,
+    ImageEditabilityService,
+    InpaintProviderRegistry,
+    RecursionBudget,
+    ServiceConfig,
+)
+from services.image_editability.extractors import ExtractionResult
+
+
+class FakeExtractor(ElementExtractor):
+    """页面上有三张不同大小的图片，每张子图里有一段文字"""
+
+    def extract(self, image_path, element_type=None, **kwargs):
+        if kwargs.get('depth', 0) == 0:
+            elements = [
+                {'bbox': [0, 0, 100, 100], 'type': 'image'},
+                {'bbox': [200, 0, 500, 300], 'type': 'image'},
+                {'bbox': [0, 300, 200, 500], 'type': 'image'},
+            ]
+        else:
+            elements = [{'bbox': [5, 5, 50, 20], 'type': 'text', 'content': 'hi'}]
+        return ExtractionResult(elements=elements)
+
+    def supports_type(self, element_type):
+        return True
+
+
+def _make_service(tmp_path):
+    registry = ExtractorRegistry().register_default(FakeExtractor())
+    config = ServiceConfig(
+        upload_folder=tmp_path,
+        extractor_registry=registry,
+        inpaint_registry=InpaintProviderRegistry(),
+        max_depth=2,
+        min_image_size=50,
+        min_image_area=2500
+    )
+    return ImageEditabilityService(config)
+
+
+def test_budget_keeps_largest_children(tmp_path):
+    page = tmp_path / 'page.png'
+    Image.new('RGB', (600, 600), (255, 255, 255)).save(page)
+    service = _make_service(tmp_path)
+
+    # 页面用掉 2 次远程调用，剩下的只够两个子元素
+    budget = RecursionBudget(max_remote_calls=6)
+    result = service.make_image_editable(str(page), budget=budget)
+
+    children = {e.bbox.area: len(e.children) for e in result.elements}
+    assert children == {90000: 1, 40000: 1, 10000: 0}
+    assert [s['reason'] for s in budget.skipped] == ['remote_calls']
+    assert budget.to_dict()['elements'] == 5
+
+    warnings = ExportWarnings()
+    for skipped in budget.skipped:
+        warnings.add_budget_skipped(**skipped)
+    assert warnings.has_warnings()
+    assert warnings.to_dict()['total_warnings'] == 1
+
+
+def test_element_budget_clips_child_result(tmp_path):
+    page = tmp_path / 'page.png'
+    Image.new('RGB', (600, 600), (255, 255, 255)).save(page)
+    service = _make_service(tmp_path)
+
+    # 页面 3 个元素，剩余额度只够第一个子图保留 1 个元素；已提取的结果不丢弃
+    budget = RecursionBudget(max_elements=4)
+    result = service.make_image_editable(str(page), budget=budget)
+
+    children = {e.bbox.area: len(e.children) for e in result.elements}
+    assert sorted(children.values()) == [0, 0, 1]
+    assert budget.elements == 4
+    assert {s['reason'] for s in budget.skipped} == {'elements'}
+
+
+def test_unlimited_budget_from_config():
+    assert RecursionBudget.from_config() is None
@@ -0,0 +1,77 @@
+"""
+存储后端测试
+
+使用本地对象存储替身验证提交、读穿透缓存、删除和预签名下载
+"""
+
+import os
+import pytest
+
+from services.storage import LocalObjectStoreBackend, LocalStorageBackend
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalObjectStoreBackend(
+        str(tmp_path / 'cache'),
+        object_root=str(tmp_path / 'objects'),
+        secret_key='test-secret',
+    )
+
+
+class TestLocalObjectStoreBackend:
+    """对象存储替身测试"""
+
+    def test_commit_and_read_through(self, storage, tmp_path):
+        key = storage.save_bytes('p1/pages/a_v1.png', b'image-bytes')
+        assert (tmp_path / 'objects' / 'p1/pages/a_v1.png').read_bytes() == b'image-bytes'
+
+        # 模拟另一个节点：本地缓存缺失时从对象存储拉取
+        storage.local_path(key).unlink()
+        path = storage.ensure_local(key)
+        assert path is not None and path.read_bytes() == b'image-bytes'
+        assert storage.ensure_local('p1/pages/missing.png') is None
+
+    def test_validate_refreshes_overwritten_object(self, storage, tmp_path):
+        key = storage.save_bytes('p1/template/template.png', b'old')
+        object_path = tmp_path / 'objects' / key
+        object_path.write_bytes(b'newer')
+        os.utime(object_path, (0, storage.local_path(key).stat().st_mtime + 10))
+
+        assert storage.ensure_local(key).read_bytes() == b'old'
+        assert storage.ensure_local(key, validate=True).read_bytes() == b'newer'
+
+    def test_delete_prefix_and_list(self, storage):
+        storage.save_bytes('p1/pages/a.png', b'a')
+        storage.save_bytes('p1/exports/b.pdf', b'b')
+        storage.save_bytes('p2/pages/c.png', b'c')
+        assert storage.list_keys('p1') == ['p1/exports/b.pdf', 'p1/pages/a.png']
+
+        storage.delete_prefix('p1')
+        assert storage.list_keys('p1') == []
+        assert not storage.exists('p1/pages/a.png')
+        assert storage.exists('p2/pages/c.png')
+
+    def test_presigned_download_token(self, storage):
+        key = storage.save_bytes('p1/exports/deck.pdf', b'pdf')
+        url = storage.get_download_url(key, filename='deck.pdf')
+        assert url.startswith('/files/_object/')
+
+        object_path, download_name = storage.resolve_download_token(url.rsplit('/', 1)[1])
+        assert object_path.read_bytes() == b'pdf'
+        assert download_name == 'deck.pdf'
+        assert storage.resolve_download_token('tampered') is None
+
+    def test_rejects_path_traversal(self, storage):
+        with pytest.raises(ValueError):
+            storage.local_path('../outside.txt')
+
+
+def test_local_backend_is_passthrough(tmp_path):
+    storage = LocalStorageBackend(str(tmp_path))
+    (tmp_path / 'p1').mkdir()
+    (tmp_path / 'p1' / 'a.png').write_bytes(b'a')
+    storage.commit('p1/a.png')
+    assert storage.ensure_local('p1/a.png') == tmp_path / 'p1' / 'a.png'
+    assert storage.delete('p1/a.png')
+    assert not storage.exists('p1/a.png')
@@ -0,0 +1,184 @@
+"""
+上传目录回收测试
+
+验证按时间、按版本数和按磁盘预算的回收策略，以及数据库引用保护
+"""
+
+import os
+import time
+import uuid
+import pytest
+
+from services.storage_gc_service import StorageGarbageCollector
+
+OLD = time.time() - 3 * 24 * 3600
+
+
+def _write(path, size=10, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * size)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    return tmp_path / 'uploads'
+
+
+def _collector(upload_dir, **kwargs):
+    options = dict(keep_image_versions=0, min_age_minutes=0)
+    options.update(kwargs)
+    return StorageGarbageCollector(str(upload_dir), **options)
+
+
+class TestStorageGarbageCollector:
+    """回收策略测试"""
+
+    def test_expires_transient_files(self, app, upload_dir):
+        _write(upload_dir / 'editable_images' / 'old' / 'elements' / 'a.png', 100, OLD)
+        _write(upload_dir / 'editable_images' / 'new' / 'mask.png', 100)
+        _write(upload_dir / 'tmpabc12345' / 'ref.png', 50, OLD)
+        _write(upload_dir / 'mineru_files' / 'stale' / 'full.md', 30, OLD)
+
+        with app.app_context():
+            report = _collector(upload_dir).run()
+
+        assert not (upload_dir / 'editable_images' / 'old').exists()
+        assert (upload_dir / 'editable_images' / 'new' / 'mask.png').exists()
+        assert not (upload_dir / 'tmpabc12345').exists()
+        assert not (upload_dir / 'mineru_files' / 'stale').exists()
+        assert report.reclaimed_bytes == {'editable_images': 100, 'temp': 50, 'mineru': 30}
+        assert report.total_reclaimed == 180
+
+    def test_keeps_referenced_mineru_results(self, app, upload_dir):
+        from models import db, ReferenceFile
+
+        extract_id = f"ref-{uuid.uuid4().hex[:8]}"
+        _write(upload_dir / 'mineru_files' / extract_id / 'images' / 'a.jpg', mtime=OLD)
+        with app.app_context():
+            ref = ReferenceFile(
+                filename='doc.pdf', file_path='reference_files/doc.pdf', file_size=1, file_type='pdf',
+                markdown_content=f"![](/files/mineru/{extract_id}/images/a.jpg)",
+            )
+            db.session.add(ref)
+            db.session.commit()
+            try:
+                _collector(upload_dir).run()
+            finally:
+                db.session.delete(ref)
+                db.session.commit()
+
+        assert (upload_dir / 'mineru_files' / extract_id / 'images' / 'a.jpg').exists()
+
+    def test_prunes_old_versions_and_orphans(self, app, upload_dir):
+        from models import db, Project, Page, PageImageVersion
+
+        with app.app_context():
+            project = Project(creation_type='idea')
+            db.session.add(project)
+            db.session.flush()
+            page = Page(project_id=project.id, order_index=0)
+            db.session.add(page)
+            db.session.flush()
+
+            pages_dir = upload_dir / project.id / 'pages'
+            for number in (1, 2, 3):
+                image_path = f"{project.id}/pages/{page.id}_v{number}.png"
+                _write(upload_dir / image_path, 100, OLD)
+                _write(pages_dir / f"{page.id}_v{number}_thumb.jpg", 10, OLD)
+                _write(pages_dir / f"{page.id}_v{number}_w320.webp", 5, OLD)
+                db.session.add(PageImageVersion(
+                    page_id=page.id, image_path=image_path, version_number=number, is_current=(number == 1),
+                ))
+            page.generated_image_path = f"{project.id}/pages/{page.id}_v1.png"
+            _write(pages_dir / 'stray.png', 7, OLD)
+            _write(upload_dir / str(uuid.uuid4()) / 'pages' / 'gone.png', 9, OLD)
+            db.session.commit()
+
+            report = _collector(upload_dir, keep_image_versions=1).run()
+
+            remaining = sorted(v.version_number for v in PageImageVersion.query.filter_by(page_id=page.id))
+            # 保留最新版本和当前版本，v2 被回收
+            assert remaining == [1, 3]
+            assert not (pages_dir / f"{page.id}_v2.png").exists()
+            assert not (pages_dir / f"{page.id}_v2_w320.webp").exists()
+            assert (pages_dir / f"{page.id}_v1_thumb.jpg").exists()
+            assert (pages_dir / f"{page.id}_v3_w320.webp").exists()
+            assert not (pages_dir / 'stray.png').exists()
+            assert report.reclaimed_bytes == {'versions': 115, 'orphans': 16}
+
+            db.session.delete(project)
+            db.session.commit()
+
+    def test_budget_evicts_oldest_first(self, app, upload_dir):
+        project_id = str(uuid.uuid4())
+        _write(upload_dir / 'editable_images' / 'a' / 'bg.png', 600 * 1024, time.time() - 7200)
+        _write(upload_dir / 'editable_images' / 'b' / 'bg.png', 600 * 1024, time.time() - 3600)
+        _write(upload_dir / 'materials' / 'keep.png', 100 * 1024)
+
+        with app.app_context():
+            from models import db, Project
+            db.session.add(Project(id=project_id, creation_type='idea'))
+            db.session.commit()
+            _write(upload_dir / project_id / 'exports' / 'deck.pptx', 600 * 1024, time.time() - 60)
+            try:
+                report = _collector(upload_dir, max_total_mb=1, min_age_minutes=0.5).run(dry_run=True)
+                assert report.deleted == {'editable_images': 2}
+                assert (upload_dir / 'editable_images' / 'a').exists()
+
+                report = _collector(upload_dir, max_total_mb=1, min_age_minutes=0.5).run()
+            finally:
+                db.session.delete(Project.query.get(project_id))
+                db.session.commit()
+
+        assert not (upload_dir / 'editable_images' / 'a').exists()
+        assert not (upload_dir / 'editable_images' / 'b').exists()
+        assert (upload_dir / project_id / 'exports' / 'deck.pptx').exists()
+        assert (upload_dir / 'materials' / 'keep.png').exists()
+        assert report.total_reclaimed == 1200 * 1024
+
+    def test_skips_when_collected_within_interval(self, app, upload_dir):
+        from services.storage_gc_service import run_storage_gc
+
+        upload_dir.mkdir(parents=True)
+        original = app.config['UPLOAD_FOLDER']
+        app.config['UPLOAD_FOLDER'] = str(upload_dir)
+        try:
+            run_storage_gc(app, min_interval=3600)
+            _write(upload_dir / 'editable_images' / 'old' / 'a.png', 100, OLD)
+
+            # 本周期内已回收过（可能是其他 worker），跳过
+            assert run_storage_gc(app, min_interval=3600).total_reclaimed == 0
+            assert (upload_dir / 'editable_images' / 'old').exists()
+
+            # 手动触发（不限间隔）总是执行
+            assert run_storage_gc(app).total_reclaimed == 100
+        finally:
+            app.config['UPLOAD_FOLDER'] = original
+
+
+    def test_defaults_keep_exports_and_version_history(self, app, upload_dir):
+        from config import Config
+        from models import db, Project
+
+        collector = StorageGarbageCollector.from_config(Config, str(upload_dir))
+        assert collector.export_ttl == 0
+        assert collector.keep_image_versions == 0
+
+        with app.app_context():
+            project = Project(creation_type='idea')
+            db.session.add(project)
+            db.session.commit()
+            export_file = _write(upload_dir / project.id / 'exports' / 'deck.pptx', 100, OLD)
+            _write(upload_dir / 'editable_images' / 'old' / 'mask.png', 100, OLD)
+            try:
+                report = collector.run()
+            finally:
+                db.session.delete(project)
+                db.session.commit()
+
+        # 默认只回收中间产物，导出文件保留
+        assert export_file.exists()
+        assert report.reclaimed_bytes == {'editable_images': 100}
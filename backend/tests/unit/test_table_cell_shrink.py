@@ -0,0 +1,51 @@
+"""
+表格单元格收缩测试
+
+验证排序扫描计算的最小间距与逐对比较完全一致
+"""
+
+import random
+
+from services.image_editability.extractors import BaiduOCRElementExtractor, _min_cell_gap
+
+
+def pairwise_min_gap(bboxes):
+    """逐对比较的参考实现"""
+    min_gap = float('inf')
+    for i, (x0_1, y0_1, x1_1, y1_1) in enumerate(bboxes):
+        for x0_2, y0_2, x1_2, y1_2 in bboxes[i + 1:]:
+            x_overlap = not (x1_1 <= x0_2 or x1_2 <= x0_1)
+            y_overlap = not (y1_1 <= y0_2 or y1_2 <= y0_1)
+            if x_overlap and y_overlap:
+                min_gap = min(min_gap, -min(min(x1_1, x1_2) - max(x0_1, x0_2), min(y1_1, y1_2) - max(y0_1, y0_2)))
+            elif x_overlap:
+                min_gap = min(min_gap, y0_2 - y1_1 if y1_1 <= y0_2 else y0_1 - y1_2)
+            elif y_overlap:
+                min_gap = min(min_gap, x0_2 - x1_1 if x1_1 <= x0_2 else x0_1 - x1_2)
+    return min_gap
+
+
+def test_matches_pairwise_reference():
+    rng = random.Random(0)
+    for _ in range(500):
+        bboxes = []
+        for _ in range(rng.randint(0, 25)):
+            x0, y0 = float(rng.randint(0, 60)), float(rng.randint(0, 60))
+            bboxes.append([x0, y0, x0 + rng.choice([0, 0.5, 3, 12, 30]), y0 + rng.choice([0, 1.5, 8, 20])])
+        assert _min_cell_gap(bboxes) == pairwise_min_gap(bboxes)
+
+
+def test_shrinks_overlapping_table():
+    rng = random.Random(1)
+    cells = []
+    for r in range(20):
+        for c in range(30):
+            cells.append({'bbox': [
+                c * 60 - rng.randint(0, 3), r * 24 - rng.randint(0, 3),
+                (c + 1) * 60 + rng.randint(0, 3), (r + 1) * 24 + rng.randint(0, 3),
+            ]})
+
+    shrunk = BaiduOCRElementExtractor(None)._shrink_cells_to_avoid_overlap(cells, depth=0)
+
+    assert _min_cell_gap([c['bbox'] for c in cells]) < 0
+    assert _min_cell_gap(shrunk) >= 6
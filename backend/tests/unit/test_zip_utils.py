@@ -0,0 +1,31 @@
+"""
+流式 ZIP 生成测试
+"""
+
+import io
+import os
+import zipfile
+
+from utils.zip_utils import stream_zip
+
+
+def test_stream_zip_roundtrip(tmp_path):
+    png = tmp_path / 'a.png'
+    png.write_bytes(os.urandom(300 * 1024))
+    txt = tmp_path / 'notes.txt'
+    txt.write_bytes(b'hello ' * 1000)
+
+    chunks = list(stream_zip(
+        [(png, 'a.png'), (txt, 'notes.txt'), (png, 'a.png'), (tmp_path / 'missing.png', 'missing.png')],
+        chunk_size=16 * 1024,
+    ))
+    # 数据按块输出，不会一次性缓存整个归档
+    assert len(chunks) > 10
+    assert max(len(chunk) for chunk in chunks) < 64 * 1024
+
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+        assert archive.namelist() == ['a.png', 'notes.txt', 'a_1.png']
+        assert archive.getinfo('a.png').compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo('notes.txt').compress_type == zipfile.ZIP_DEFLATED
+        assert archive.read('a_1.png') == png.read_bytes()
+        assert archive.testzip() is None
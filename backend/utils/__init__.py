@@ -9,9 +9,13 @@ from .response import (
     rate_limit_error
 )
 from .validators import validate_project_status, validate_page_status, allowed_file
-from .path_utils import convert_mineru_path_to_local, find_mineru_file_with_prefix, find_file_with_prefix
+from .path_utils import convert_mineru_path_to_local, find_mineru_file_with_prefix, find_file_with_prefix, find_storage_file_with_prefix, build_prefix_index
 from .pptx_builder import PPTXBuilder
 from .page_utils import parse_page_ids_from_query, parse_page_ids_from_body, get_filtered_pages
+from .http_utils import get_http_session, close_http_sessions
+from .image_payload import EncodedImage, encode_image, encode_image_file
+from .outline_utils import build_outline, get_outline_snapshot
+from .zip_utils import stream_zip
 
 __all__ = [
     'success_response',
@@ -27,9 +31,19 @@ __all__ = [
     'convert_mineru_path_to_local',
     'find_mineru_file_with_prefix',
     'find_file_with_prefix',
+    'find_storage_file_with_prefix',
+    'build_prefix_index',
     'PPTXBuilder',
     'parse_page_ids_from_query',
     'parse_page_ids_from_body',
-    'get_filtered_pages'
+    'get_filtered_pages',
+    'get_http_session',
+    'close_http_sessions',
+    'EncodedImage',
+    'encode_image',
+    'encode_image_file',
+    'build_outline',
+    'get_outline_snapshot',
+    'stream_zip'
 ]
 
@@ -0,0 +1,94 @@
+"""
+HTTP utilities - shared, pooled requests sessions for outbound API clients
+"""
+import threading
+import logging
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _build_session(pool_connections: int, pool_maxsize: int, max_retries: int) -> requests.Session:
+    """
+    创建带连接池和重试策略的Session
+
+    重试只覆盖连接错误和网关类状态码（502/503/504）；
+    状态码重试仅针对幂等方法，POST 的业务错误仍由调用方（tenacity）处理。
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=max_retries,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_http_session(
+    name: str,
+    pool_connections: Optional[int] = None,
+    pool_maxsize: Optional[int] = None,
+    max_retries: Optional[int] = None
+) -> requests.Session:
+    """
+    获取进程内共享的HTTP Session（按名称区分，例如 'baidu'、'mineru'）
+
+    同一名称的Session在进程内只创建一次，所有Provider实例复用同一个连接池，
+    避免每次请求都重新建立 TCP + TLS 连接。requests.Session 的连接池基于
+    urllib3，可以被多个线程并发使用。
+
+    Args:
+        name: Session名称（通常为服务提供方）
+        pool_connections: 缓存的host连接池数量，默认读取 Config.HTTP_POOL_CONNECTIONS
+        pool_maxsize: 每个host的最大keep-alive连接数，默认读取 Config.HTTP_POOL_MAXSIZE
+        max_retries: 连接失败时的重试次数，默认读取 Config.HTTP_MAX_RETRIES
+
+    Returns:
+        requests.Session实例
+    """
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            from config import Config
+            pool_connections = pool_connections or Config.HTTP_POOL_CONNECTIONS
+            pool_maxsize = pool_maxsize or Config.HTTP_POOL_MAXSIZE
+            if max_retries is None:
+                max_retries = Config.HTTP_MAX_RETRIES
+            session = _build_session(pool_connections, pool_maxsize, max_retries)
+            _sessions[name] = session
+            logger.info(
+                f"创建共享HTTP Session: {name} "
+                f"(pool_connections={pool_connections}, pool_maxsize={pool_maxsize}, max_retries={max_retries})"
+            )
+    return session
+
+
+def close_http_sessions() -> None:
+    """关闭并清空所有共享Session（用于进程退出或测试）"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
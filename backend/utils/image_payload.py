@@ -0,0 +1,262 @@
+"""
+Image payload utilities - encode images for provider requests once and reuse the bytes
+
+模板参考图、页面图片等会在多次请求中重复发送给各个Provider（OpenAI / GenAI / 百度）。
+这里按 (源文件, mtime, 目标格式/尺寸) 缓存编码结果，同一张图片在进程内只编码一次；
+如果源文件本身已经是Provider接受的格式，则直接透传原始字节，不做解码和重新编码。
+"""
+import io
+import os
+import base64
+import logging
+import threading
+import urllib.parse
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+_MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+    'BMP': 'image/bmp',
+    'GIF': 'image/gif',
+}
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    """编码后的图片负载（不可变，可在线程间共享）"""
+    data: bytes
+    mime_type: str
+    size: Tuple[int, int]  # 编码后图片尺寸 (width, height)
+    source_size: Tuple[int, int]  # 源图片尺寸 (width, height)
+    passthrough: bool = False  # 是否直接透传了源文件字节
+
+    @cached_property
+    def base64(self) -> str:
+        """base64字符串（首次访问时计算并缓存）"""
+        return base64.b64encode(self.data).decode('utf-8')
+
+    @cached_property
+    def base64_urlquoted(self) -> str:
+        """URL编码后的base64字符串（百度表单接口使用）"""
+        return urllib.parse.quote(self.base64)
+
+    @property
+    def data_url(self) -> str:
+        """data URL格式（OpenAI image_url 使用）"""
+        return f"data:{self.mime_type};base64,{self.base64}"
+
+
+class _PayloadCache:
+    """按字节数限制容量的线程安全LRU缓存"""
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._entries: 'OrderedDict[tuple, EncodedImage]' = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[EncodedImage]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, value: EncodedImage) -> None:
+        size = len(value.data)
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= len(old.data)
+            self._entries[key] = value
+            self._total_bytes += size
+            while self._total_bytes > self._max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted.data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+
+def _create_cache() -> _PayloadCache:
+    from config import Config
+    return _PayloadCache(Config.IMAGE_PAYLOAD_CACHE_MB * 1024 * 1024)
+
+
+_cache = _create_cache()
+
+# 共享的只读内存图片（按 id 登记，图片对象被回收时自动移除）-> 各编码参数下的编码结果
+_shared_encodings: Dict[int, Dict[tuple, EncodedImage]] = {}
+_shared_lock = threading.Lock()
+
+
+def _fit_size(width: int, height: int, max_side: Optional[int]) -> Tuple[int, int]:
+    """计算等比缩放后的尺寸（最长边不超过max_side）"""
+    if not max_side or (width <= max_side and height <= max_side):
+        return width, height
+    ratio = min(max_side / width, max_side / height)
+    return int(width * ratio), int(height * ratio)
+
+
+def _encode_pil(
+    image: Image.Image,
+    target_format: str,
+    quality: int,
+    max_side: Optional[int]
+) -> EncodedImage:
+    """把PIL图片重新编码为目标格式"""
+    source_size = image.size
+    if target_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    new_size = _fit_size(image.width, image.height, max_side)
+    if new_size != image.size:
+        image = image.resize(new_size, Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    save_kwargs = {'quality': quality} if target_format in ('JPEG', 'WEBP') else {}
+    image.save(buffer, format=target_format, **save_kwargs)
+    return EncodedImage(
+        data=buffer.getvalue(),
+        mime_type=_MIME_TYPES.get(target_format, 'application/octet-stream'),
+        size=image.size,
+        source_size=source_size,
+    )
+
+
+def encode_image_file(
+    path: str,
+    target_format: str = 'JPEG',
+    quality: int = 95,
+    max_side: Optional[int] = None,
+    accepted_formats: Optional[Iterable[str]] = None,
+    max_bytes: Optional[int] = None
+) -> EncodedImage:
+    """
+    编码图片文件（带进程内缓存）
+
+    Args:
+        path: 图片文件路径
+        target_format: 需要重新编码时使用的格式（PIL格式名，如 'JPEG'）
+        quality: JPEG/WEBP 质量
+        max_side: 最长边限制，超过时等比缩放
+        accepted_formats: 可直接透传的源格式（如 {'JPEG', 'PNG'}）；源文件满足格式、
+            尺寸和 max_bytes 限制时直接使用原始字节
+        max_bytes: 透传时允许的最大文件字节数（超过则重新编码）
+
+    Returns:
+        EncodedImage
+    """
+    real_path = os.path.realpath(path)
+    stat = os.stat(real_path)
+    accepted = frozenset(f.upper() for f in accepted_formats) if accepted_formats else frozenset()
+    key = (real_path, stat.st_mtime_ns, stat.st_size, target_format, quality, max_side, accepted, max_bytes)
+
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    with Image.open(real_path) as img:
+        source_format = (img.format or '').upper()
+        can_passthrough = (
+            source_format in accepted
+            and _fit_size(img.width, img.height, max_side) == img.size
+            and (max_bytes is None or stat.st_size <= max_bytes)
+        )
+        if can_passthrough:
+            with open(real_path, 'rb') as f:
+                data = f.read()
+            encoded = EncodedImage(
+                data=data,
+                mime_type=_MIME_TYPES.get(source_format, 'application/octet-stream'),
+                size=img.size,
+                source_size=img.size,
+                passthrough=True,
+            )
+        else:
+            encoded = _encode_pil(img, target_format, quality, max_side)
+
+    logger.debug(
+        f"编码图片负载: {path} -> {encoded.mime_type} {encoded.size}, "
+        f"{len(encoded.data)} bytes, passthrough={encoded.passthrough}"
+    )
+    _cache.put(key, encoded)
+    return encoded
+
+
+def encode_image(
+    image: Union[str, Image.Image],
+    target_format: str = 'JPEG',
+    quality: int = 95,
+    max_side: Optional[int] = None,
+    accepted_formats: Optional[Iterable[str]] = None,
+    max_bytes: Optional[int] = None
+) -> EncodedImage:
+    """
+    编码图片（路径或PIL图片）
+
+    直接从文件打开、未在内存中修改的PIL图片（带 filename 属性）会走文件缓存；
+    通过 share_image 登记的内存图片按图片对象缓存；其他内存图片每次重新编码。
+    参数含义同 encode_image_file。
+    """
+    if isinstance(image, str):
+        return encode_image_file(image, target_format, quality, max_side, accepted_formats, max_bytes)
+
+    filename = getattr(image, 'filename', None)
+    if filename and os.path.isfile(filename):
+        return encode_image_file(filename, target_format, quality, max_side, accepted_formats, max_bytes)
+
+    encodings = _shared_encodings.get(id(image))
+    if encodings is None:
+        return _encode_pil(image, target_format, quality, max_side)
+
+    key = (target_format, quality, max_side)
+    encoded = encodings.get(key)
+    if encoded is None:
+        encoded = _encode_pil(image, target_format, quality, max_side)
+        with _shared_lock:
+            encoded = encodings.setdefault(key, encoded)
+    return encoded
+
+
+def share_image(image: Image.Image) -> Image.Image:
+    """
+    将内存中的PIL图片登记为只读共享图片
+
+    登记后 encode_image 会按编码参数缓存该图片的编码结果，多个线程/请求重复发送同一张
+    图片时只编码一次。调用方需保证登记后不再修改图片像素；图片对象被回收时缓存自动释放。
+
+    Returns:
+        传入的图片对象本身
+    """
+    key = id(image)
+    with _shared_lock:
+        if key not in _shared_encodings:
+            _shared_encodings[key] = {}
+            weakref.finalize(image, _shared_encodings.pop, key, None)
+    return image
+
+
+def is_shared_image(image: Image.Image) -> bool:
+    """图片是否已通过 share_image 登记"""
+    return id(image) in _shared_encodings
+
+
+def clear_image_payload_cache() -> None:
+    """清空编码缓存（用于测试）"""
+    _cache.clear()
+    with _shared_lock:
+        for encodings in _shared_encodings.values():
+            encodings.clear()
@@ -0,0 +1,151 @@
+"""
+Outline utilities - rebuild project outlines from pages and cache versioned snapshots
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 缓存的项目大纲快照数量上限
+OUTLINE_SNAPSHOT_CACHE_SIZE = 256
+
+_snapshots: 'OrderedDict[str, OutlineSnapshot]' = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+
+def build_outline(pages: Iterable[Tuple[Optional[str], Optional[Dict]]]) -> List[Dict]:
+    """
+    Reconstruct outline structure (with optional part grouping) from pages
+
+    Args:
+        pages: (part, outline_content) pairs ordered by order_index
+
+    Returns:
+        Outline structure (list) with optional part grouping
+    """
+    outline = []
+    current_part = None
+    current_part_pages = []
+
+    for part, outline_content in pages:
+        if not outline_content:
+            continue
+
+        page_data = outline_content.copy()
+
+        # 如果当前页面属于一个 part
+        if part:
+            # 如果这是新的 part，先保存之前的 part（如果有）
+            if current_part and current_part != part:
+                outline.append({
+                    "part": current_part,
+                    "pages": current_part_pages
+                })
+                current_part_pages = []
+
+            current_part = part
+            # 移除 part 字段，因为它在顶层
+            if 'part' in page_data:
+                del page_data['part']
+            current_part_pages.append(page_data)
+        else:
+            # 如果当前页面不属于任何 part，先保存之前的 part（如果有）
+            if current_part:
+                outline.append({
+                    "part": current_part,
+                    "pages": current_part_pages
+                })
+                current_part = None
+                current_part_pages = []
+
+            # 直接添加页面
+            outline.append(page_data)
+
+    # 保存最后一个 part（如果有）
+    if current_part:
+        outline.append({
+            "part": current_part,
+            "pages": current_part_pages
+        })
+
+    return outline
+
+
+def build_flat_outline(pages: Iterable[Tuple[Optional[str], Optional[Dict]]]) -> List[Dict]:
+    """
+    Build flat outline (one entry per page, part stored as a field) from pages
+
+    Args:
+        pages: (part, outline_content) pairs ordered by order_index
+    """
+    outline = []
+    for part, outline_content in pages:
+        if outline_content:
+            page_data = outline_content.copy()
+            if part:
+                page_data['part'] = part
+            outline.append(page_data)
+    return outline
+
+
+class OutlineSnapshot:
+    """某个大纲版本下的项目大纲（只读，在请求和后台任务之间共享）"""
+
+    def __init__(self, version: int, pages: List[Tuple[Optional[str], Optional[Dict]]]):
+        self.version = version
+        self.outline = build_outline(pages)
+        self.flat_outline = build_flat_outline(pages)
+
+
+def get_outline_snapshot(project_id: str) -> OutlineSnapshot:
+    """
+    获取项目大纲快照（按 Project.outline_version 缓存）
+
+    命中缓存时只需一次按主键读取版本号；页面增删、排序、大纲或 part 变化都会让版本号自增，
+    下次访问时重新构建。返回的大纲结构是共享的，调用方不要修改。
+
+    Args:
+        project_id: Project ID
+
+    Returns:
+        OutlineSnapshot
+    """
+    from models import db, Project, Page
+
+    version = db.session.query(Project.outline_version).filter(Project.id == project_id).scalar() or 0
+
+    with _snapshots_lock:
+        snapshot = _snapshots.get(project_id)
+        if snapshot is not None and snapshot.version == version:
+            _snapshots.move_to_end(project_id)
+            return snapshot
+
+    rows = db.session.query(Page.part, Page.outline_content)\
+        .filter(Page.project_id == project_id)\
+        .order_by(Page.order_index)\
+        .all()
+    pages = []
+    for part, outline_content in rows:
+        try:
+            pages.append((part, json.loads(outline_content) if outline_content else None))
+        except json.JSONDecodeError:
+            pages.append((part, None))
+
+    snapshot = OutlineSnapshot(version, pages)
+    with _snapshots_lock:
+        _snapshots[project_id] = snapshot
+        _snapshots.move_to_end(project_id)
+        while len(_snapshots) > OUTLINE_SNAPSHOT_CACHE_SIZE:
+            _snapshots.popitem(last=False)
+
+    logger.debug(f"Built outline snapshot for project {project_id} (version {version}, {len(pages)} pages)")
+    return snapshot
+
+
+def clear_outline_snapshots() -> None:
+    """清空大纲快照缓存（用于测试）"""
+    with _snapshots_lock:
+        _snapshots.clear()
@@ -2,48 +2,63 @@
 Path utilities for handling MinerU file paths and prefix matching
 """
 import os
+import json
 import logging
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# MinerU 解压目录中的文件名索引清单（解压时生成，随目录一起提交到存储后端）
+PREFIX_INDEX_MANIFEST = '.prefix_index.json'
 
-def convert_mineru_path_to_local(mineru_path: str, project_root: Optional[Path] = None) -> Optional[Path]:
+# 内存中缓存的目录索引数量上限
+PREFIX_INDEX_CACHE_SIZE = 256
+
+# 前缀匹配要求的最短前缀长度
+MIN_PREFIX_LENGTH = 5
+
+# 目录路径 -> (目录 mtime_ns，None 表示来自清单；按小写排序的 (小写文件名, 文件名) 列表)
+_dir_indexes: 'OrderedDict[str, Tuple[Optional[int], List[Tuple[str, str]]]]' = OrderedDict()
+_dir_indexes_lock = threading.Lock()
+
+
+def convert_mineru_path_to_local(mineru_path: str, upload_folder: Optional[str] = None) -> Optional[Path]:
     """
     将 /files/mineru/{extract_id}/{rel_path} 格式的路径转换为本地文件系统路径
     
+    解析结果保存在上传目录（UPLOAD_FOLDER）下的 mineru_files/ 中，通过存储后端定位；
+    远程存储后端下本地缓存缺失时先从对象存储拉取该文件。
+    
     Args:
         mineru_path: MinerU URL 路径，格式为 /files/mineru/{extract_id}/{rel_path}
-        project_root: 项目根目录路径（如果为 None，则自动计算）
+        upload_folder: 上传目录（如果为 None，则读取 UPLOAD_FOLDER 配置）
         
     Returns:
-        本地文件系统路径（Path 对象），如果转换失败则返回 None
+        本地文件系统路径（Path 对象，不保证存在），如果转换失败则返回 None
     """
     try:
         if not mineru_path.startswith('/files/mineru/'):
             return None
         
-        # Remove '/files/mineru/' prefix
-        rel_path = mineru_path.replace('/files/mineru/', '')
-        
-        # Get project root if not provided
-        if project_root is None:
-            # Navigate to project root (assuming this file is in backend/utils/)
-            current_file = Path(__file__).resolve()
-            backend_dir = current_file.parent.parent
-            project_root = backend_dir.parent
-        
-        # Construct full path: {project_root}/uploads/mineru_files/{rel_path}
-        local_path = project_root / 'uploads' / 'mineru_files' / rel_path
+        from services.storage import get_storage
         
+        # Remove '/files/mineru/' prefix
+        key = f"mineru_files/{mineru_path[len('/files/mineru/'):]}"
+        storage = get_storage(upload_folder)
+        local_path = storage.local_path(key)
+        if storage.is_remote and not local_path.is_file():
+            storage.ensure_local(key)
         return local_path
     except Exception as e:
         logger.warning(f"Failed to convert MinerU path to local: {mineru_path}, error: {str(e)}")
         return None
 
 
-def find_mineru_file_with_prefix(mineru_path: str, project_root: Optional[Path] = None) -> Optional[Path]:
+def find_mineru_file_with_prefix(mineru_path: str, upload_folder: Optional[str] = None) -> Optional[Path]:
     """
     查找 MinerU 文件，支持前缀匹配
     
@@ -53,22 +68,52 @@ def find_mineru_file_with_prefix(mineru_path: str, project_root: Optional[Path]
     
     Args:
         mineru_path: MinerU URL 路径，格式为 /files/mineru/{extract_id}/{rel_path}
-        project_root: 项目根目录路径（如果为 None，则自动计算）
+        upload_folder: 上传目录（如果为 None，则读取 UPLOAD_FOLDER 配置）
         
     Returns:
         找到的文件路径（Path 对象），如果未找到则返回 None
     """
-    # First try direct path conversion
-    local_path = convert_mineru_path_to_local(mineru_path, project_root)
+    if not mineru_path.startswith('/files/mineru/'):
+        return None
     
-    if local_path is None:
+    try:
+        from services.storage import get_storage
+        
+        key = f"mineru_files/{mineru_path[len('/files/mineru/'):]}"
+        return find_storage_file_with_prefix(get_storage(upload_folder), key)
+    except Exception as e:
+        logger.warning(f"Failed to find MinerU file: {mineru_path}, error: {str(e)}")
         return None
+
+
+def find_storage_file_with_prefix(storage, key: str) -> Optional[Path]:
+    """
+    在存储后端中查找文件（支持前缀匹配），返回本地缓存路径
     
-    # Direct file matching
-    if local_path.exists() and local_path.is_file():
+    先在本地缓存中查找；远程存储后端下未命中时拉取该文件，仍找不到（需要前缀匹配）时
+    再把所在目录拉到本地后重新查找。本地目录或索引清单可能只缓存了部分文件，
+    因此以文件是否命中为准，而不是目录是否存在。
+    
+    Args:
+        storage: 存储后端
+        key: 存储键（如 mineru_files/{extract_id}/images/xxx.jpg）
+        
+    Returns:
+        找到的本地文件路径（Path 对象），如果未找到则返回 None
+    
+    Raises:
+        ValueError: key 非法（如包含 ..）
+    """
+    local_path = storage.local_path(key)
+    matched_path = find_file_with_prefix(local_path)
+    if matched_path is not None or not storage.is_remote:
+        return matched_path
+    
+    if storage.ensure_local(key) is not None:
         return local_path
     
-    # Try prefix match using the generic function
+    # 精确文件不存在时需要前缀匹配：把所在目录拉到本地
+    storage.ensure_local_tree(storage.normalize_key(key).rsplit('/', 1)[0])
     return find_file_with_prefix(local_path)
 
 
@@ -78,7 +123,8 @@ def find_file_with_prefix(file_path: Path) -> Optional[Path]:
     
     首先检查文件是否存在，如果不存在则尝试前缀匹配。
     前缀匹配逻辑：如果文件名看起来像是一个前缀+扩展名（前缀长度 >= 5），
-    则在目录中查找以该前缀开头的文件。
+    则在目录中查找以该前缀开头的文件。目录文件名来自索引清单或缓存的排序列表，
+    通过二分查找定位，不会每次都列目录。
     
     Args:
         file_path: 要查找的文件路径（Path 对象）
@@ -87,26 +133,135 @@ def find_file_with_prefix(file_path: Path) -> Optional[Path]:
         找到的文件路径（Path 对象），如果未找到则返回 None
     """
     # Direct file matching
-    if file_path.exists() and file_path.is_file():
+    if file_path.is_file():
         return file_path
     
     # Try prefix match if not found and filename looks like a prefix with extension
     filename = file_path.name
     dirpath = file_path.parent
     
-    if '.' in filename and dirpath.exists() and dirpath.is_dir():
-        prefix, ext = os.path.splitext(filename)
-        if len(prefix) >= 5:
-            try:
-                for fname in os.listdir(dirpath):
-                    fp, fe = os.path.splitext(fname)
-                    if fp.lower().startswith(prefix.lower()) and fe.lower() == ext.lower():
-                        matched_path = dirpath / fname
-                        if matched_path.is_file():
-                            logger.debug(f"Prefix match found: {file_path} -> {matched_path}")
-                            return matched_path
-            except OSError as e:
-                logger.warning(f"Failed to list directory {dirpath}: {str(e)}")
+    if '.' not in filename:
+        return None
+    prefix, ext = os.path.splitext(filename)
+    if len(prefix) < MIN_PREFIX_LENGTH:
+        return None
+    
+    entries = _get_dir_index(dirpath)
+    if not entries:
+        return None
+    
+    # 在按小写排序的文件名中二分定位前缀，只检查以该前缀开头的连续区间
+    prefix_lower = prefix.lower()
+    ext_lower = ext.lower()
+    for lower_name, fname in entries[bisect_left(entries, (prefix_lower,)):]:
+        if not lower_name.startswith(prefix_lower):
+            break
+        if os.path.splitext(lower_name)[1] == ext_lower:
+            matched_path = dirpath / fname
+            if matched_path.is_file():
+                logger.debug(f"Prefix match found: {file_path} -> {matched_path}")
+                return matched_path
+    
+    return None
+
+
+def build_prefix_index(root: Path) -> Dict[str, List[str]]:
+    """
+    为目录树生成文件名索引清单（MinerU 解压完成后调用）
+    
+    清单按子目录记录文件名，前缀查找时直接加载清单，不再列目录。解压目录生成后不会再改变，
+    因此清单无需校验；没有清单的目录回退到列目录并按目录 mtime 缓存。
+    
+    Args:
+        root: 解压目录
+        
+    Returns:
+        {相对子目录: [文件名, ...]}
+    """
+    root = Path(root)
+    dirs = {}
+    for dirpath, _, filenames in os.walk(root):
+        rel_dir = Path(dirpath).relative_to(root).as_posix()
+        names = [name for name in filenames if name != PREFIX_INDEX_MANIFEST]
+        if names:
+            dirs['' if rel_dir == '.' else rel_dir] = sorted(names)
+    
+    manifest_path = root / PREFIX_INDEX_MANIFEST
+    tmp_path = manifest_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'dirs': dirs}, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
     
+    # 索引清单生成后丢弃可能已缓存的列目录结果
+    with _dir_indexes_lock:
+        for key in [k for k in _dir_indexes if k == str(root) or k.startswith(str(root) + os.sep)]:
+            del _dir_indexes[key]
+    
+    logger.debug(f"Built prefix index for {root}: {sum(len(v) for v in dirs.values())} files in {len(dirs)} dirs")
+    return dirs
+
+
+def _get_dir_index(dirpath: Path) -> Optional[List[Tuple[str, str]]]:
+    """获取目录的排序文件名索引：内存缓存 -> 清单 -> 列目录"""
+    key = str(dirpath)
+    with _dir_indexes_lock:
+        cached = _dir_indexes.get(key)
+        if cached is not None:
+            _dir_indexes.move_to_end(key)
+    
+    if cached is not None:
+        if cached[0] is None:
+            # 来自清单的索引不会变化
+            return cached[1]
+        try:
+            # 列目录得到的索引：目录 mtime 未变则仍然有效
+            if dirpath.stat().st_mtime_ns == cached[0]:
+                return cached[1]
+        except OSError:
+            return None
+    
+    entries = _load_index_from_manifest(dirpath)
+    mtime_ns = None
+    if entries is None:
+        try:
+            mtime_ns = dirpath.stat().st_mtime_ns
+        except OSError:
+            return None
+        try:
+            names = os.listdir(dirpath)
+        except OSError as e:
+            logger.warning(f"Failed to list directory {dirpath}: {str(e)}")
+            return None
+        entries = sorted((name.lower(), name) for name in names if name != PREFIX_INDEX_MANIFEST)
+    
+    with _dir_indexes_lock:
+        _dir_indexes[key] = (mtime_ns, entries)
+        _dir_indexes.move_to_end(key)
+        while len(_dir_indexes) > PREFIX_INDEX_CACHE_SIZE:
+            _dir_indexes.popitem(last=False)
+    return entries
+
+
+def _load_index_from_manifest(dirpath: Path) -> Optional[List[Tuple[str, str]]]:
+    """从 dirpath 或其上级目录（最多 3 级）的索引清单中取出该目录的文件列表"""
+    for root in [dirpath, *list(dirpath.parents)[:3]]:
+        manifest_path = root / PREFIX_INDEX_MANIFEST
+        if not manifest_path.is_file():
+            continue
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                dirs = json.load(f).get('dirs', {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to read prefix index {manifest_path}: {str(e)}")
+            return None
+        rel_dir = dirpath.relative_to(root).as_posix()
+        names = dirs.get('' if rel_dir == '.' else rel_dir, [])
+        return sorted((name.lower(), name) for name in names)
     return None
 
+
+def clear_prefix_indexes() -> None:
+    """清空目录索引缓存（用于测试）"""
+    with _dir_indexes_lock:
+        _dir_indexes.clear()
+
@@ -0,0 +1,104 @@
+"""
+Zip utilities - stream ZIP archives with bounded memory
+"""
+import logging
+import os
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 已经压缩过的格式直接存储（STORED），再 DEFLATE 只会浪费 CPU 且几乎不减小体积
+STORED_EXTENSIONS = frozenset({
+    '.png', '.jpg', '.jpeg', '.webp', '.avif', '.gif',
+    '.zip', '.pptx', '.docx', '.xlsx', '.pdf', '.gz', '.mp4',
+})
+
+ZIP_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _ZipSink:
+    """只追加的写入目标：zipfile 写入的数据暂存在缓冲区，由生成器逐块取走"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def stream_zip(files: Iterable[Tuple[Union[str, Path], str]],
+               chunk_size: int = ZIP_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    流式生成 ZIP 文件内容
+
+    写入目标不可 seek，zipfile 会为每个条目写数据描述符，因此无需预先计算 CRC，
+    内存占用只与 chunk_size 有关，与归档总大小无关。图片等已压缩格式使用 STORED。
+
+    Args:
+        files: (文件路径, 归档内文件名) 序列；不存在或读取失败的文件会被跳过
+        chunk_size: 每次读取/输出的块大小
+
+    Yields:
+        ZIP 文件的字节块
+    """
+    sink = _ZipSink()
+    used_names = set()
+
+    with zipfile.ZipFile(sink, 'w') as zip_file:
+        for path, arcname in files:
+            try:
+                arcname = _unique_arcname(arcname, used_names)
+                zinfo = zipfile.ZipInfo.from_file(str(path), arcname)
+                if Path(arcname).suffix.lower() in STORED_EXTENSIONS:
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                else:
+                    zinfo.compress_type = zipfile.ZIP_DEFLATED
+
+                with open(path, 'rb') as src, zip_file.open(zinfo, 'w') as dest:
+                    while True:
+                        chunk = src.read(chunk_size)
+                        if not chunk:
+                            break
+                        dest.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                used_names.add(arcname)
+            except OSError as e:
+                logger.warning(f"Failed to add {path} to zip: {e}")
+
+            data = sink.drain()
+            if data:
+                yield data
+
+    # 中央目录
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def _unique_arcname(arcname: str, used_names: set) -> str:
+    """同名文件追加序号，避免归档内出现重复条目"""
+    if arcname not in used_names:
+        return arcname
+    stem, ext = os.path.splitext(arcname)
+    index = 1
+    while f"{stem}_{index}{ext}" in used_names:
+        index += 1
+    return f"{stem}_{index}{ext}"
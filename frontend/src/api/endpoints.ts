@@ -1,5 +1,5 @@
 import { apiClient } from './client';
-import type { Project, Task, ApiResponse, CreateProjectRequest, Page } from '@/types';
+import type { Project, Task, ApiResponse, CreateProjectRequest, Page, ProjectListResponse, ProjectListView } from '@/types';
 import type { Settings } from '../types/index';
 
 // ===== 项目相关 API =====
@@ -45,15 +45,23 @@ export const uploadTemplate = async (
 
 /**
  * 获取项目列表（历史项目）
- */
-export const listProjects = async (limit?: number, offset?: number): Promise<ApiResponse<{ projects: Project[]; total: number }>> => {
+ * @param options.view - summary 只返回历史列表需要的字段（不含页面）
+ * @param options.cursor - 上一次响应的 next_cursor，传入时忽略 offset
+ */
+export const listProjects = async (
+  limit?: number,
+  offset?: number,
+  options?: { view?: ProjectListView; cursor?: string | null }
+): Promise<ApiResponse<ProjectListResponse>> => {
   const params = new URLSearchParams();
   if (limit !== undefined) params.append('limit', limit.toString());
   if (offset !== undefined) params.append('offset', offset.toString());
+  if (options?.view) params.append('view', options.view);
+  if (options?.cursor) params.append('cursor', options.cursor);
 
   const queryString = params.toString();
   const url = `/api/projects${queryString ? `?${queryString}` : ''}`;
-  const response = await apiClient.get<ApiResponse<{ projects: Project[]; total: number }>>(url);
+  const response = await apiClient.get<ApiResponse<ProjectListResponse>>(url);
   return response.data;
 };
 
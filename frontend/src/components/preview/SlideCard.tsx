@@ -45,6 +45,9 @@ export const SlideCard: React.FC<SlideCardProps> = ({
           <>
             <img
               src={imageUrl}
+              srcSet={page.generated_image_srcset}
+              sizes="(max-width: 768px) 50vw, 320px"
+              loading="lazy"
               alt={`Slide ${index + 1}`}
               className="w-full h-full object-cover"
             />
@@ -38,6 +38,11 @@ const EXTRACTOR_METHOD_OPTIONS: { value: ExportExtractorMethod; label: string; d
     label: 'MinerU提取', 
     description: '仅使用MinerU进行版面分析和文字识别' 
   },
+  { 
+    value: 'local', 
+    label: '本地离线提取', 
+    description: '服务器本地OCR识别文字，不访问外部服务（需安装本地OCR依赖）' 
+  },
 ];
 
 // 背景图获取方法选项
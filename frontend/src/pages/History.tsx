@@ -10,6 +10,9 @@ import { normalizeProject } from '@/utils';
 import { getProjectTitle, getProjectRoute } from '@/utils/projectUtils';
 import type { Project } from '@/types';
 
+// 历史列表每次加载的项目数
+const PAGE_SIZE = 30;
+
 export const History: React.FC = () => {
   const navigate = useNavigate();
   const { syncProject, setCurrentProject } = useProjectStore();
@@ -17,6 +20,8 @@ export const History: React.FC = () => {
   
   const [projects, setProjects] = useState<Project[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [selectedProjects, setSelectedProjects] = useState<Set<string>>(new Set());
   const [isDeleting, setIsDeleting] = useState(false);
@@ -35,10 +40,12 @@ export const History: React.FC = () => {
     setIsLoading(true);
     setError(null);
     try {
-      const response = await api.listProjects(50, 0);
+      // 摘要模式：不加载页面，封面为缩略图
+      const response = await api.listProjects(PAGE_SIZE, undefined, { view: 'summary' });
       if (response.data?.projects) {
         const normalizedProjects = response.data.projects.map(normalizeProject);
         setProjects(normalizedProjects);
+        setNextCursor(response.data.next_cursor);
       }
     } catch (err: any) {
       console.error('加载历史项目失败:', err);
@@ -48,6 +55,28 @@ export const History: React.FC = () => {
     }
   }, []);
 
+  const loadMoreProjects = useCallback(async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      // keyset 分页：从上一页最后一个项目之后继续
+      const response = await api.listProjects(PAGE_SIZE, undefined, { view: 'summary', cursor: nextCursor });
+      if (response.data?.projects) {
+        const normalizedProjects = response.data.projects.map(normalizeProject);
+        setProjects(prev => [...prev, ...normalizedProjects]);
+        setNextCursor(response.data.next_cursor);
+      }
+    } catch (err: any) {
+      console.error('加载更多历史项目失败:', err);
+      show({ 
+        message: '加载更多失败: ' + (err.message || '未知错误'), 
+        type: 'error' 
+      });
+    } finally {
+      setIsLoadingMore(false);
+    }
+  }, [nextCursor, show]);
+
   // ===== 项目选择与导航 =====
 
   const handleSelectProject = useCallback(async (project: Project) => {
@@ -218,6 +247,14 @@ export const History: React.FC = () => {
       return;
     }
 
+    // 名称未修改时不保存（摘要模式的标题可能被截断，不能写回）
+    const editingProject = projects.find(p => (p.id || p.project_id) === projectId);
+    if (editingProject && getProjectTitle(editingProject) === editingTitle.trim()) {
+      setEditingProjectId(null);
+      setEditingTitle('');
+      return;
+    }
+
     try {
       // 调用API更新项目名称
       await api.updateProject(projectId, { idea_prompt: editingTitle.trim() });
@@ -226,7 +263,7 @@ export const History: React.FC = () => {
       setProjects(prev => prev.map(p => {
         const id = p.id || p.project_id;
         if (id === projectId) {
-          return { ...p, idea_prompt: editingTitle.trim() };
+          return { ...p, idea_prompt: editingTitle.trim(), title: editingTitle.trim() };
         }
         return p;
       }));
@@ -241,7 +278,7 @@ export const History: React.FC = () => {
         type: 'error' 
       });
     }
-  }, [editingTitle, show]);
+  }, [editingTitle, projects, show]);
 
   const handleTitleKeyDown = useCallback((e: React.KeyboardEvent, projectId: string) => {
     if (e.key === 'Enter') {
@@ -379,6 +416,21 @@ export const History: React.FC = () => {
                 />
               );
             })}
+
+            {/* 加载更多 */}
+            {nextCursor && (
+              <div className="flex justify-center pt-2">
+                <Button
+                  variant="secondary"
+                  size="sm"
+                  onClick={loadMoreProjects}
+                  disabled={isLoadingMore}
+                  loading={isLoadingMore}
+                >
+                  加载更多
+                </Button>
+              </div>
+            )}
           </div>
         )}
       </main>
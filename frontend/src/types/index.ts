@@ -43,6 +43,7 @@ export interface Page {
   outline_content: OutlineContent;
   description_content?: DescriptionContent;
   generated_image_url?: string; // 后端返回 generated_image_url
+  generated_image_srcset?: string; // 缩略图金字塔 srcset（/files/...?w=宽度）
   generated_image_path?: string; // 前端使用的别名
   status: PageStatus;
   created_at?: string;
@@ -51,7 +52,7 @@ export interface Page {
 }
 
 // 导出设置 - 组件提取方法
-export type ExportExtractorMethod = 'mineru' | 'hybrid';
+export type ExportExtractorMethod = 'mineru' | 'hybrid' | 'local';
 
 // 导出设置 - 背景图获取方法
 export type ExportInpaintMethod = 'generative' | 'baidu' | 'hybrid';
@@ -75,6 +76,24 @@ export interface Project {
   pages: Page[];
   created_at: string;
   updated_at: string;
+  // 摘要模式（view=summary）字段：历史列表不加载页面，改用聚合信息
+  title?: string;
+  page_count?: number;
+  image_page_count?: number;
+  description_page_count?: number;
+  cover_image_url?: string; // 封面缩略图（/files/...?w=宽度）
+}
+
+// 项目列表视图：full 包含页面，summary 只返回历史列表需要的字段
+export type ProjectListView = 'full' | 'summary';
+
+// 项目列表响应
+export interface ProjectListResponse {
+  projects: Project[];
+  has_more: boolean;
+  next_cursor: string | null; // keyset 分页游标，传给下一次请求的 cursor
+  limit: number;
+  offset: number;
 }
 
 // 任务状态
@@ -11,6 +11,11 @@ export const getProjectTitle = (project: Project): string => {
     return project.idea_prompt;
   }
   
+  // 摘要模式由后端给出标题（idea_prompt 或第一页标题）
+  if (project.title) {
+    return project.title;
+  }
+  
   // 如果没有 idea_prompt，尝试从第一个页面获取标题
   if (project.pages && project.pages.length > 0) {
     // 按 order_index 排序，找到第一个页面
@@ -33,6 +38,11 @@ export const getProjectTitle = (project: Project): string => {
  * 获取第一页图片URL
  */
 export const getFirstPageImage = (project: Project): string | null => {
+  // 摘要模式：后端返回的封面缩略图（带版本号的文件名，无需时间戳）
+  if (project.cover_image_url) {
+    return getImageUrl(project.cover_image_url);
+  }
+
   if (!project.pages || project.pages.length === 0) {
     return null;
   }
@@ -46,6 +56,30 @@ export const getFirstPageImage = (project: Project): string | null => {
   return null;
 };
 
+/**
+ * 获取页面统计（摘要模式使用后端聚合的数量，否则从页面列表计算）
+ */
+const getPageStats = (project: Project) => {
+  if (project.page_count !== undefined) {
+    return {
+      pageCount: project.page_count,
+      imagePageCount: project.image_page_count || 0,
+      descriptionPageCount: project.description_page_count || 0,
+    };
+  }
+  const pages = project.pages || [];
+  return {
+    pageCount: pages.length,
+    imagePageCount: pages.filter(p => p.generated_image_path).length,
+    descriptionPageCount: pages.filter(p => p.description_content).length,
+  };
+};
+
+/**
+ * 获取项目页数
+ */
+export const getPageCount = (project: Project): number => getPageStats(project).pageCount;
+
 /**
  * 格式化日期
  */
@@ -64,15 +98,14 @@ export const formatDate = (dateString: string): string => {
  * 获取项目状态文本
  */
 export const getStatusText = (project: Project): string => {
-  if (!project.pages || project.pages.length === 0) {
+  const { pageCount, imagePageCount, descriptionPageCount } = getPageStats(project);
+  if (pageCount === 0) {
     return '未开始';
   }
-  const hasImages = project.pages.some(p => p.generated_image_path);
-  if (hasImages) {
+  if (imagePageCount > 0) {
     return '已完成';
   }
-  const hasDescriptions = project.pages.some(p => p.description_content);
-  if (hasDescriptions) {
+  if (descriptionPageCount > 0) {
     return '待生成图片';
   }
   return '待生成描述';
@@ -96,13 +129,12 @@ export const getProjectRoute = (project: Project): string => {
   const projectId = project.id || project.project_id;
   if (!projectId) return '/';
   
-  if (project.pages && project.pages.length > 0) {
-    const hasImages = project.pages.some(p => p.generated_image_path);
-    if (hasImages) {
+  const { pageCount, imagePageCount, descriptionPageCount } = getPageStats(project);
+  if (pageCount > 0) {
+    if (imagePageCount > 0) {
       return `/project/${projectId}/preview`;
     }
-    const hasDescriptions = project.pages.some(p => p.description_content);
-    if (hasDescriptions) {
+    if (descriptionPageCount > 0) {
       return `/project/${projectId}/detail`;
     }
     return `/project/${projectId}/outline`;
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+表格单元格收缩基准测试
+
+在合成的表格（默认20行x30列，相邻单元格有轻微重叠）上对比逐对比较的原实现和
+BaiduOCRElementExtractor._shrink_cells_to_avoid_overlap 当前实现的耗时，并校验两者输出完全一致。
+
+使用方法:
+    python scripts/benchmark_table_shrink.py
+    python scripts/benchmark_table_shrink.py --rows 40 --cols 30 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from services.image_editability import extractors  # noqa: E402
+from services.image_editability.extractors import BaiduOCRElementExtractor  # noqa: E402
+
+
+def pairwise_min_gap(bboxes, chunk_size=None):
+    """原实现：逐对比较所有单元格"""
+    min_gap = float('inf')
+    for i, (x0_1, y0_1, x1_1, y1_1) in enumerate(bboxes):
+        for j, (x0_2, y0_2, x1_2, y1_2) in enumerate(bboxes):
+            if i >= j:
+                continue
+            x_overlap = not (x1_1 <= x0_2 or x1_2 <= x0_1)
+            y_overlap = not (y1_1 <= y0_2 or y1_2 <= y0_1)
+            if x_overlap and y_overlap:
+                overlap_x = min(x1_1, x1_2) - max(x0_1, x0_2)
+                overlap_y = min(y1_1, y1_2) - max(y0_1, y0_2)
+                min_gap = min(min_gap, -min(overlap_x, overlap_y))
+            elif x_overlap:
+                min_gap = min(min_gap, y0_2 - y1_1 if y1_1 <= y0_2 else y0_1 - y1_2)
+            elif y_overlap:
+                min_gap = min(min_gap, x0_2 - x1_1 if x1_1 <= x0_2 else x0_1 - x1_2)
+    return min_gap
+
+
+def make_table(rows, cols, seed=0):
+    """合成表格单元格：单元格边界带随机抖动，相邻单元格最多重叠3px"""
+    rng = random.Random(seed)
+    cells = []
+    for r in range(rows):
+        for c in range(cols):
+            x0, y0 = c * 60 + rng.uniform(-3, 0), r * 24 + rng.uniform(-3, 0)
+            x1, y1 = (c + 1) * 60 + rng.uniform(0, 3), (r + 1) * 24 + rng.uniform(0, 3)
+            cells.append({'text': f'{r},{c}', 'bbox': [round(x0), round(y0), round(x1), round(y1)]})
+    return cells
+
+
+def run(cells, repeat):
+    extractor = BaiduOCRElementExtractor(baidu_table_ocr_provider=None)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = extractor._shrink_cells_to_avoid_overlap(cells, depth=0)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='表格单元格收缩基准测试')
+    parser.add_argument('--rows', type=int, default=20)
+    parser.add_argument('--cols', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cells = make_table(args.rows, args.cols)
+    current, current_time = run(cells, args.repeat)
+    with patch.object(extractors, '_min_cell_gap', pairwise_min_gap):
+        legacy, legacy_time = run(cells, args.repeat)
+
+    print(f"表格 {args.rows}x{args.cols} ({len(cells)} 个单元格)")
+    print(f"  逐对比较: {legacy_time * 1000:.1f} ms")
+    print(f"  当前实现: {current_time * 1000:.1f} ms  ({legacy_time / current_time:.1f}x)")
+    print(f"  输出一致: {current == legacy}")
+    return 0 if current == legacy else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())